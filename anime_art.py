@@ -1,19 +1,45 @@
 import gzip
 import os
 import re
+import json
 import time
+import itertools
+import tempfile
+import sqlite3
+import queue
+import threading
+import unicodedata
+from array import array
+from collections import Counter, deque
 import xml.etree.ElementTree as ET
 import requests
-from config import DATA_DIR
+from config import DATA_DIR, DB_PATH
+import jobs
 
 ANIDB_API = "http://api.anidb.net:9001/httpapi"
 ANIDB_CDN = "https://cdn.anidb.net/images/main"
 TITLES_URL = "https://anidb.net/api/anime-titles.xml.gz"
 TITLES_CACHE = os.path.join(DATA_DIR, "anime-titles.xml.gz")
 TITLES_TTL = 86400  # 24 hours
+TITLES_RETRY = 3600  # seconds before retrying a failed refresh
+TITLES_META = os.path.join(DATA_DIR, "anime-titles.json")  # validators, last check
+DOWNLOAD_CHUNK = 64 * 1024
+TITLES_INDEX = os.path.join(DATA_DIR, "anime-titles.db")
+TITLES_INDEX_FORMAT = 1  # bump when the stored layout changes
+FUZZY_MIN_SCORE = 0.5  # trigram similarity needed for an automatic match
+SEARCH_POSTINGS_BUDGET = 5000  # title ids counted per fuzzy search
+SEARCH_RESCORE_MIN = 50  # candidates scored exactly per fuzzy search
+
+ANIDB_CACHE_DAYS = 30  # default lifetime of cached anime records
+ANIDB_NEGATIVE_CACHE_HOURS = 6  # default lifetime of cached misses and errors
 
 MIN_INTERVAL = 2.1  # seconds between API requests
-last_request_time = 0
+BURST = 1  # requests the token bucket lets through back to back
+BACKOFF_ERROR = 60  # first pause after a failed request, doubled while failures continue
+BACKOFF_BANNED = 1800  # first pause after AniDB reports a ban
+BACKOFF_MAX = 86400
+REQUEST_TIMEOUT = 120  # seconds a lookup waits for the scheduler
+WAIT_SAMPLES = 100  # queue wait times kept for metrics
 
 
 def log(msg):
@@ -24,16 +50,6 @@ ANIDB_CLIENT = "pyget"
 ANIDB_CLIENTVER = "1"
 
 
-def _rate_limit():
-    global last_request_time
-    elapsed = time.time() - last_request_time
-    if elapsed < MIN_INTERVAL:
-        wait = MIN_INTERVAL - elapsed
-        log(f"rate limit: sleeping {wait:.1f}s")
-        time.sleep(wait)
-    last_request_time = time.time()
-
-
 def _decode_response(resp):
     try:
         return gzip.decompress(resp.content)
@@ -45,54 +61,333 @@ def _decode_response(resp):
 # Title dump: download, cache, search
 # ---------------------------------------------------------------------------
 
+def _read_titles_meta():
+    try:
+        with open(TITLES_META) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_titles_meta(meta):
+    tmp_path = TITLES_META + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, TITLES_META)
+
+
 def _titles_cache_fresh():
-    """Return True if the local titles cache exists and is less than TTL seconds old."""
+    """Return True if the local titles cache exists and was checked less than TTL seconds ago."""
     if not os.path.exists(TITLES_CACHE):
         return False
-    age = time.time() - os.path.getmtime(TITLES_CACHE)
-    return age < TITLES_TTL
+    checked_at = _read_titles_meta().get("checked_at")
+    if checked_at is None:
+        checked_at = os.path.getmtime(TITLES_CACHE)
+    return time.time() - checked_at < TITLES_TTL
 
 
 def _download_titles():
-    """Download the AniDB title dump (gzipped XML) to the local cache path."""
-    log(f"downloading AniDB title dump")
+    """
+    Download the AniDB title dump (gzipped XML) to the local cache path.
+    The request is conditional on the cached copy's validators, and the
+    body is streamed to a temporary file that replaces the cache only once
+    complete. Returns True if the cache is now current.
+    """
+    meta = _read_titles_meta()
+    headers = {}
+    if os.path.exists(TITLES_CACHE):
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    log("downloading AniDB title dump")
+    tmp_path = None
     try:
-        resp = requests.get(TITLES_URL, timeout=60)
-        resp.raise_for_status()
-        with open(TITLES_CACHE, "wb") as f:
-            f.write(resp.content)
-        log(f"title dump saved ({len(resp.content)} bytes)")
+        with requests.get(TITLES_URL, headers=headers, timeout=60, stream=True) as resp:
+            if resp.status_code == 304:
+                log("title dump not modified")
+                meta["checked_at"] = time.time()
+                _write_titles_meta(meta)
+                return True
+            resp.raise_for_status()
+
+            fd, tmp_path = tempfile.mkstemp(dir=DATA_DIR, prefix="anime-titles-", suffix=".part")
+            size = 0
+            with os.fdopen(fd, "wb") as f:
+                for chunk in resp.iter_content(chunk_size=DOWNLOAD_CHUNK):
+                    f.write(chunk)
+                    size += len(chunk)
+            os.replace(tmp_path, TITLES_CACHE)
+            tmp_path = None
+
+            _write_titles_meta({
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+                "checked_at": time.time(),
+            })
+        log(f"title dump saved ({size} bytes)")
         return True
     except Exception as e:
         log(f"failed to download title dump: {e}")
         return False
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
 
 
 def _load_titles():
     """
     Parse the gzipped XML title dump and return a list of
     (aid, title_text) tuples covering all title variants.
+    The dump is parsed incrementally and each anime element is dropped
+    once read, so the whole document is never held in memory.
     """
+    entries = []
+    depth = 0
     try:
         with gzip.open(TITLES_CACHE, "rb") as f:
-            data = f.read()
-        root = ET.fromstring(data)
-    except Exception as e:
+            context = ET.iterparse(f, events=("start", "end"))
+            _, root = next(context)
+            for event, element in context:
+                if event == "start":
+                    depth += 1
+                    continue
+                depth -= 1
+                if depth != 0:
+                    continue
+                # A direct child of the root: one anime with its titles
+                aid = element.get("aid") or element.get("id")
+                if aid:
+                    entries.extend((aid, title_el.text) for title_el in element
+                                   if title_el.text)
+                root.clear()
+    except (OSError, EOFError, ET.ParseError, StopIteration) as e:
         log(f"failed to parse title dump: {e}")
         return []
-
-    entries = []
-    for anime in root:
-        aid = anime.get("aid") or anime.get("id")
-        if not aid:
-            continue
-        for title_el in anime:
-            text = title_el.text
-            if text:
-                entries.append((aid, text))
     return entries
 
 
+_ORDINAL_SEASON_RE = re.compile(r'\b(\d+)(?:st|nd|rd|th) season\b')
+_SHORT_SEASON_RE = re.compile(r'\bs(\d+)\b')
+_ROMAN_SUFFIX_RE = re.compile(r'\b(ii|iii|iv|v|vi)$')
+_ROMAN_NUMERALS = {'ii': '2', 'iii': '3', 'iv': '4', 'v': '5', 'vi': '6'}
+
+
+def normalize_title(title):
+    """
+    Reduce a title to lowercase ASCII words so that spelling variants
+    compare equal: accents and punctuation are dropped and season suffixes
+    ("2nd Season", "S2", "II") all become "season 2" or a bare number.
+    """
+    text = unicodedata.normalize('NFKD', title)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    text = re.sub(r'[^\w]+|_', ' ', text).strip()
+    text = _ORDINAL_SEASON_RE.sub(r'season \1', text)
+    text = _SHORT_SEASON_RE.sub(r'season \1', text)
+    text = _ROMAN_SUFFIX_RE.sub(lambda m: _ROMAN_NUMERALS[m.group(1)], text)
+    return ' '.join(text.split())
+
+
+def _trigrams(normalized):
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TitleIndex:
+    """
+    Lookup tables over the title dump: exact, case-folded and normalized
+    hash maps plus a trigram index for substring and fuzzy search. Where
+    several anime share a title the first one in the dump wins, as with a
+    linear scan.
+    """
+
+    def __init__(self, entries, source_mtime):
+        self.source_mtime = source_mtime
+        self.size = len(entries)
+        self.titles = entries
+        self.exact = {}
+        self.folded = {}
+        self.normalized = {}
+        self.norms = []
+        self.trigram_counts = array('H')
+        postings = {}
+        for i, (aid, title) in enumerate(entries):
+            norm = normalize_title(title)
+            self.exact.setdefault(title, aid)
+            self.folded.setdefault(title.casefold(), (aid, title))
+            self.normalized.setdefault(norm, (aid, title))
+            self.norms.append(norm)
+            trigrams = _trigrams(norm)
+            self.trigram_counts.append(min(len(trigrams), 0xFFFF))
+            for trigram in trigrams:
+                postings.setdefault(trigram, []).append(i)
+        self.postings = {trigram: array('I', ids) for trigram, ids in postings.items()}
+
+    def _substring(self, norm):
+        """Return the (aid, title) whose normalized title is the shortest containing norm."""
+        trigrams = [norm[i:i + 3] for i in range(len(norm) - 2)]
+        if trigrams:
+            # A title containing norm is in the postings of each of its trigrams
+            rarest = min(trigrams, key=lambda t: len(self.postings.get(t, ())))
+            candidates = self.postings.get(rarest, ())
+        else:
+            candidates = range(self.size)
+        matches = [i for i in candidates if norm in self.norms[i]]
+        if not matches:
+            return None
+        return self.titles[min(matches, key=lambda i: (len(self.norms[i]), i))]
+
+    def search(self, query, limit=10):
+        """
+        Rank anime by trigram similarity (Dice coefficient of the normalized
+        titles) to query. Returns up to limit (aid, title, score) tuples,
+        one per anime, best first.
+
+        Candidates are gathered from the query's rarest trigrams until
+        SEARCH_POSTINGS_BUDGET ids have been counted, then the best of them
+        are scored exactly; trigrams shared by half the dump (" th", "no ")
+        would otherwise dominate the cost while telling titles apart least.
+        """
+        query_trigrams = _trigrams(normalize_title(query))
+        ordered = sorted((len(self.postings[t]), t) for t in query_trigrams
+                         if t in self.postings)
+        counts = Counter()
+        counted = 0
+        for size, trigram in ordered:
+            if counted and counted + size > SEARCH_POSTINGS_BUDGET:
+                break
+            counts.update(self.postings[trigram])
+            counted += size
+        if not counts:
+            return []
+
+        scored = []
+        for i, _ in counts.most_common(max(limit * 4, SEARCH_RESCORE_MIN)):
+            shared = len(query_trigrams & _trigrams(self.norms[i]))
+            scored.append((2 * shared / (len(query_trigrams) + self.trigram_counts[i]), -i))
+
+        results, seen = [], set()
+        # Several titles of one anime can rank high, so look past limit
+        for score, i in sorted(scored, reverse=True):
+            aid, title = self.titles[-i]
+            if aid in seen:
+                continue
+            seen.add(aid)
+            results.append((aid, title, round(score, 3)))
+            if len(results) == limit:
+                break
+        return results
+
+    def find(self, query):
+        """Return (aid, title, how) of the best match for query, or None."""
+        if query in self.exact:
+            return self.exact[query], query, 'exact'
+        folded = query.casefold()
+        if folded in self.folded:
+            aid, title = self.folded[folded]
+            return aid, title, 'case-insensitive'
+        norm = normalize_title(query)
+        if norm in self.normalized:
+            aid, title = self.normalized[norm]
+            return aid, title, 'normalized'
+        if norm:
+            match = self._substring(norm)
+            if match:
+                return match[0], match[1], 'substring'
+        for aid, title, score in self.search(query, limit=1):
+            if score >= FUZZY_MIN_SCORE:
+                return aid, title, f'fuzzy ({score})'
+        return None
+
+
+_title_index = None
+_title_index_lock = threading.Lock()
+
+
+def _read_index_file(source_mtime):
+    """Load the persisted (aid, title) pairs if they were built from this dump."""
+    if not os.path.exists(TITLES_INDEX):
+        return None
+    try:
+        conn = sqlite3.connect(TITLES_INDEX)
+        try:
+            meta = dict(conn.execute('SELECT key, value FROM meta'))
+            if (meta.get('format') != str(TITLES_INDEX_FORMAT)
+                    or meta.get('source_mtime') != repr(source_mtime)):
+                return None
+            return conn.execute('SELECT aid, title FROM titles ORDER BY rowid').fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        log(f"ignoring unreadable title index: {e}")
+        return None
+
+
+def _write_index_file(entries, source_mtime):
+    """Persist (aid, title) pairs next to the dump, replacing any older index."""
+    tmp_path = TITLES_INDEX + ".tmp"
+    try:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        conn = sqlite3.connect(tmp_path)
+        with conn:
+            conn.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)')
+            conn.execute('CREATE TABLE titles (aid TEXT NOT NULL, title TEXT NOT NULL)')
+            conn.executemany('INSERT INTO meta VALUES (?, ?)', [
+                ('format', str(TITLES_INDEX_FORMAT)),
+                ('source_mtime', repr(source_mtime)),
+            ])
+            conn.executemany('INSERT INTO titles VALUES (?, ?)', entries)
+        conn.close()
+        os.replace(tmp_path, TITLES_INDEX)
+    except (OSError, sqlite3.Error) as e:
+        log(f"failed to write title index: {e}")
+
+
+def get_title_index():
+    """
+    Return the process-wide title index, building it on first use and again
+    whenever the dump's mtime changes. Returns None if there is no dump.
+    """
+    global _title_index
+    try:
+        source_mtime = os.path.getmtime(TITLES_CACHE)
+    except OSError:
+        return None
+
+    index = _title_index
+    if index is not None and index.source_mtime == source_mtime:
+        return index
+
+    # While a new dump is being indexed, keep answering from the previous one
+    if index is not None and not _title_index_lock.acquire(blocking=False):
+        return index
+    if index is None:
+        _title_index_lock.acquire()
+
+    try:
+        if _title_index is not None and _title_index.source_mtime == source_mtime:
+            return _title_index
+
+        started = time.time()
+        entries = _read_index_file(source_mtime)
+        if entries is not None:
+            source = "stored index"
+        else:
+            entries = _load_titles()
+            if not entries:
+                return _title_index
+            _write_index_file(entries, source_mtime)
+            source = "title dump"
+
+        _title_index = TitleIndex(entries, source_mtime)
+        log(f"loaded {len(entries)} titles from {source} in {time.time() - started:.2f}s")
+        return _title_index
+    finally:
+        _title_index_lock.release()
+
+
 def _season_number(season_name):
     """
     Extract an integer season number from a string like 'Season 03', 'S2', '3', etc.
@@ -136,44 +431,64 @@ def _season_candidates(show_name, season_name):
     return candidates
 
 
+_last_refresh_attempt = 0
+
+
+def refresh_titles():
+    """Job function: refresh the title dump if it changed and index it."""
+    if _download_titles():
+        get_title_index()
+
+
+jobs.register('anidb_titles', refresh_titles)
+
+
+def _ensure_title_index():
+    """
+    Return the title index, downloading the dump first if there is none.
+    A stale dump is refreshed by a background job while lookups keep using
+    the current index.
+    """
+    global _last_refresh_attempt
+    if not os.path.exists(TITLES_CACHE):
+        if not _download_titles():
+            log("no title dump available, cannot search")
+            return None
+    elif not _titles_cache_fresh() and time.time() - _last_refresh_attempt > TITLES_RETRY:
+        _last_refresh_attempt = time.time()
+        jobs.submit('anidb_titles', key='refresh', priority=jobs.PRIORITY_BACKGROUND,
+                    label='Refresh AniDB title dump')
+    return get_title_index()
+
+
+def search_titles(query, limit=10):
+    """
+    Rank AniDB titles by similarity to query for interactive lookup.
+    Returns a list of {'aid', 'title', 'score'} dicts, or None if no title
+    dump is available.
+    """
+    index = _ensure_title_index()
+    if index is None:
+        return None
+    return [{'aid': aid, 'title': title, 'score': score}
+            for aid, title, score in index.search(query, limit)]
+
+
 def find_aid_by_title(query):
     """
-    Search the local AniDB title dump for the best matching AID.
+    Search the AniDB title index for the best matching AID.
     Tries exact match first, then case-insensitive, then substring.
     Returns the AID string on success, or None.
     """
-    if not _titles_cache_fresh():
-        if not _download_titles():
-            if not os.path.exists(TITLES_CACHE):
-                log("no title dump available, cannot search")
-                return None
-            log("using stale title dump (download failed)")
-
-    entries = _load_titles()
-    if not entries:
+    index = _ensure_title_index()
+    if index is None:
         return None
 
-    log(f"searching title dump for '{query}' ({len(entries)} title entries)")
-    query_lower = query.lower()
-
-    # 1. Exact match
-    for aid, title in entries:
-        if title == query:
-            log(f"exact match: aid={aid} title='{title}'")
-            return aid
-
-    # 2. Case-insensitive exact match
-    for aid, title in entries:
-        if title.lower() == query_lower:
-            log(f"case-insensitive match: aid={aid} title='{title}'")
-            return aid
-
-    # 3. Substring match — prefer shortest title (most specific)
-    matches = [(aid, title) for aid, title in entries if query_lower in title.lower()]
-    if matches:
-        matches.sort(key=lambda x: len(x[1]))
-        aid, title = matches[0]
-        log(f"substring match: aid={aid} title='{title}'")
+    log(f"searching title index for '{query}' ({index.size} title entries)")
+    match = index.find(query)
+    if match:
+        aid, title, how = match
+        log(f"{how} match: aid={aid} title='{title}'")
         return aid
 
     log(f"no match found in title dump for '{query}'")
@@ -184,13 +499,29 @@ def find_aid_by_title(query):
 # AniDB HTTP API: fetch anime details by AID
 # ---------------------------------------------------------------------------
 
-def fetch_anime_by_aid(aid):
+def _parse_anime(root):
+    """Extract the fields we keep from an <anime> record."""
+    titles = [{'title': t.text,
+               'type': t.get('type'),
+               'lang': t.get('{http://www.w3.org/XML/1998/namespace}lang')}
+              for t in root.iter('title') if t.text]
+    episode_count = root.findtext('episodecount')
+    return {
+        'picture': root.findtext('picture'),
+        'titles': titles,
+        'episode_count': int(episode_count) if episode_count and episode_count.isdigit() else None,
+        'start_date': root.findtext('startdate'),
+        'end_date': root.findtext('enddate'),
+    }
+
+
+def _request_anime(aid):
     """
-    Call request=anime&aid=<aid> to retrieve the anime record.
-    Returns the picture filename string on success, or None.
+    Call request=anime&aid=<aid> on the HTTP API.
+    Returns (status, record): 'ok' with the parsed record, 'missing' if
+    AniDB has no such anime, 'banned', or 'error' for a bad client and
+    network failures. Only the scheduler worker calls this.
     """
-    _rate_limit()
-
     params = {
         'client': ANIDB_CLIENT,
         'clientver': ANIDB_CLIENTVER,
@@ -207,7 +538,7 @@ def fetch_anime_by_aid(aid):
 
         if resp.status_code != 200:
             log(f"unexpected status {resp.status_code}")
-            return None
+            return 'error', None
 
         data = _decode_response(resp)
         log(f"response XML: {data[:300]}")
@@ -218,37 +549,274 @@ def fetch_anime_by_aid(aid):
             text = root.text or ''
             if code == '302':
                 log(f"INVALID CLIENT (error 302) — check client name/version in settings")
+                return 'error', None
             elif code == '500':
                 log(f"BANNED (error 500) — IP may be rate-limited by AniDB")
-            else:
-                log(f"AniDB API error {code}: {text}")
-            return None
+                return 'banned', None
+            log(f"AniDB API error {code}: {text}")
+            return 'missing', None
 
-        picture = root.findtext('picture')
-        log(f"parsed: aid={aid}, picture={picture}")
-        return picture
+        record = _parse_anime(root)
+        log(f"parsed: aid={aid}, picture={record['picture']}")
+        return 'ok', record
 
     except Exception as e:
         log(f"exception during AniDB request: {e}")
 
-    return None
+    return 'error', None
+
+
+def _cache_ttls(c):
+    """Return the (positive, negative) cache lifetimes in seconds from settings."""
+    c.execute("SELECT key, value FROM settings WHERE key IN (?, ?)",
+              ('anidb_cache_days', 'anidb_negative_cache_hours'))
+    settings = dict(c.fetchall())
+    try:
+        days = float(settings.get('anidb_cache_days') or ANIDB_CACHE_DAYS)
+    except ValueError:
+        days = ANIDB_CACHE_DAYS
+    try:
+        hours = float(settings.get('anidb_negative_cache_hours') or ANIDB_NEGATIVE_CACHE_HOURS)
+    except ValueError:
+        hours = ANIDB_NEGATIVE_CACHE_HOURS
+    return days * 86400, hours * 3600
+
+
+def _store_anime(aid, status, record):
+    """Cache the outcome of an API request, negative outcomes for a shorter time."""
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    c = conn.cursor()
+    positive_ttl, negative_ttl = _cache_ttls(c)
+    now = time.time()
+    record = record or {}
+    c.execute('''
+        INSERT OR REPLACE INTO anidb_cache
+        (aid, status, picture, titles, episode_count, start_date, end_date,
+         fetched_at, expires_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (aid, status, record.get('picture'), json.dumps(record.get('titles', [])),
+          record.get('episode_count'), record.get('start_date'), record.get('end_date'),
+          now, now + (positive_ttl if status == 'ok' else negative_ttl)))
+    conn.commit()
+    conn.close()
+
+
+def _cached_anime(aid):
+    """Return (status, record) from anidb_cache if unexpired, else None."""
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    c = conn.cursor()
+    c.execute('SELECT * FROM anidb_cache WHERE aid = ?', (aid,))
+    row = c.fetchone()
+    conn.close()
+    if not row or row['expires_at'] <= time.time():
+        return None
+    if row['status'] != 'ok':
+        return row['status'], None
+    return 'ok', {
+        'picture': row['picture'],
+        'titles': json.loads(row['titles'] or '[]'),
+        'episode_count': row['episode_count'],
+        'start_date': row['start_date'],
+        'end_date': row['end_date'],
+    }
+
+
+# ---------------------------------------------------------------------------
+# Request scheduler
+# ---------------------------------------------------------------------------
+#
+# Every HTTP API request goes through one worker thread. A token bucket
+# keeps requests MIN_INTERVAL apart, a priority queue lets interactive
+# lookups overtake background ones, lookups of an AID that is already
+# queued wait for that request instead of making another, and errors and
+# bans pause the worker with exponential backoff.
+
+class _AnimeRequest:
+    def __init__(self, aid, priority):
+        self.aid = aid
+        self.priority = priority
+        self.enqueued_at = time.time()
+        self.started = False
+        self.result = ('error', None)
+        self.done = threading.Event()
+
+
+_requests = {}  # aid -> pending _AnimeRequest
+_request_queue = queue.PriorityQueue()  # (priority, seq, request)
+_request_sequence = itertools.count()
+_scheduler_lock = threading.Lock()
+_scheduler_thread = None
+_in_flight = None
+_tokens = BURST
+_tokens_at = time.monotonic()
+_backoff = 0
+_backoff_until = 0
+_waits = deque(maxlen=WAIT_SAMPLES)
+_counters = {'requests': 0, 'cache_hits': 0, 'coalesced': 0, 'errors': 0,
+             'bans': 0, 'timeouts': 0}
+
+
+def _token_delay():
+    """Seconds until the token bucket allows a request. Worker thread only."""
+    global _tokens, _tokens_at
+    now = time.monotonic()
+    _tokens = min(BURST, _tokens + (now - _tokens_at) / MIN_INTERVAL)
+    _tokens_at = now
+    return 0 if _tokens >= 1 else (1 - _tokens) * MIN_INTERVAL
+
+
+def _scheduler_worker():
+    global _in_flight, _tokens, _backoff, _backoff_until
+    while True:
+        entry = _request_queue.get()
+        priority, _, request = entry
+        with _scheduler_lock:
+            # Requests moved up to a higher priority leave a stale entry behind
+            if request.started or priority != request.priority:
+                continue
+
+        # Wait with the request back in the queue, so that anything more
+        # urgent queued meanwhile goes first
+        delay = max(_backoff_until - time.time(), _token_delay())
+        if delay > 0:
+            _request_queue.put(entry)
+            time.sleep(delay)
+            continue
+
+        with _scheduler_lock:
+            request.started = True
+            _in_flight = request.aid
+        _tokens -= 1
+
+        started = time.time()
+        status, record = _request_anime(request.aid)
+        _store_anime(request.aid, status, record)
+
+        if status in ('error', 'banned'):
+            floor = BACKOFF_BANNED if status == 'banned' else BACKOFF_ERROR
+            _backoff = min(max(_backoff * 2, floor), BACKOFF_MAX)
+            _backoff_until = time.time() + _backoff
+            log(f"request for aid={request.aid} failed ({status}), pausing for {_backoff}s")
+        else:
+            _backoff = 0
+            _backoff_until = 0
+
+        with _scheduler_lock:
+            _in_flight = None
+            _requests.pop(request.aid, None)
+            _counters['requests'] += 1
+            if status == 'error':
+                _counters['errors'] += 1
+            elif status == 'banned':
+                _counters['bans'] += 1
+            _waits.append(started - request.enqueued_at)
+            request.result = (status, record)
+        request.done.set()
+
+
+def _schedule(aid, priority):
+    """Queue a request for aid, or return the one already pending."""
+    global _scheduler_thread
+    with _scheduler_lock:
+        if _scheduler_thread is None:
+            _scheduler_thread = threading.Thread(target=_scheduler_worker,
+                                                 name='anidb-scheduler', daemon=True)
+            _scheduler_thread.start()
+
+        request = _requests.get(aid)
+        if request:
+            _counters['coalesced'] += 1
+            if priority < request.priority and not request.started:
+                request.priority = priority
+                _request_queue.put((priority, next(_request_sequence), request))
+            return request
+
+        request = _AnimeRequest(aid, priority)
+        _requests[aid] = request
+        _request_queue.put((priority, next(_request_sequence), request))
+        return request
+
+
+def scheduler_metrics():
+    """Queue depth, wait times and outcome counters of the request scheduler."""
+    with _scheduler_lock:
+        queued = [r for r in _requests.values() if not r.started]
+        waits = list(_waits)
+        metrics = dict(_counters)
+        metrics.update({
+            'queue_depth': len(queued),
+            'queued_by_priority': dict(Counter(r.priority for r in queued)),
+            'oldest_wait': round(time.time() - min(r.enqueued_at for r in queued), 1)
+                           if queued else 0,
+            'in_flight': _in_flight,
+        })
+    metrics.update({
+        'wait_avg': round(sum(waits) / len(waits), 2) if waits else 0,
+        'wait_max': round(max(waits), 2) if waits else 0,
+        'backoff_remaining': max(0, round(_backoff_until - time.time())),
+        'min_interval': MIN_INTERVAL,
+    })
+    return metrics
+
+
+def get_anime(aid, priority=jobs.PRIORITY_USER):
+    """
+    Return the AniDB record of aid as a dict (picture, titles,
+    episode_count, start_date, end_date), or None if it doesn't exist or
+    couldn't be fetched. Records are cached in anidb_cache; misses and
+    errors are cached for a shorter time so they aren't retried on every
+    lookup. Uncached AIDs are fetched through the request scheduler at
+    the given priority.
+    """
+    aid = str(aid)
+    cached = _cached_anime(aid)
+    if cached:
+        status, record = cached
+        with _scheduler_lock:
+            _counters['cache_hits'] += 1
+        log(f"cached {'record' if status == 'ok' else status} for aid={aid}")
+        return record
+
+    if _backoff_until - time.time() > REQUEST_TIMEOUT:
+        log(f"AniDB requests paused for {_backoff_until - time.time():.0f}s, skipping aid={aid}")
+        return None
+
+    request = _schedule(aid, priority)
+    if not request.done.wait(REQUEST_TIMEOUT):
+        with _scheduler_lock:
+            _counters['timeouts'] += 1
+        log(f"timed out waiting for aid={aid}, it stays queued")
+        return None
+    status, record = request.result
+    return record if status == 'ok' else None
+
+
+def fetch_anime_by_aid(aid, priority=jobs.PRIORITY_USER):
+    """
+    Retrieve the anime record of aid, from the cache if possible.
+    Returns the picture filename string on success, or None.
+    """
+    record = get_anime(aid, priority)
+    return record['picture'] if record else None
 
 
 # ---------------------------------------------------------------------------
 # Public interface
 # ---------------------------------------------------------------------------
 
-def fetch_artwork_url(show_name, season_name=None, anidb_id=None):
+def fetch_artwork_url(show_name, season_name=None, anidb_id=None, priority=jobs.PRIORITY_USER):
     """
     Resolve an AniDB CDN artwork URL for the given show.
 
     If anidb_id is provided, use it directly (skip title search).
     Otherwise search the title dump using season-aware candidate titles,
-    then fetch the picture filename via the HTTP API.
+    then fetch the picture filename via the HTTP API. priority orders the
+    API requests against other lookups (see get_anime).
     """
     if anidb_id:
         log(f"using direct AID {anidb_id}, fetching picture filename")
-        picture = fetch_anime_by_aid(anidb_id)
+        picture = fetch_anime_by_aid(anidb_id, priority)
         if picture:
             url = f"{ANIDB_CDN}/{picture}"
             log(f"direct AID artwork: {url}")
@@ -270,7 +838,7 @@ def fetch_artwork_url(show_name, season_name=None, anidb_id=None):
             log(f"no AID found for '{title}'")
             continue
 
-        picture = fetch_anime_by_aid(aid)
+        picture = fetch_anime_by_aid(aid, priority)
         if picture:
             url = f"{ANIDB_CDN}/{picture}"
             log(f"found artwork: {url}")
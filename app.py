@@ -8,46 +8,40 @@ import argparse
 import sys
 from flask import Flask
 from flask_cors import CORS
-from lock_manager import acquire_lock, setup_signal_handlers
+from lock_manager import (
+    acquire_lock,
+    setup_signal_handlers,
+    set_reloader_enabled,
+    is_reloader_parent_process
+)
 from database import init_db
 from routes import api_bp
 from services import (
     check_and_download_torrents,
     update_cached_shows,
-    update_cached_shows_once,
-    monitor_downloads_for_replacement
+    monitor_downloads_for_replacement,
+    sync_transmission_events
 )
+import events
+import jobs
+from artwork import remove_stale_uploads, migrate_artwork_store
 
 
-def create_app():
-    app = Flask(__name__, static_folder='static', static_url_path='')
-    CORS(app)
-
-    # Register blueprint
-    app.register_blueprint(api_bp)
-
-    return app
-
-
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser(description='Pyget Web')
-    parser.add_argument('--host', type=str,
-                        default='0.0.0.0', help='Host to listen on')
-    parser.add_argument('--port', type=int, default=5123,
-                        help='Port to listen on')
-    args, _ = parser.parse_known_args()
-
-    # Acquire lock to prevent multiple instances
-    if not acquire_lock():
-        sys.exit(1)
-
-    # Setup signal handlers for graceful shutdown
-    setup_signal_handlers()
+_workers_started = False
+_workers_lock = threading.Lock()
 
-    # Initialize database
-    init_db()
 
-    app = create_app()
+def start_background_workers():
+    """
+    Start the checker, cache and replacement threads.
+    Guarded so the workers run exactly once per process; returns False if
+    they were already started.
+    """
+    global _workers_started
+    with _workers_lock:
+        if _workers_started:
+            return False
+        _workers_started = True
 
     # Start background torrent checker
     checker_thread = threading.Thread(
@@ -64,7 +58,8 @@ if __name__ == '__main__':
     cache_thread.start()
 
     # Do initial cache update
-    threading.Thread(target=update_cached_shows_once, daemon=True).start()
+    jobs.submit('cache_all_profiles', key='startup', priority=jobs.PRIORITY_BACKGROUND,
+                label='Cache shows of all profiles')
 
     # Start replacement monitor thread
     replacement_thread = threading.Thread(
@@ -73,10 +68,75 @@ if __name__ == '__main__':
     )
     replacement_thread.start()
 
+    # Generate thumbnails for artwork stored before they existed
+    jobs.submit('thumbnail_backfill', key='startup', priority=jobs.PRIORITY_BACKGROUND,
+                label='Generate artwork thumbnails')
+
+    # Start Transmission sync for /api/events subscribers
+    threading.Thread(target=sync_transmission_events, daemon=True).start()
+    return True
+
+
+def create_app():
+    app = Flask(__name__, static_folder='static', static_url_path='')
+    CORS(app)
+
+    # Register blueprint
+    app.register_blueprint(api_bp)
+
+    return app
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Pyget Web')
+    parser.add_argument('--host', type=str,
+                        default='0.0.0.0', help='Host to listen on')
+    parser.add_argument('--port', type=int, default=5123,
+                        help='Port to listen on')
+    parser.add_argument('--production', action='store_true',
+                        help='Serve with a multi-threaded WSGI server and debug off')
+    parser.add_argument('--threads', type=int, default=8,
+                        help='Worker threads in production mode')
+    args, _ = parser.parse_known_args()
+
     # Detect if running from PyInstaller build
     is_pyinstaller = getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS')
 
-    # Disable debug mode in PyInstaller builds to prevent reloader subprocess issues
-    debug_mode = not is_pyinstaller
+    # PyInstaller builds always run in production mode, the debug reloader
+    # cannot re-exec a frozen binary
+    production = args.production or is_pyinstaller
+
+    # In debug mode the reloader re-runs this script in a child process;
+    # only that child takes the lock and runs the background workers
+    set_reloader_enabled(not production)
+
+    app = create_app()
+
+    if not is_reloader_parent_process():
+        # Acquire lock to prevent multiple instances
+        if not acquire_lock():
+            sys.exit(1)
+
+        # Setup signal handlers for graceful shutdown
+        setup_signal_handlers()
+
+        # Initialize database
+        init_db()
+
+        migrate_artwork_store()
+
+        # Unfinished jobs of a previous run; only resumable kinds are queued again
+        jobs.recover_jobs()
+        remove_stale_uploads()
+
+        start_background_workers()
 
-    app.run(debug=debug_mode, host=args.host, port=args.port)
+    if production:
+        from waitress import serve
+        # Every open /api/events stream holds a worker thread; keep half of
+        # them free for ordinary requests
+        events.MAX_SUBSCRIBERS = max(1, args.threads // 2)
+        print(f"Serving on http://{args.host}:{args.port} with {args.threads} threads")
+        serve(app, host=args.host, port=args.port, threads=args.threads)
+    else:
+        app.run(debug=True, host=args.host, port=args.port)
@@ -0,0 +1,501 @@
+"""
+Show artwork ingest and resized WebP thumbnails.
+
+Artwork fetches (AniDB lookups, image URLs and uploads) run as jobs (see
+jobs.py) on a small worker pool instead of on the request thread. Downloads are streamed
+to a temporary file, decoded and verified there, then moved into art/.
+Identical requests for a show while a job is pending collapse into that
+job, and jobs for the same show never run at the same time.
+
+Images are stored content-addressed as art/<sha256>.<ext>, so identical
+images are kept once however many shows use them and a file never changes
+under its URL. Every stored image gets thumbnails at THUMB_WIDTHS (never
+wider than the original) under art/thumbs/, named after a hash of the
+original. The list is stored as JSON in tracked_shows.image_thumbs and
+exposed by the API as thumbnails and image_srcset.
+
+Each file has a row in the artwork table whose refcount is kept up to date
+by triggers on tracked_shows, so orphans are found with an indexed query.
+Files written by older versions are moved into this layout once, at the
+first start after an upgrade, by migrate_artwork_store; the
+artwork_store_version setting records that it ran.
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from PIL import Image, ImageOps
+from config import DB_PATH, DATA_DIR
+from events import publish
+import jobs
+from anime_art import fetch_artwork_url
+
+THUMB_WIDTHS = (160, 320, 640)
+THUMB_QUALITY = 80
+ART_DIR = os.path.join(DATA_DIR, 'art')
+THUMB_DIR = os.path.join(ART_DIR, 'thumbs')
+
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+DOWNLOAD_CHUNK = 64 * 1024
+DOWNLOAD_TIMEOUT = 30
+ARTWORK_WORKERS = 2
+BACKFILL_WORKERS = 3  # concurrent image downloads of the artwork backfill
+
+IMAGE_EXTENSIONS = {'JPEG': '.jpg', 'PNG': '.png', 'GIF': '.gif', 'WEBP': '.webp'}
+CONTENT_NAME_RE = re.compile(r'^[0-9a-f]{64}\.[a-z]+$')  # art/<sha256>.<ext>
+ARTWORK_STORE_VERSION = 1  # bump to run migrate_artwork_store again
+
+# Held while files are written and referenced, and while orphans are
+# removed, so a file being stored is never deleted as an orphan
+_store_lock = threading.RLock()
+
+
+class ArtworkError(Exception):
+    """An artwork job failed for a reason worth showing to the user."""
+
+
+def log(msg):
+    print(f"[artwork] {msg}", flush=True)
+
+
+def generate_thumbnails(filepath):
+    """
+    Write WebP thumbnails of an image file.
+    Returns a list of {'width', 'path'} dicts, smallest first, with paths
+    relative to the data directory.
+    """
+    with open(filepath, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:16]
+
+    os.makedirs(THUMB_DIR, exist_ok=True)
+    thumbnails = []
+    with Image.open(filepath) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+        for width in sorted({min(w, image.width) for w in THUMB_WIDTHS}):
+            filename = f"{digest}-{width}.webp"
+            thumb_path = os.path.join(THUMB_DIR, filename)
+            if not os.path.exists(thumb_path):
+                height = max(1, round(image.height * width / image.width))
+                resized = image.resize((width, height), Image.LANCZOS)
+                tmp_path = thumb_path + '.tmp'
+                resized.save(tmp_path, 'WEBP', quality=THUMB_QUALITY, method=6)
+                os.replace(tmp_path, thumb_path)
+            thumbnails.append({'width': width, 'path': f"art/thumbs/{filename}"})
+    return thumbnails
+
+
+def srcset(thumbnails):
+    """Format thumbnails as an img srcset attribute value."""
+    return ', '.join(f"{t['path']} {t['width']}w" for t in thumbnails or [])
+
+
+def load_thumbnails(value):
+    """Parse the image_thumbs column."""
+    try:
+        return json.loads(value) if value else []
+    except ValueError:
+        return []
+
+
+def _register(c, rel_path, kind):
+    """Add a stored file to the artwork table; its refcount follows tracked_shows."""
+    filepath = os.path.join(DATA_DIR, rel_path)
+    c.execute('''
+        INSERT OR IGNORE INTO artwork (path, kind, size, created_at)
+        VALUES (?, ?, ?, ?)
+    ''', (rel_path, kind, os.path.getsize(filepath), time.time()))
+
+
+def set_show_image(tracked_id, rel_path):
+    """
+    Point a tracked show at a newly stored image, generating its thumbnails.
+    A show whose thumbnails cannot be generated still gets the original.
+    """
+    with _store_lock:
+        thumbnails = []
+        try:
+            thumbnails = generate_thumbnails(os.path.join(DATA_DIR, rel_path))
+        except Exception as e:
+            log(f"thumbnail generation failed for {rel_path}: {e}")
+
+        conn = sqlite3.connect(DB_PATH, timeout=30)
+        with conn:
+            _register(conn, rel_path, 'original')
+            for thumbnail in thumbnails:
+                _register(conn, thumbnail['path'], 'thumbnail')
+            conn.execute('UPDATE tracked_shows SET image_path = ?, image_thumbs = ? WHERE id = ?',
+                         (rel_path, json.dumps(thumbnails), tracked_id))
+        conn.close()
+
+    publish('tracked', {'action': 'updated', 'id': tracked_id, 'image_path': rel_path})
+    return thumbnails
+
+
+def backfill_thumbnails():
+    """Generate thumbnails for artwork stored before they existed."""
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    c = conn.cursor()
+    c.execute('''
+        SELECT id, image_path FROM tracked_shows
+        WHERE image_path IS NOT NULL AND image_thumbs IS NULL
+    ''')
+    rows = c.fetchall()
+
+    for tracked_id, rel_path in rows:
+        filepath = os.path.join(DATA_DIR, rel_path)
+        if not os.path.exists(filepath):
+            continue
+        with _store_lock:
+            try:
+                thumbnails = generate_thumbnails(filepath)
+            except Exception as e:
+                log(f"thumbnail generation failed for {rel_path}: {e}")
+                thumbnails = []
+            for thumbnail in thumbnails:
+                _register(c, thumbnail['path'], 'thumbnail')
+            c.execute('UPDATE tracked_shows SET image_thumbs = ? WHERE id = ?',
+                      (json.dumps(thumbnails), tracked_id))
+            conn.commit()
+
+    conn.close()
+    if rows:
+        log(f"generated thumbnails for {len(rows)} shows")
+
+
+def remove_orphans():
+    """Delete stored artwork no tracked show references. Returns the number of files."""
+    with _store_lock:
+        conn = sqlite3.connect(DB_PATH, timeout=30)
+        c = conn.cursor()
+        c.execute('SELECT path FROM artwork WHERE refcount <= 0')
+        paths = [row[0] for row in c.fetchall()]
+        removed = 0
+        for rel_path in paths:
+            try:
+                os.remove(os.path.join(DATA_DIR, rel_path))
+                removed += 1
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                log(f"error deleting {rel_path}: {e}")
+                continue
+            c.execute('DELETE FROM artwork WHERE path = ? AND refcount <= 0', (rel_path,))
+        conn.commit()
+        conn.close()
+    if removed:
+        log(f"removed {removed} unused artwork files")
+    return removed
+
+
+def _file_digest(filepath):
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def migrate_artwork_store():
+    """
+    Move artwork saved under show-name based filenames to content-addressed
+    names, register files the artwork table doesn't know yet (as orphans,
+    for remove_orphans) and recount every reference. Called at startup
+    before the workers start; does nothing once the store is at
+    ARTWORK_STORE_VERSION, as the triggers keep the counts from then on.
+    """
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    c = conn.cursor()
+
+    c.execute("SELECT value FROM settings WHERE key = 'artwork_store_version'")
+    row = c.fetchone()
+    if row and row[0].isdigit() and int(row[0]) >= ARTWORK_STORE_VERSION:
+        conn.close()
+        return
+
+    c.execute('''
+        SELECT DISTINCT image_path FROM tracked_shows
+        WHERE image_path IS NOT NULL AND image_path NOT LIKE 'art/thumbs/%'
+    ''')
+    legacy = [path for (path,) in c.fetchall()
+              if not CONTENT_NAME_RE.match(os.path.basename(path))]
+    moved = 0
+    for old_path in legacy:
+        filepath = os.path.join(DATA_DIR, old_path)
+        if not os.path.isfile(filepath):
+            continue
+        ext = os.path.splitext(old_path)[1].lower() or '.jpg'
+        new_path = f"art/{_file_digest(filepath)}{ext}"
+        target = os.path.join(DATA_DIR, new_path)
+        if os.path.exists(target):
+            os.remove(filepath)
+        else:
+            os.replace(filepath, target)
+        _register(c, new_path, 'original')
+        c.execute('UPDATE tracked_shows SET image_path = ? WHERE image_path = ?',
+                  (new_path, old_path))
+        moved += 1
+
+    # Files on disk the table doesn't know, e.g. from before it existed
+    c.execute('SELECT path FROM artwork')
+    known = {path for (path,) in c.fetchall()}
+    for directory, prefix, kind in ((ART_DIR, 'art/', 'original'),
+                                    (THUMB_DIR, 'art/thumbs/', 'thumbnail')):
+        if not os.path.isdir(directory):
+            continue
+        for filename in os.listdir(directory):
+            rel_path = prefix + filename
+            if rel_path not in known and os.path.isfile(os.path.join(directory, filename)):
+                _register(c, rel_path, kind)
+
+    c.execute('''
+        UPDATE artwork SET refcount =
+            (SELECT COUNT(*) FROM tracked_shows WHERE image_path = artwork.path)
+            + (SELECT COUNT(*) FROM tracked_shows, json_each(
+                   CASE WHEN json_valid(image_thumbs) THEN image_thumbs ELSE '[]' END)
+               WHERE json_extract(json_each.value, '$.path') = artwork.path)
+    ''')
+    c.execute('''
+        INSERT OR REPLACE INTO settings (key, value)
+        VALUES ('artwork_store_version', ?)
+    ''', (str(ARTWORK_STORE_VERSION),))
+    conn.commit()
+    conn.close()
+    if moved:
+        log(f"moved {moved} artwork files to content-addressed names")
+
+
+# ---------------------------------------------------------------------------
+# Ingest
+# ---------------------------------------------------------------------------
+
+def _temp_path():
+    fd, path = tempfile.mkstemp(dir=DATA_DIR, prefix='art-', suffix='.part')
+    os.close(fd)
+    return path
+
+
+def download_image(url):
+    """
+    Stream an image URL to a temporary file, enforcing MAX_IMAGE_BYTES.
+    Returns the temporary path; the caller owns it.
+    """
+    if not url or not url.startswith(('http://', 'https://')):
+        raise ArtworkError('Valid HTTP/HTTPS URL required')
+
+    try:
+        with requests.get(url, timeout=DOWNLOAD_TIMEOUT, stream=True) as resp:
+            resp.raise_for_status()
+            content_type = resp.headers.get('content-type', '')
+            if not content_type.startswith('image/'):
+                raise ArtworkError('URL does not point to an image')
+            length = resp.headers.get('content-length')
+            if length and length.isdigit() and int(length) > MAX_IMAGE_BYTES:
+                raise ArtworkError('Image exceeds 10MB limit')
+
+            path = _temp_path()
+            size = 0
+            try:
+                with open(path, 'wb') as f:
+                    for chunk in resp.iter_content(chunk_size=DOWNLOAD_CHUNK):
+                        size += len(chunk)
+                        if size > MAX_IMAGE_BYTES:
+                            raise ArtworkError('Image exceeds 10MB limit')
+                        f.write(chunk)
+            except BaseException:
+                os.remove(path)
+                raise
+    except requests.exceptions.RequestException as e:
+        raise ArtworkError(f'Failed to download image: {e}')
+
+    log(f"downloaded {size} bytes from {url}")
+    return path
+
+
+def store_image(tmp_path, tracked_id, show_name):
+    """
+    Verify a temporary image file and make it the show's artwork, stored
+    under its content hash. The file is consumed either way. Returns the
+    relative image path.
+    """
+    try:
+        try:
+            with Image.open(tmp_path) as image:
+                image.verify()
+                image_format = image.format
+        except Exception:
+            raise ArtworkError('Invalid image file')
+
+        ext = IMAGE_EXTENSIONS.get(image_format)
+        if not ext:
+            raise ArtworkError(f'Unsupported image format: {image_format}')
+
+        os.makedirs(ART_DIR, exist_ok=True)
+        rel_path = f"art/{_file_digest(tmp_path)}{ext}"
+        with _store_lock:
+            target = os.path.join(DATA_DIR, rel_path)
+            if not os.path.exists(target):
+                os.replace(tmp_path, target)
+            thumbnails = set_show_image(tracked_id, rel_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    log(f"saved {rel_path} for {show_name!r} ({len(thumbnails)} thumbnails)")
+    return rel_path
+
+
+def fetch_and_save_artwork(show_name, tracked_id, season_name=None, anidb_id=None,
+                           priority=jobs.PRIORITY_USER):
+    """Look up a show's artwork on AniDB and store it. Returns the relative path."""
+    log(f"fetching artwork for show={show_name!r} season={season_name!r} aid={anidb_id!r}")
+    url = fetch_artwork_url(show_name, season_name, anidb_id, priority)
+    if not url:
+        raise ArtworkError('No artwork found on AniDB')
+    return store_image(download_image(url), tracked_id, show_name)
+
+
+# ---------------------------------------------------------------------------
+# Jobs
+# ---------------------------------------------------------------------------
+
+_show_locks = defaultdict(threading.Lock)
+_show_locks_lock = threading.Lock()
+
+
+def _load_show(tracked_id):
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    c = conn.cursor()
+    c.execute('SELECT show_name, season_name, anidb_id FROM tracked_shows WHERE id = ?',
+              (tracked_id,))
+    row = c.fetchone()
+    conn.close()
+    return row
+
+
+def _run_artwork_job(tracked_id, source, url=None, upload_path=None,
+                     priority=jobs.PRIORITY_USER):
+    """Job function for the artwork kind. Returns {'image_path': ...}."""
+    with _show_locks_lock:
+        show_lock = _show_locks[tracked_id]
+
+    # Jobs for the same show from different sources run one at a time
+    with show_lock:
+        try:
+            show = _load_show(tracked_id)
+            if not show:
+                raise ArtworkError('Show not found')
+
+            if source == 'anidb':
+                image_path = fetch_and_save_artwork(
+                    show['show_name'], tracked_id, show['season_name'], show['anidb_id'],
+                    priority)
+            elif source == 'url':
+                image_path = store_image(download_image(url), tracked_id, show['show_name'])
+            else:
+                image_path = store_image(upload_path, tracked_id, show['show_name'])
+        finally:
+            if upload_path and os.path.exists(upload_path):
+                os.remove(upload_path)
+
+    return {'image_path': image_path}
+
+
+jobs.register('artwork', _run_artwork_job, workers=ARTWORK_WORKERS)
+jobs.register('thumbnail_backfill', backfill_thumbnails)
+
+
+def submit_artwork_job(tracked_id, source, url=None, upload_path=None,
+                       priority=jobs.PRIORITY_USER):
+    """
+    Queue an artwork job for a show. source is 'anidb', 'url' or 'upload'
+    (with upload_path, a temporary file that the job takes over). An
+    identical pending job is returned instead of queueing a duplicate.
+    """
+    key = f"{tracked_id}:{source}:{url if source == 'url' else upload_path or ''}"
+    return jobs.submit('artwork', (tracked_id, source, url, upload_path, priority), key=key,
+                       priority=priority, label=f"Artwork ({source}) for show {tracked_id}")
+
+
+def _shows_missing_artwork():
+    """Return (id, show_name) of tracked shows without an artwork file on disk."""
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    c = conn.cursor()
+    c.execute('SELECT id, show_name, image_path FROM tracked_shows ORDER BY id')
+    rows = c.fetchall()
+    conn.close()
+    return [(tracked_id, show_name) for tracked_id, show_name, image_path in rows
+            if not image_path or not os.path.exists(os.path.join(DATA_DIR, image_path))]
+
+
+def backfill_artwork():
+    """
+    Job function: fetch AniDB artwork for every tracked show that has none.
+
+    AIDs come from the local title index and records from the AniDB request
+    scheduler at background priority; images are downloaded by
+    BACKFILL_WORKERS threads. Shows that got artwork are skipped when the
+    job runs again, so it resumes where a restart interrupted it.
+    """
+    shows = _shows_missing_artwork()
+    total = len(shows)
+    progress = {'done': 0, 'total': total, 'found': 0, 'failed': 0}
+    progress_lock = threading.Lock()
+    job_id = jobs.current_job_id()
+    jobs.set_progress(progress, job_id)
+    log(f"backfilling artwork for {total} shows")
+
+    def fetch(show):
+        tracked_id, show_name = show
+        try:
+            _run_artwork_job(tracked_id, 'anidb', priority=jobs.PRIORITY_BACKGROUND)
+            found = True
+        except Exception as e:
+            log(f"no artwork for {show_name!r}: {e}")
+            found = False
+        with progress_lock:
+            progress['done'] += 1
+            progress['found' if found else 'failed'] += 1
+            jobs.set_progress(progress, job_id)
+
+    with ThreadPoolExecutor(max_workers=BACKFILL_WORKERS) as executor:
+        list(executor.map(fetch, shows))
+
+    log(f"artwork backfill found {progress['found']} of {total}")
+    return progress
+
+
+jobs.register('artwork_backfill', backfill_artwork, resumable=True)
+
+
+def submit_artwork_backfill():
+    """Queue the artwork backfill, or return the one already pending."""
+    return jobs.submit('artwork_backfill', key='all', priority=jobs.PRIORITY_BACKGROUND,
+                       label='Fetch missing artwork')
+
+
+def save_upload(file_storage):
+    """Save an uploaded file to a temporary path for an upload job."""
+    path = _temp_path()
+    file_storage.save(path)
+    return path
+
+
+def remove_stale_uploads():
+    """Delete temporary files left behind by jobs of a previous process."""
+    for filename in os.listdir(DATA_DIR):
+        if filename.startswith('art-') and filename.endswith('.part'):
+            try:
+                os.remove(os.path.join(DATA_DIR, filename))
+            except OSError:
+                pass
@@ -0,0 +1,184 @@
+"""
+Fingerprinted, precompressed static assets.
+
+The stylesheet and the ES modules under static/js are copied into an
+in-memory manifest under content-hashed names (js/main.3f2a1c9b.js), with
+gzip and, when the brotli package is installed, brotli variants computed
+once. Module imports and the references in index.html are rewritten to the
+hashed names, so /assets/<name> can be cached forever and only index.html
+has to be revalidated.
+
+A module's fingerprint covers every module it imports, directly or not, so
+changing api.js also renames main.js. The manifest is rebuilt when a file
+under static/ changes; names from earlier builds stay servable so pages
+loaded before the change keep working.
+
+Modules are not concatenated: they are loaded natively as ES modules and
+each one is small, so bundling would mean rewriting imports into a single
+scope for little gain over HTTP keep-alive.
+"""
+import os
+import re
+import gzip
+import hashlib
+import mimetypes
+import threading
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+ASSET_PREFIX = '/assets/'
+FINGERPRINTED = ('style.css',)
+FINGERPRINTED_DIRS = ('js',)
+MIN_COMPRESS_SIZE = 512
+
+IMPORT_RE = re.compile(r'''(\bfrom\s*|\bimport\s*\(?\s*)(['"])(\./[^'"]+\.js)\2''')
+
+_assets = {}  # fingerprinted name -> Asset, across all builds
+_index = None
+_built_mtime = None
+_lock = threading.Lock()
+
+
+class Asset:
+    """One response body with its precompressed variants."""
+
+    def __init__(self, body, mimetype):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.encoded = {}
+        if len(body) >= MIN_COMPRESS_SIZE:
+            self.encoded['gzip'] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.encoded['br'] = brotli.compress(body)
+
+    def negotiate(self, accept_encodings):
+        """Return (encoding, body) for the best encoding the client accepts."""
+        for encoding in ('br', 'gzip'):
+            if encoding in self.encoded and accept_encodings[encoding]:
+                return encoding, self.encoded[encoding]
+        return None, self.body
+
+
+def _source_files():
+    files = [name for name in FINGERPRINTED
+             if os.path.isfile(os.path.join(STATIC_DIR, name))]
+    for directory in FINGERPRINTED_DIRS:
+        root = os.path.join(STATIC_DIR, directory)
+        if os.path.isdir(root):
+            files += [f"{directory}/{name}" for name in sorted(os.listdir(root))
+                      if name.endswith('.js')]
+    return files
+
+
+def _latest_mtime():
+    paths = [os.path.join(STATIC_DIR, name) for name in _source_files()]
+    paths.append(os.path.join(STATIC_DIR, 'index.html'))
+    return max((os.path.getmtime(p) for p in paths if os.path.exists(p)), default=0)
+
+
+def _imports(name, source):
+    base = os.path.dirname(name)
+    return [os.path.normpath(os.path.join(base, spec)).replace(os.sep, '/')
+            for _, _, spec in IMPORT_RE.findall(source)]
+
+
+def _fingerprinted_name(name, digest):
+    root, ext = os.path.splitext(name)
+    return f"{root}.{digest[:8]}{ext}"
+
+
+def build():
+    """Rebuild the manifest from static/. Returns {original name: hashed name}."""
+    global _index, _built_mtime
+    mtime = _latest_mtime()
+    sources = {}
+    for name in _source_files():
+        with open(os.path.join(STATIC_DIR, name), 'rb') as f:
+            sources[name] = f.read().decode('utf-8')
+
+    graph = {name: [dep for dep in _imports(name, text) if dep in sources]
+             for name, text in sources.items()
+             if name.endswith('.js')}
+
+    def closure(name):
+        seen, stack = set(), [name]
+        while stack:
+            current = stack.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            stack.extend(graph.get(current, ()))
+        return sorted(seen)
+
+    manifest = {}
+    for name, text in sources.items():
+        digest = hashlib.sha256()
+        for dep in closure(name) if name in graph else [name]:
+            digest.update(dep.encode() + b'\0' + sources[dep].encode())
+        manifest[name] = _fingerprinted_name(name, digest.hexdigest())
+
+    built = {}
+    for name, text in sources.items():
+        if name in graph:
+            base = os.path.dirname(name)
+
+            def rewrite(match, base=base):
+                target = os.path.normpath(os.path.join(base, match.group(3))).replace(os.sep, '/')
+                if target not in manifest:
+                    return match.group(0)
+                relative = os.path.relpath(manifest[target], base or '.').replace(os.sep, '/')
+                return f"{match.group(1)}{match.group(2)}./{relative}{match.group(2)}"
+
+            text = IMPORT_RE.sub(rewrite, text)
+        mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if name.endswith('.js'):
+            mimetype = 'text/javascript'
+        built[manifest[name]] = Asset(text.encode('utf-8'), mimetype)
+
+    index = None
+    index_path = os.path.join(STATIC_DIR, 'index.html')
+    if os.path.isfile(index_path):
+        with open(index_path, encoding='utf-8') as f:
+            html = f.read()
+        for name, hashed in manifest.items():
+            html = re.sub(r'''((?:href|src)=["'])/?%s(["'])''' % re.escape(name),
+                          r'\g<1>%s%s\g<2>' % (ASSET_PREFIX, hashed), html)
+        index = Asset(html.encode('utf-8'), 'text/html')
+
+    with _lock:
+        _assets.update(built)
+        _index = index
+        _built_mtime = mtime
+    print(f"Built {len(built)} static assets"
+          f"{' (gzip, brotli)' if brotli is not None else ' (gzip)'}")
+    return manifest
+
+
+def _ensure_built():
+    with _lock:
+        built_mtime = _built_mtime
+    if built_mtime is None or _latest_mtime() != built_mtime:
+        build()
+
+
+def get_index():
+    """Return the rewritten index.html, rebuilding if static/ changed."""
+    _ensure_built()
+    with _lock:
+        return _index
+
+
+def get_asset(name):
+    """Return the Asset for a fingerprinted name, or None."""
+    with _lock:
+        asset = _assets.get(name)
+    if asset is None and _built_mtime is None:
+        _ensure_built()
+        with _lock:
+            asset = _assets.get(name)
+    return asset
@@ -0,0 +1,275 @@
+"""
+Registry of Transmission backends and placement of new torrents.
+
+The daemon configured through the transmission_host/transmission_port
+settings is always available as the default backend (id 0). Additional
+daemons live in the transmission_backends table, each with a weight and
+its own download directory root. Only backends marked local share the
+app's filesystem, so only their show directories are created up front.
+New torrents are placed on a healthy backend according to the
+backend_placement setting.
+"""
+import time
+import sqlite3
+import threading
+import transmissionrpc
+from config import DB_PATH
+
+DEFAULT_BACKEND_ID = 0
+HEALTH_TTL = 60  # seconds a health check result is reused
+RPC_TIMEOUT = 10
+
+PLACEMENT_POLICIES = ('torrent_count', 'free_space', 'affinity')
+
+_clients = {}
+_health = {}
+_lock = threading.Lock()
+
+
+def _get_setting(c, key, default=None):
+    c.execute('SELECT value FROM settings WHERE key = ?', (key,))
+    row = c.fetchone()
+    return row[0] if row and row[0] != '' else default
+
+
+class Backend:
+    """A single Transmission daemon that torrents can be placed on."""
+
+    def __init__(self, backend_id, name, host, port, username=None,
+                 password=None, weight=1.0, download_dir=None, local=False):
+        self.id = backend_id
+        self.name = name
+        self.host = host
+        self.port = int(port)
+        self.username = username or None
+        self.password = password or None
+        self.weight = max(float(weight), 0.01) if weight is not None else 1.0
+        self.download_dir = download_dir or None
+        self.local = bool(local)
+
+    @property
+    def key(self):
+        return (self.id, self.host, self.port, self.username, self.password)
+
+    def client(self, retry=False):
+        """
+        Return a cached RPC client, connecting on first use.
+        Returns None if the daemon is unreachable; a failed connection is
+        not retried for HEALTH_TTL seconds unless retry is set.
+        """
+        with _lock:
+            tc = _clients.get(self.key)
+            status = _health.get(self.key)
+        if tc is not None:
+            return tc
+        if (status and not status['healthy'] and not retry and
+                time.time() - status['checked_at'] < HEALTH_TTL):
+            return None
+
+        try:
+            tc = transmissionrpc.Client(
+                address=self.host, port=self.port,
+                user=self.username, password=self.password,
+                timeout=RPC_TIMEOUT
+            )
+        except Exception as e:
+            print(f"Transmission connection error ({self.name}): {e}")
+            self._record_health({'healthy': False, 'error': str(e)})
+            return None
+
+        with _lock:
+            _clients[self.key] = tc
+        return tc
+
+    def invalidate(self):
+        """Drop the cached client, e.g. after an RPC error."""
+        with _lock:
+            _clients.pop(self.key, None)
+            _health.pop(self.key, None)
+
+    def _record_health(self, status):
+        status['checked_at'] = time.time()
+        with _lock:
+            _health[self.key] = status
+        return status
+
+    def check_health(self, force=False):
+        """
+        Return a dict with healthy, torrent_count, free_space and error.
+        Results are cached for HEALTH_TTL seconds unless force is set.
+        """
+        with _lock:
+            cached = _health.get(self.key)
+        if cached and not force and time.time() - cached['checked_at'] < HEALTH_TTL:
+            return cached
+
+        tc = self.client(retry=True)
+        if tc is None:
+            with _lock:
+                return _health[self.key]
+
+        try:
+            stats = tc.session_stats()
+            torrent_count = stats.activeTorrentCount
+        except Exception as e:
+            self.invalidate()
+            return self._record_health({'healthy': False, 'error': str(e)})
+
+        free_space = None
+        try:
+            if self.download_dir:
+                free_space = tc.free_space(self.download_dir)
+            else:
+                free_space = tc.get_session().download_dir_free_space
+        except Exception:
+            pass
+
+        return self._record_health({
+            'healthy': True,
+            'torrent_count': torrent_count,
+            'free_space': free_space,
+            'error': None
+        })
+
+    def note_placement(self):
+        """Count a torrent placed here so later placements in the same cycle spread out."""
+        with _lock:
+            status = _health.get(self.key)
+            if status and status.get('torrent_count') is not None:
+                status['torrent_count'] += 1
+
+    def to_dict(self, include_health=False):
+        data = {
+            'id': self.id,
+            'name': self.name,
+            'host': self.host,
+            'port': self.port,
+            'username': self.username,
+            'weight': self.weight,
+            'download_dir': self.download_dir,
+            'local': self.local,
+            'is_default': self.id == DEFAULT_BACKEND_ID
+        }
+        if include_health:
+            health = dict(self.check_health())
+            health.pop('checked_at', None)
+            data['health'] = health
+        return data
+
+
+def get_backends():
+    """Return all enabled backends, starting with the default daemon."""
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    c = conn.cursor()
+
+    default_dir = _get_setting(c, 'download_directory')
+    backends = [Backend(
+        DEFAULT_BACKEND_ID,
+        'Default',
+        _get_setting(c, 'transmission_host', 'localhost'),
+        _get_setting(c, 'transmission_port', '9091'),
+        weight=_get_setting(c, 'transmission_weight', 1.0),
+        download_dir=default_dir,
+        local=_get_setting(c, 'transmission_local', '1') == '1'
+    )]
+
+    c.execute('''
+        SELECT id, name, host, port, username, password, weight, download_dir, local
+        FROM transmission_backends
+        WHERE enabled = 1
+        ORDER BY id
+    ''')
+    for row in c.fetchall():
+        backends.append(Backend(
+            row['id'], row['name'], row['host'], row['port'],
+            row['username'], row['password'], row['weight'],
+            row['download_dir'] or default_dir, row['local']
+        ))
+
+    conn.close()
+    return backends
+
+
+def forget_backend(backend_id):
+    """Drop cached clients and health of a backend that was edited or removed."""
+    with _lock:
+        for cache in (_clients, _health):
+            for key in [k for k in cache if k[0] == backend_id]:
+                del cache[key]
+
+
+def get_backend(backend_id):
+    """Return the backend with the given id, or None if unknown or disabled."""
+    if backend_id is None:
+        backend_id = DEFAULT_BACKEND_ID
+    for backend in get_backends():
+        if backend.id == backend_id:
+            return backend
+    return None
+
+
+def get_healthy_backends():
+    """Return the backends that currently answer RPC requests."""
+    return [b for b in get_backends() if b.check_health()['healthy']]
+
+
+def _get_show_affinity(show_id):
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    c = conn.cursor()
+    c.execute('SELECT backend_id FROM tracked_shows WHERE id = ?', (show_id,))
+    row = c.fetchone()
+    conn.close()
+    return row[0] if row else None
+
+
+def _set_show_affinity(show_id, backend_id):
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.execute('UPDATE tracked_shows SET backend_id = ? WHERE id = ?',
+                 (backend_id, show_id))
+    conn.commit()
+    conn.close()
+
+
+def _get_placement_policy():
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    c = conn.cursor()
+    policy = _get_setting(c, 'backend_placement', 'torrent_count')
+    conn.close()
+    return policy if policy in PLACEMENT_POLICIES else 'torrent_count'
+
+
+def choose_backend(show_id=None):
+    """
+    Pick the backend a new torrent for show_id should be added to.
+
+    torrent_count: fewest active torrents relative to weight.
+    free_space: most free space in the download directory, scaled by weight.
+    affinity: keep every episode of a show on the backend it first landed
+    on, placing new shows by torrent count.
+    Returns None when no backend is reachable.
+    """
+    backends = get_healthy_backends()
+    if not backends:
+        return None
+
+    policy = _get_placement_policy()
+
+    if policy == 'affinity' and show_id is not None:
+        affinity = _get_show_affinity(show_id)
+        for backend in backends:
+            if backend.id == affinity:
+                return backend
+
+    if len(backends) == 1:
+        chosen = backends[0]
+    elif policy == 'free_space':
+        chosen = max(backends, key=lambda b: (b.check_health().get('free_space') or 0) * b.weight)
+    else:
+        chosen = min(backends, key=lambda b: (b.check_health().get('torrent_count') or 0) / b.weight)
+
+    if policy == 'affinity' and show_id is not None:
+        _set_show_affinity(show_id, chosen.id)
+
+    chosen.note_placement()
+    return chosen
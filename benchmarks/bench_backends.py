@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Placement, health checks and aggregation across several Transmission backends.
+
+Starts N in-process StubTransmission daemons with uneven loads, registers
+them as the default and additional backends, and checks that:
+  - health checks report every daemon and its torrent count,
+  - torrent_count placement always picks an emptiest daemon,
+  - affinity placement keeps a show on one daemon,
+  - a stopped daemon is reported unhealthy and no longer chosen,
+  - /api/transmission/torrents lists the torrents of all live daemons.
+Exits non-zero if a check fails. Uses a throwaway data directory.
+
+    python benchmarks/bench_backends.py
+    python benchmarks/bench_backends.py --stubs 5 --torrents 200 --latency 0.002
+"""
+import os
+import sys
+import time
+import shutil
+import hashlib
+import argparse
+import tempfile
+from collections import Counter
+
+BENCH_DIR = tempfile.mkdtemp(prefix='pyget-bench-')
+os.environ['PYGET_DATA_DIR'] = BENCH_DIR
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sqlite3  # noqa: E402
+from config import DB_PATH  # noqa: E402
+from database import init_db  # noqa: E402
+from transmission_stub import StubTransmission  # noqa: E402
+
+
+def _magnet(name):
+    return f"magnet:?xt=urn:btih:{hashlib.sha1(name.encode()).hexdigest()}&dn=x"
+
+
+def register(stubs):
+    """Make the first stub the default backend and the others additional ones."""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    (host, port), _ = stubs[0]
+    for key, value in (('transmission_host', host), ('transmission_port', str(port)),
+                       ('download_directory', '/downloads'), ('transmission_local', '0')):
+        c.execute('INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)', (key, value))
+    for i, ((host, port), _) in enumerate(stubs[1:], 1):
+        c.execute('''
+            INSERT INTO transmission_backends (name, host, port, download_dir)
+            VALUES (?, ?, ?, ?)
+        ''', (f"Stub {i}", host, port, f"/stub{i}"))
+    conn.commit()
+    conn.close()
+
+
+def set_policy(policy):
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('backend_placement', ?)",
+                 (policy,))
+    conn.commit()
+    conn.close()
+
+
+def add_show(name):
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute('INSERT INTO tracked_shows (show_name, feed_url) VALUES (?, ?)', (name, 'unused'))
+    conn.commit()
+    conn.close()
+    return c.lastrowid
+
+
+def check(condition, message):
+    print(f"  {'ok  ' if condition else 'FAIL'} {message}")
+    return condition
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--stubs', type=int, default=3, help='number of stub daemons (2 or more)')
+    parser.add_argument('--torrents', type=int, default=120,
+                        help='torrents already on the busiest daemon, and torrents placed')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='simulated RPC latency in seconds')
+    args = parser.parse_args()
+    if args.stubs < 2:
+        parser.error('--stubs must be at least 2')
+
+    init_db()
+
+    # Imported after init_db so the modules see the benchmark database
+    import services
+    from backends import get_backends, choose_backend
+    from app import create_app
+
+    stubs = []
+    for i in range(args.stubs):
+        stub = StubTransmission(latency=args.latency, seed=i)
+        address = stub.start()
+        # Uneven starting loads: the last daemon is the emptiest
+        stub.populate(args.torrents * (args.stubs - i) // args.stubs, complete_fraction=0,
+                      prefix=f"Stub {i} Show")
+        stubs.append((address, stub))
+    register(stubs)
+    ok = True
+
+    try:
+        print(f"{args.stubs} stub daemons")
+
+        start = time.perf_counter()
+        backends = get_backends()
+        health = {b.id: b.check_health(force=True) for b in backends}
+        elapsed = time.perf_counter() - start
+        print(f"health checks: {elapsed * 1000:.1f}ms")
+        ok &= check(len(backends) == args.stubs and all(h['healthy'] for h in health.values()),
+                    'every daemon is registered and healthy')
+        ok &= check([health[b.id]['torrent_count'] for b in backends] ==
+                    [len(stub.torrents) for _, stub in stubs],
+                    'health reports the torrent count of each daemon')
+
+        set_policy('torrent_count')
+        emptiest = backends[-1].id
+        ok &= check(choose_backend().id == emptiest, 'torrent_count picks the emptiest daemon')
+        # choose_backend counted a placement that was never made
+        for backend in backends:
+            backend.check_health(force=True)
+
+        show_id = add_show('Placement Show')
+        stub_of = {b.id: stub for b, (_, stub) in zip(backends, stubs)}
+        placements = Counter()
+        misplaced = 0
+        start = time.perf_counter()
+        for i in range(args.torrents):
+            fewest = min(len(stub.torrents) for _, stub in stubs)
+            backend = choose_backend(show_id)
+            misplaced += len(stub_of[backend.id].torrents) != fewest
+            services._add_to_backend(backend, _magnet(f"placed {i}"), 'Placement Show', None)
+            placements[backend.id] += 1
+        elapsed = time.perf_counter() - start
+        print(f"placement: {args.torrents} torrents in {elapsed * 1000:.0f}ms, "
+              f"per backend {dict(sorted(placements.items()))}")
+        ok &= check(not misplaced, f'every torrent went to an emptiest daemon ({misplaced} did not)')
+        ok &= check(not os.path.exists('/stub1'), 'no directories created for remote daemons')
+
+        set_policy('affinity')
+        show_id = add_show('Affinity Show')
+        chosen = {choose_backend(show_id).id for _ in range(10)}
+        ok &= check(len(chosen) == 1, 'affinity keeps a show on one daemon')
+
+        set_policy('torrent_count')
+        stopped = backends[-1]
+        stubs[-1][1].stop()
+        stopped.invalidate()
+        ok &= check(not stopped.check_health(force=True)['healthy'],
+                    'a stopped daemon is reported unhealthy')
+        chosen = {choose_backend().id for _ in range(args.stubs * 3)}
+        ok &= check(stopped.id not in chosen, 'a stopped daemon is no longer chosen')
+
+        client = create_app().test_client()
+        start = time.perf_counter()
+        listed = client.get('/api/transmission/torrents').get_json()
+        elapsed = time.perf_counter() - start
+        print(f"aggregation: {len(listed)} torrents in {elapsed * 1000:.0f}ms")
+        live = sum(len(stub.torrents) for _, stub in stubs[:-1])
+        ok &= check(len(listed) == live, 'torrents of all live daemons are listed')
+        ok &= check({t['backend_id'] for t in listed} == {b.id for b in backends[:-1]},
+                    'each torrent carries its backend')
+    finally:
+        for _, stub in stubs:
+            stub.stop()
+        shutil.rmtree(BENCH_DIR, ignore_errors=True)
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Speed and accuracy of the release title parser.
+
+Parses the corpus in titles.tsv (real release titles with hand-checked
+fields) with utils.parse_title, both cold and through its memo, and with
+the per-field regexes it replaced. Prints per-field accuracy against the
+expected values and the time per title.
+
+    python benchmarks/bench_parser.py
+    python benchmarks/bench_parser.py --rounds 200 --show-misses
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import parse_title  # noqa: E402
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'titles.tsv')
+FIELDS = ('show_name', 'episode', 'episode_end', 'season', 'version',
+          'subgroup', 'quality', 'crc')
+
+
+def load_corpus(path):
+    """Rows of (title, expected fields); empty columns are None."""
+    rows = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if not line or line.startswith('#'):
+                continue
+            title, *values = line.split('\t')
+            expected = dict(zip(FIELDS, (v or None for v in values)))
+            expected['season'] = int(expected['season']) if expected['season'] else None
+            expected['version'] = int(expected['version'] or 1)
+            rows.append((title, expected))
+    return rows
+
+
+def legacy_parse(title):
+    """The five separate searches parse_episode_info used to run."""
+    show = re.search(r'\[.*?\]\s*(.*?)\s*-\s*\d+', title)
+    episode = re.search(r'-\s*(\d+)', title)
+    subgroup = re.search(r'^\[([^\]]+)\]', title)
+    version = re.search(r'\s+v(\d+)(?:\s|$)', title, re.IGNORECASE)
+    quality = re.search(r'\((\d+p)\)', title)
+    return {
+        'show_name': show.group(1).strip() if show else None,
+        'episode': episode.group(1) if episode else None,
+        'episode_end': None,
+        'season': None,
+        'version': int(version.group(1)) if version else 1,
+        'subgroup': subgroup.group(1).strip() if subgroup else None,
+        'quality': quality.group(1) if quality else None,
+        'crc': None,
+    }
+
+
+def cold_parse(title):
+    return parse_title.__wrapped__(title)._asdict()
+
+
+def memo_parse(title):
+    return parse_title(title)._asdict()
+
+
+def accuracy(parser, rows, show_misses=False):
+    hits = dict.fromkeys(FIELDS, 0)
+    for title, expected in rows:
+        parsed = parser(title)
+        for field in FIELDS:
+            if parsed[field] == expected[field]:
+                hits[field] += 1
+            elif show_misses:
+                print(f"  {field}: {parsed[field]!r} != {expected[field]!r}  {title}")
+    return {field: hits[field] / len(rows) for field in FIELDS}
+
+
+def time_per_title(parser, titles, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for title in titles:
+            parser(title)
+        samples.append((time.perf_counter() - start) / len(titles))
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--corpus', default=CORPUS)
+    parser.add_argument('--rounds', type=int, default=100)
+    parser.add_argument('--show-misses', action='store_true',
+                        help='print every field the new parser gets wrong')
+    args = parser.parse_args()
+
+    rows = load_corpus(args.corpus)
+    titles = [title for title, _ in rows]
+    print(f"{len(rows)} titles from {args.corpus}\n")
+
+    parsers = (('legacy', legacy_parse), ('parse_title', cold_parse),
+               ('memoised', memo_parse))
+
+    print(f"{'field':<12}" + ''.join(f"{name:>13}" for name, _ in parsers[:2]))
+    results = [accuracy(legacy_parse, rows),
+               accuracy(cold_parse, rows, args.show_misses)]
+    for field in FIELDS:
+        print(f"{field:<12}" + ''.join(f"{r[field]:>13.0%}" for r in results))
+
+    print()
+    for name, fn in parsers:
+        fn(titles[0])
+        per_title = time_per_title(fn, titles, args.rounds)
+        print(f"{name:<12} {per_title * 1e6:8.2f} us/title")
+
+
+if __name__ == '__main__':
+    main()
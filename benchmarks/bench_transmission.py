@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmarks for the Transmission-facing code paths.
+
+Runs the feed checker, the replacement monitor, the torrent-done hook and
+GET /api/transmission/torrents against an in-process StubTransmission while
+the number of torrents in the daemon (and in the download history) grows.
+Uses a throwaway data directory, so it never touches the real database.
+
+    python benchmarks/bench_transmission.py
+    python benchmarks/bench_transmission.py --sizes 100,1000,10000 --latency 0.002
+"""
+import os
+import sys
+import time
+import shutil
+import hashlib
+import argparse
+import tempfile
+import statistics
+
+BENCH_DIR = tempfile.mkdtemp(prefix='pyget-bench-')
+os.environ['PYGET_DATA_DIR'] = BENCH_DIR
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sqlite3  # noqa: E402
+from config import DB_PATH  # noqa: E402
+from database import init_db  # noqa: E402
+from transmission_stub import StubTransmission  # noqa: E402
+
+SHOWS = 20
+EPISODES = 12
+REPLACEMENTS = 50
+
+
+def _magnet(name):
+    return f"magnet:?xt=urn:btih:{hashlib.sha1(name.encode()).hexdigest()}&amp;dn=x"
+
+
+def write_feeds(feed_dir):
+    """Write one local RSS file per show and return their paths."""
+    os.makedirs(feed_dir, exist_ok=True)
+    paths = []
+    for show in range(SHOWS):
+        items = []
+        for ep in range(1, EPISODES + 1):
+            title = f"[Bench] Show {show} - {ep:02d} (1080p) [ABCD1234].mkv"
+            items.append(
+                f"<item><title>{title}</title><link>{_magnet(title)}</link>"
+                f"<pubDate>Mon, 0{ep % 7 + 1} Jan 2024 00:00:00 GMT</pubDate></item>"
+            )
+        path = os.path.join(feed_dir, f"show-{show}.xml")
+        with open(path, 'w') as f:
+            f.write('<?xml version="1.0"?><rss version="2.0"><channel><title>bench</title>'
+                    + ''.join(items) + '</channel></rss>')
+        paths.append(path)
+    return paths
+
+
+def reset_database(host, port, feed_paths):
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    for table in ('downloaded_torrents', 'tracked_shows', 'feed_profiles', 'torrent_files'):
+        c.execute(f'DELETE FROM {table}')
+    settings = {
+        'transmission_host': host,
+        'transmission_port': str(port),
+        'download_directory': os.path.join(BENCH_DIR, 'downloads'),
+        'auto_replace_v2': '1'
+    }
+    for key, value in settings.items():
+        c.execute('INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)', (key, value))
+    c.execute("INSERT INTO feed_profiles (name, base_url, interval) VALUES ('bench', 'http://bench', 30)")
+    profile_id = c.lastrowid
+    for i, path in enumerate(feed_paths):
+        c.execute('INSERT INTO tracked_shows (show_name, feed_url, profile_id) VALUES (?, ?, ?)',
+                  (f"Show {i}", path, profile_id))
+    conn.commit()
+    conn.close()
+
+
+def record_history(stub_hashes, stub):
+    """Record background torrents as history of an untracked-by-feed show."""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute("INSERT INTO tracked_shows (show_name, feed_url) VALUES ('History', 'unused')")
+    show_id = c.lastrowid
+    c.executemany('''
+        INSERT INTO downloaded_torrents (tracked_show_id, torrent_url, torrent_name, info_hash)
+        VALUES (?, ?, ?, ?)
+    ''', [(show_id, f"magnet:?xt=urn:btih:{h}", stub.torrents[h]['name'], h) for h in stub_hashes])
+    conn.commit()
+    conn.close()
+
+
+def schedule_replacements(stub, count, complete):
+    """Pair count recorded torrents with new v2 torrents. Returns the new hashes."""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute('''
+        SELECT id, tracked_show_id, torrent_name FROM downloaded_torrents
+        WHERE is_deleted = FALSE AND replaced_by IS NULL AND torrent_name LIKE '[Bench]%'
+        LIMIT ?
+    ''', (count,))
+    new_hashes = []
+    for old_id, show_id, name in c.fetchall():
+        new_name = name.replace('(1080p)', 'v2 (1080p)')
+        new_hash = hashlib.sha1(new_name.encode()).hexdigest()
+        with stub._lock:
+            stub._new_torrent(new_hash, new_name, None, complete=complete)
+        c.execute('''
+            INSERT INTO downloaded_torrents (tracked_show_id, torrent_url, torrent_name, info_hash, version)
+            VALUES (?, ?, ?, ?, 2)
+        ''', (show_id, f"magnet:?xt=urn:btih:{new_hash}", new_name, new_hash))
+        c.execute('UPDATE downloaded_torrents SET replaced_by = ? WHERE id = ?', (c.lastrowid, old_id))
+        new_hashes.append(new_hash)
+    conn.commit()
+    conn.close()
+    return new_hashes
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', default='100,1000,5000',
+                        help='comma-separated torrent counts to benchmark')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='simulated RPC latency in seconds')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='API requests per size (median is reported)')
+    args = parser.parse_args()
+
+    init_db()
+
+    # Imported after init_db so the modules see the benchmark database
+    import services
+    from app import create_app
+
+    client = create_app().test_client()
+    stub = StubTransmission(latency=args.latency, seed=1)
+    host, port = stub.start()
+    feed_paths = write_feeds(os.path.join(BENCH_DIR, 'feeds'))
+
+    print(f"{'torrents':>9} {'cold cycle':>11} {'warm cycle':>11} "
+          f"{'replace poll':>13} {'done hook':>10} {'GET torrents':>13}")
+
+    try:
+        for size in [int(s) for s in args.sizes.split(',')]:
+            stub.clear()
+            reset_database(host, port, feed_paths)
+            record_history(stub.populate(size), stub)
+
+            # Cold: every feed entry is new and gets added
+            cold = timed(services.run_checker_cycle, {})
+            # Warm: everything is recorded, only feeds and reconciliation run
+            warm = timed(services.run_checker_cycle, {})
+
+            schedule_replacements(stub, REPLACEMENTS, complete=True)
+            poll = timed(services.process_replacements)
+
+            hook_hashes = schedule_replacements(stub, REPLACEMENTS, complete=True)
+            hook = statistics.mean(timed(services.handle_torrent_done, h) for h in hook_hashes)
+
+            api = statistics.median(
+                timed(client.get, '/api/transmission/torrents') for _ in range(args.repeat))
+
+            print(f"{len(stub.torrents):>9} {cold * 1000:>9.0f}ms {warm * 1000:>9.0f}ms "
+                  f"{poll * 1000:>11.0f}ms {hook * 1000:>8.1f}ms {api * 1000:>11.0f}ms")
+    finally:
+        stub.stop()
+        shutil.rmtree(BENCH_DIR, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
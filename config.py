@@ -1,9 +1,16 @@
 import os
 
-# Data directory configuration
-DATA_DIR = os.path.expanduser('~/.local/share/pyget')
+# Data directory configuration (PYGET_DATA_DIR overrides it, e.g. for benchmarks)
+DATA_DIR = os.path.expanduser(os.environ.get('PYGET_DATA_DIR', '~/.local/share/pyget'))
 os.makedirs(DATA_DIR, exist_ok=True)
 os.makedirs(os.path.join(DATA_DIR, 'art'), exist_ok=True)
 
+# Local cache of downloaded .torrent files, named by info hash
+TORRENT_CACHE_DIR = os.path.join(DATA_DIR, 'torrents')
+os.makedirs(TORRENT_CACHE_DIR, exist_ok=True)
+
 # Database initialization
 DB_PATH = os.path.join(DATA_DIR, 'anime_tracker.db')
+
+# Copy of the webhook_token setting for torrent-done.sh to read
+WEBHOOK_TOKEN_PATH = os.path.join(DATA_DIR, 'webhook_token')
@@ -1,5 +1,15 @@
+import os
+import secrets
 import sqlite3
-from config import DB_PATH
+from config import DB_PATH, WEBHOOK_TOKEN_PATH
+
+# Tables whose writes are counted in data_versions
+VERSIONED_TABLES = (
+    'feed_profiles',
+    'tracked_shows',
+    'downloaded_torrents',
+    'cached_shows'
+)
 
 def init_db():
     """Initialize SQLite database with required tables."""
@@ -114,6 +124,118 @@ def init_db():
     except sqlite3.OperationalError:
         pass # Columns already exist
 
+    # Info hash of each added torrent, filled from the local torrent cache
+    try:
+        c.execute('ALTER TABLE downloaded_torrents ADD COLUMN info_hash TEXT')
+        print("Added info_hash column to downloaded_torrents")
+    except sqlite3.OperationalError:
+        pass # Column already exists
+
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_downloaded_torrents_info_hash
+        ON downloaded_torrents(info_hash)
+    ''')
+
+    # Backend each torrent was placed on (NULL means the default daemon)
+    try:
+        c.execute('ALTER TABLE downloaded_torrents ADD COLUMN backend_id INTEGER')
+        print("Added backend_id column to downloaded_torrents")
+    except sqlite3.OperationalError:
+        pass # Column already exists
+
+    # Backend a show sticks to under the affinity placement policy
+    try:
+        c.execute('ALTER TABLE tracked_shows ADD COLUMN backend_id INTEGER')
+        print("Added backend_id to tracked_shows")
+    except sqlite3.OperationalError:
+        pass
+
+    # Resized WebP thumbnails of image_path, as JSON [{width, path}]
+    try:
+        c.execute('ALTER TABLE tracked_shows ADD COLUMN image_thumbs TEXT')
+        print("Added image_thumbs to tracked_shows")
+    except sqlite3.OperationalError:
+        pass
+
+    # Match rules for routing feed entries to shows (see matcher.py);
+    # aliases are a JSON list of alternative names
+    try:
+        c.execute('ALTER TABLE tracked_shows ADD COLUMN aliases TEXT')
+        c.execute('ALTER TABLE tracked_shows ADD COLUMN rule_subgroup TEXT')
+        c.execute('ALTER TABLE tracked_shows ADD COLUMN rule_quality TEXT')
+        c.execute('ALTER TABLE tracked_shows ADD COLUMN rule_min_version INTEGER')
+        c.execute('ALTER TABLE tracked_shows ADD COLUMN rule_episode_min REAL')
+        c.execute('ALTER TABLE tracked_shows ADD COLUMN rule_episode_max REAL')
+        print("Added match rule columns to tracked_shows")
+    except sqlite3.OperationalError:
+        pass
+
+    # Re-add bookkeeping for the missing-torrent reconciliation pass
+    try:
+        c.execute('ALTER TABLE downloaded_torrents ADD COLUMN readd_attempts INTEGER DEFAULT 0')
+        c.execute('ALTER TABLE downloaded_torrents ADD COLUMN last_readd_at REAL')
+        print("Added re-add tracking columns to downloaded_torrents")
+    except sqlite3.OperationalError:
+        pass # Columns already exist
+
+    # Torrents found missing that the reconciliation pass must leave alone,
+    # such as episodes removed by hand before the pass existed
+    try:
+        c.execute('ALTER TABLE downloaded_torrents ADD COLUMN removed_by_user BOOLEAN DEFAULT FALSE')
+        print("Added removed_by_user column to downloaded_torrents")
+    except sqlite3.OperationalError:
+        pass # Column already exists
+
+    # Time of the last successful re-add; a torrent missing again after
+    # one was removed by hand
+    try:
+        c.execute('ALTER TABLE downloaded_torrents ADD COLUMN readded_at REAL')
+        print("Added readded_at column to downloaded_torrents")
+    except sqlite3.OperationalError:
+        pass # Column already exists
+
+    # Completion time reported by Transmission's torrent-done hook
+    try:
+        c.execute('ALTER TABLE downloaded_torrents ADD COLUMN completed_at TIMESTAMP')
+        print("Added completed_at column to downloaded_torrents")
+    except sqlite3.OperationalError:
+        pass # Column already exists
+
+    # Additional Transmission daemons besides the default one in settings
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS transmission_backends (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            host TEXT NOT NULL,
+            port INTEGER NOT NULL DEFAULT 9091,
+            username TEXT,
+            password TEXT,
+            weight REAL DEFAULT 1,
+            download_dir TEXT,
+            enabled INTEGER DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Backends sharing the app's filesystem, whose directories can be
+    # created before adding a torrent
+    try:
+        c.execute('ALTER TABLE transmission_backends ADD COLUMN local INTEGER DEFAULT 0')
+        print("Added local column to transmission_backends")
+    except sqlite3.OperationalError:
+        pass # Column already exists
+
+    # Cached .torrent files, keyed by source URL
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS torrent_files (
+            url TEXT PRIMARY KEY,
+            info_hash TEXT NOT NULL,
+            name TEXT,
+            size INTEGER,
+            fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
     # Cached shows table for profile feed caching
     c.execute('''
         CREATE TABLE IF NOT EXISTS cached_shows (
@@ -170,6 +292,43 @@ def init_db():
         INSERT OR IGNORE INTO settings (key, value)
         VALUES ('notifications_enabled', '0')
     ''')
+    c.execute('''
+        INSERT OR IGNORE INTO settings (key, value)
+        VALUES ('backend_placement', 'torrent_count')
+    ''')
+    # Shared secret of the torrent-done hook, generated once
+    c.execute('''
+        INSERT OR IGNORE INTO settings (key, value)
+        VALUES ('webhook_token', '')
+    ''')
+    c.execute('''
+        UPDATE settings SET value = ?
+        WHERE key = 'webhook_token' AND value = ''
+    ''', (secrets.token_hex(32),))
+    c.execute("SELECT value FROM settings WHERE key = 'webhook_token'")
+    write_webhook_token(c.fetchone()[0])
+    c.execute('''
+        INSERT OR IGNORE INTO settings (key, value)
+        VALUES ('transmission_local', '1')
+    ''')
+    c.execute('''
+        INSERT OR IGNORE INTO settings (key, value)
+        VALUES ('anidb_cache_days', '30')
+    ''')
+    c.execute('''
+        INSERT OR IGNORE INTO settings (key, value)
+        VALUES ('anidb_negative_cache_hours', '6')
+    ''')
+    c.execute('''
+        INSERT OR IGNORE INTO settings (key, value)
+        VALUES ('search_query_max_length', '200')
+    ''')
+    # Rows added before this time are only re-added when they have a hash
+    # or are within their show's max_age (see reconcile_missing_torrents)
+    c.execute('''
+        INSERT OR IGNORE INTO settings (key, value)
+        VALUES ('reconcile_since', datetime('now'))
+    ''')
 
 
     # Notifications log table
@@ -190,9 +349,216 @@ def init_db():
         ON cached_shows(show_name)
     ''')
 
+    # Serves the grouping of /api/shows by name and profile
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_cached_shows_name_profile
+        ON cached_shows(show_name, profile_id)
+    ''')
+
+    # Materialized release schedule, one row per tracked show. Triggers mark
+    # a show stale whenever its torrents change; schedule.py recomputes stale
+    # rows on the next read.
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS show_schedule (
+            tracked_show_id INTEGER PRIMARY KEY,
+            latest_episode TEXT,
+            last_release TEXT,
+            cadence_days INTEGER DEFAULT 7,
+            history_json TEXT DEFAULT '[]',
+            predictions_json TEXT DEFAULT '[]',
+            stale INTEGER DEFAULT 1,
+            updated_at TIMESTAMP
+        )
+    ''')
+
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_show_schedule_stale
+        ON show_schedule(stale) WHERE stale = 1
+    ''')
+
+    # Serves the per-show "latest releases" query of the schedule
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_downloaded_torrents_show_release
+        ON downloaded_torrents(tracked_show_id, COALESCE(published_at, added_at))
+    ''')
+
+    c.executescript('''
+        CREATE TRIGGER IF NOT EXISTS schedule_on_torrent_insert
+        AFTER INSERT ON downloaded_torrents
+        BEGIN
+            INSERT OR IGNORE INTO show_schedule (tracked_show_id) VALUES (NEW.tracked_show_id);
+            UPDATE show_schedule SET stale = 1 WHERE tracked_show_id = NEW.tracked_show_id;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS schedule_on_torrent_update
+        AFTER UPDATE OF tracked_show_id, torrent_name, published_at, added_at
+        ON downloaded_torrents
+        BEGIN
+            INSERT OR IGNORE INTO show_schedule (tracked_show_id) VALUES (NEW.tracked_show_id);
+            UPDATE show_schedule SET stale = 1
+            WHERE tracked_show_id IN (OLD.tracked_show_id, NEW.tracked_show_id);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS schedule_on_torrent_delete
+        AFTER DELETE ON downloaded_torrents
+        BEGIN
+            UPDATE show_schedule SET stale = 1 WHERE tracked_show_id = OLD.tracked_show_id;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS schedule_on_show_insert
+        AFTER INSERT ON tracked_shows
+        BEGIN
+            INSERT OR IGNORE INTO show_schedule (tracked_show_id) VALUES (NEW.id);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS schedule_on_show_delete
+        AFTER DELETE ON tracked_shows
+        BEGIN
+            DELETE FROM show_schedule WHERE tracked_show_id = OLD.id;
+        END;
+    ''')
+
+    # Backfill shows tracked before the schedule was materialized
+    c.execute('''
+        INSERT OR IGNORE INTO show_schedule (tracked_show_id)
+        SELECT id FROM tracked_shows
+    ''')
+
+    # Background jobs run by jobs.py
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            key TEXT,
+            label TEXT,
+            status TEXT NOT NULL,
+            priority INTEGER DEFAULT 0,
+            result TEXT,
+            error TEXT,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL
+        )
+    ''')
+
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_jobs_created_at
+        ON jobs(created_at)
+    ''')
+
+    try:
+        c.execute('ALTER TABLE jobs ADD COLUMN progress TEXT')
+        print("Added progress column to jobs")
+    except sqlite3.OperationalError:
+        pass
+
+    # Content-addressed artwork files (art/<sha256>.<ext> and their
+    # thumbnails) with the number of tracked_shows references to each,
+    # maintained by the triggers below. Files at zero are orphans.
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS artwork (
+            path TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            size INTEGER,
+            refcount INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL
+        )
+    ''')
+
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_artwork_orphans
+        ON artwork(path) WHERE refcount <= 0
+    ''')
+
+    def artwork_refs(row, delta):
+        thumbs = f"CASE WHEN json_valid({row}.image_thumbs) THEN {row}.image_thumbs ELSE '[]' END"
+        return f'''
+            UPDATE artwork SET refcount = refcount {delta} WHERE path = {row}.image_path;
+            UPDATE artwork SET refcount = refcount {delta} WHERE path IN (
+                SELECT json_extract(value, '$.path') FROM json_each({thumbs})
+            );
+        '''
+
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS artwork_refs_on_insert
+        AFTER INSERT ON tracked_shows
+        BEGIN
+            {artwork_refs('NEW', '+ 1')}
+        END
+    ''')
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS artwork_refs_on_update
+        AFTER UPDATE OF image_path, image_thumbs ON tracked_shows
+        BEGIN
+            {artwork_refs('OLD', '- 1')}
+            {artwork_refs('NEW', '+ 1')}
+        END
+    ''')
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS artwork_refs_on_delete
+        AFTER DELETE ON tracked_shows
+        BEGIN
+            {artwork_refs('OLD', '- 1')}
+        END
+    ''')
+
+    # Parsed AniDB anime records; misses and errors are cached too, with a
+    # shorter lifetime (see anime_art.get_anime)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS anidb_cache (
+            aid TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            picture TEXT,
+            titles TEXT,
+            episode_count INTEGER,
+            start_date TEXT,
+            end_date TEXT,
+            fetched_at REAL NOT NULL,
+            expires_at REAL NOT NULL
+        )
+    ''')
+
+    # Per-table data versions, bumped by triggers on every write. Read
+    # endpoints use them as cache keys and ETags.
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS data_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    for table in VERSIONED_TABLES:
+        c.execute('INSERT OR IGNORE INTO data_versions (name, version) VALUES (?, 0)',
+                  (table,))
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            c.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS bump_{table}_on_{event.lower()}
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE data_versions SET version = version + 1
+                    WHERE name = '{table}';
+                END
+            ''')
+
     conn.commit()
     conn.close()
 
+def write_webhook_token(token):
+    """Store the webhook token where torrent-done.sh can read it, owner-only."""
+    fd = os.open(WEBHOOK_TOKEN_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        f.write(token)
+
+def get_data_versions(tables):
+    """Return the current data versions of the given tables as a tuple."""
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    c = conn.cursor()
+    placeholders = ','.join('?' * len(tables))
+    c.execute(f'SELECT name, version FROM data_versions WHERE name IN ({placeholders})',
+              tuple(tables))
+    versions = dict(c.fetchall())
+    conn.close()
+    return tuple(versions.get(table, 0) for table in tables)
+
 def get_db_connection():
     conn = sqlite3.connect(DB_PATH, timeout=30, check_same_thread=False)
     conn.row_factory = sqlite3.Row
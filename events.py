@@ -0,0 +1,92 @@
+"""
+In-process publish/subscribe bus behind the /api/events stream.
+
+Publishers (the checker, notification log, replacement monitor, Transmission
+sync and the tracked-show routes) call publish() with a small delta event.
+Every open /api/events connection owns a Subscriber with a bounded queue; a
+subscriber that falls too far behind has its queue dropped and is sent a
+single "resync" event telling the browser to refetch instead.
+"""
+import json
+import queue
+import itertools
+import threading
+
+QUEUE_SIZE = 256
+HEARTBEAT_INTERVAL = 15  # seconds between keep-alive comments
+MAX_SUBSCRIBERS = 16  # each open stream holds a server thread
+
+_subscribers = set()
+_lock = threading.Lock()
+_event_ids = itertools.count(1)
+
+
+class Subscriber:
+    """The queue of pending events for one /api/events connection."""
+
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self.overflowed = False
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # Drop the backlog, the client refetches everything on resync
+            self.overflowed = True
+            with self.queue.mutex:
+                self.queue.queue.clear()
+
+
+def subscribe():
+    """Register a new subscriber. Returns None if MAX_SUBSCRIBERS are connected."""
+    with _lock:
+        if len(_subscribers) >= MAX_SUBSCRIBERS:
+            return None
+        subscriber = Subscriber()
+        _subscribers.add(subscriber)
+        return subscriber
+
+
+def unsubscribe(subscriber):
+    with _lock:
+        _subscribers.discard(subscriber)
+
+
+def subscriber_count():
+    with _lock:
+        return len(_subscribers)
+
+
+def publish(event_type, data=None):
+    """Send an event to every connected subscriber. Never blocks."""
+    with _lock:
+        subscribers = list(_subscribers)
+    if not subscribers:
+        return
+    event = (next(_event_ids), event_type, data)
+    for subscriber in subscribers:
+        subscriber.put(event)
+
+
+def _format(event_id, event_type, data):
+    payload = json.dumps(data, default=str)
+    return f"id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n"
+
+
+def stream(subscriber):
+    """Yield server-sent event frames for subscriber until the client disconnects."""
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            if subscriber.overflowed:
+                subscriber.overflowed = False
+                yield _format(next(_event_ids), 'resync', {})
+            try:
+                event = subscriber.queue.get(timeout=HEARTBEAT_INTERVAL)
+            except queue.Empty:
+                yield ": heartbeat\n\n"
+                continue
+            yield _format(*event)
+    finally:
+        unsubscribe(subscriber)
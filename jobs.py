@@ -0,0 +1,278 @@
+"""
+Bounded background job executor.
+
+One-off background work (checking a newly tracked show, caching a profile's
+shows, fetching artwork) is submitted here instead of each caller starting
+its own thread. Every job kind has a fixed-size worker pool fed by a
+priority queue, so user-initiated jobs run before background ones and a
+burst of submissions cannot spawn unbounded threads or hammer the indexer.
+
+A job submitted with a key while an identical job (same kind and key) is
+still queued or running is not queued again; the pending job is returned.
+Job state is stored in the jobs table and published on the event stream;
+jobs left queued or running by a previous process are marked interrupted on
+startup, and queued again if their kind was registered as resumable.
+"""
+import json
+import time
+import uuid
+import queue
+import sqlite3
+import itertools
+import threading
+from config import DB_PATH
+from events import publish
+
+PRIORITY_USER = 0
+PRIORITY_BACKGROUND = 10
+
+DEFAULT_WORKERS = 1
+JOB_RETENTION = 500  # finished jobs kept in the table
+
+_kinds = {}  # kind -> (function, worker count, resumable)
+_queues = {}  # kind -> PriorityQueue of (priority, seq, job id, key, args)
+_workers = {}  # kind -> started worker threads
+_pending = {}  # (kind, key) -> job id of a queued or running job
+_states = {}  # job id -> 'queued' or 'running', for jobs of this process
+_recorded = {}  # job id -> Event set once the job's row is written, while pending
+_sequence = itertools.count()
+_lock = threading.Lock()
+_current = threading.local()  # job id of the job a worker thread is running
+
+JOB_COLUMNS = ('id', 'kind', 'key', 'label', 'status', 'priority', 'result',
+               'error', 'progress', 'created_at', 'started_at', 'finished_at')
+
+
+def register(kind, function, workers=DEFAULT_WORKERS, resumable=False):
+    """
+    Declare a job kind. function is called with the job's args. Jobs of a
+    resumable kind take no args and are queued again after a restart
+    interrupted them; the function must skip work that is already done.
+    """
+    _kinds[kind] = (function, workers, resumable)
+
+
+def _connect():
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _row_to_job(row):
+    job = dict(row)
+    for field in ('result', 'progress'):
+        if job[field]:
+            try:
+                job[field] = json.loads(job[field])
+            except ValueError:
+                pass
+    return job
+
+
+def _update(job_id, **fields):
+    for field in ('result', 'progress'):
+        if field in fields:
+            fields[field] = json.dumps(fields[field], default=str)
+    assignments = ', '.join(f"{name} = ?" for name in fields)
+    conn = _connect()
+    conn.execute(f'UPDATE jobs SET {assignments} WHERE id = ?',
+                 (*fields.values(), job_id))
+    conn.commit()
+    conn.close()
+
+    job = get_job(job_id)
+    if job:
+        publish('job', job)
+
+
+def _ensure_workers(kind):
+    """Start the worker threads of a kind on first use. Call with _lock held."""
+    if kind in _workers:
+        return
+    _queues[kind] = queue.PriorityQueue()
+    workers = []
+    for i in range(_kinds[kind][1]):
+        thread = threading.Thread(target=_worker, args=(kind,),
+                                  name=f"job-{kind}-{i}", daemon=True)
+        thread.start()
+        workers.append(thread)
+    _workers[kind] = workers
+
+
+def _worker(kind):
+    function = _kinds[kind][0]
+    jobs = _queues[kind]
+    while True:
+        priority, _, job_id, key, args = jobs.get()
+        with _lock:
+            # A job re-queued at a higher priority is already taken
+            if _states.get(job_id) != 'queued':
+                continue
+            _states[job_id] = 'running'
+
+        _update(job_id, status='running', started_at=time.time())
+        _current.job_id = job_id
+        try:
+            result = function(*args)
+            status, error = 'done', None
+        except Exception as e:
+            print(f"Job {kind} {job_id} failed: {e}")
+            result, status, error = None, 'failed', str(e) or type(e).__name__
+        finally:
+            _current.job_id = None
+
+        with _lock:
+            del _states[job_id]
+            _recorded.pop(job_id, None)
+            if key is not None and _pending.get((kind, key)) == job_id:
+                del _pending[(kind, key)]
+        _update(job_id, status=status, result=result, error=error,
+                finished_at=time.time())
+
+
+def submit(kind, args=(), key=None, priority=PRIORITY_USER, label=None):
+    """
+    Queue a job and return it as a dict. If a job of the same kind and key
+    is still pending it is returned instead, moved up if the new request
+    has a higher priority.
+    """
+    if kind not in _kinds:
+        raise ValueError(f"Unknown job kind: {kind}")
+    if key is not None:
+        key = str(key)
+
+    with _lock:
+        _ensure_workers(kind)
+        existing = _pending.get((kind, key)) if key is not None else None
+        if existing:
+            recorded = _recorded.get(existing)
+        else:
+            # Only the slot is reserved under the lock, so a duplicate
+            # submitted meanwhile finds it; the row is written outside and
+            # the job queued once the row exists
+            job_id = uuid.uuid4().hex[:12]
+            recorded = _recorded[job_id] = threading.Event()
+            _states[job_id] = 'queued'
+            if key is not None:
+                _pending[(kind, key)] = job_id
+
+    if existing:
+        if recorded is not None:
+            recorded.wait()
+        with _lock:
+            if _states.get(existing) == 'queued':
+                # The stale lower-priority entry is skipped by the worker
+                _queues[kind].put((priority, next(_sequence), existing, key, args))
+        conn = _connect()
+        conn.execute('UPDATE jobs SET priority = MIN(priority, ?) WHERE id = ?',
+                     (priority, existing))
+        conn.commit()
+        conn.close()
+        return get_job(existing)
+
+    try:
+        conn = _connect()
+        conn.execute('''
+            INSERT INTO jobs (id, kind, key, label, status, priority, created_at)
+            VALUES (?, ?, ?, ?, 'queued', ?, ?)
+        ''', (job_id, kind, key, label, priority, time.time()))
+        conn.commit()
+        conn.close()
+    except Exception:
+        with _lock:
+            del _states[job_id]
+            del _recorded[job_id]
+            if key is not None and _pending.get((kind, key)) == job_id:
+                del _pending[(kind, key)]
+        recorded.set()
+        raise
+    _queues[kind].put((priority, next(_sequence), job_id, key, args))
+    recorded.set()
+
+    job = get_job(job_id)
+    publish('job', job)
+    return job
+
+
+def current_job_id():
+    """Return the id of the job running on this thread, or None."""
+    return getattr(_current, 'job_id', None)
+
+
+def set_progress(progress, job_id=None):
+    """
+    Record a job's progress (a dict such as {'done': 3, 'total': 10}) and
+    publish it. job_id defaults to the job running on this thread; helper
+    threads of a job pass it explicitly. Does nothing outside a job.
+    """
+    job_id = job_id or current_job_id()
+    if job_id:
+        _update(job_id, progress=progress)
+
+
+def get_job(job_id):
+    conn = _connect()
+    c = conn.cursor()
+    c.execute(f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs WHERE id = ?", (job_id,))
+    row = c.fetchone()
+    conn.close()
+    return _row_to_job(row) if row else None
+
+
+def list_jobs(status=None, kind=None, limit=50):
+    """Return the most recent jobs, optionally filtered by status and kind."""
+    filters, params = [], []
+    if status:
+        filters.append('status = ?')
+        params.append(status)
+    if kind:
+        filters.append('kind = ?')
+        params.append(kind)
+    where = f"WHERE {' AND '.join(filters)}" if filters else ''
+
+    conn = _connect()
+    c = conn.cursor()
+    c.execute(f'''
+        SELECT {', '.join(JOB_COLUMNS)} FROM jobs {where}
+        ORDER BY created_at DESC
+        LIMIT ?
+    ''', (*params, limit))
+    jobs = [_row_to_job(row) for row in c.fetchall()]
+    conn.close()
+    return jobs
+
+
+def recover_jobs():
+    """
+    Mark jobs left queued or running by a previous process as interrupted,
+    queue the resumable ones again and drop old finished jobs. Called once
+    at startup, after every job kind has been registered.
+    """
+    conn = _connect()
+    c = conn.cursor()
+    c.execute(f'''
+        SELECT {', '.join(JOB_COLUMNS)} FROM jobs
+        WHERE status IN ('queued', 'running')
+        ORDER BY created_at
+    ''')
+    unfinished = c.fetchall()
+    c.execute('''
+        UPDATE jobs SET status = 'interrupted', finished_at = ?
+        WHERE status IN ('queued', 'running')
+    ''', (time.time(),))
+    c.execute('''
+        DELETE FROM jobs WHERE id NOT IN (
+            SELECT id FROM jobs ORDER BY created_at DESC LIMIT ?
+        )
+    ''', (JOB_RETENTION,))
+    conn.commit()
+    conn.close()
+
+    resumed = 0
+    for job in unfinished:
+        if job['kind'] in _kinds and _kinds[job['kind']][2]:
+            submit(job['kind'], key=job['key'], priority=job['priority'], label=job['label'])
+            resumed += 1
+    if unfinished:
+        print(f"Marked {len(unfinished)} unfinished jobs as interrupted, resumed {resumed}")
+    return len(unfinished)
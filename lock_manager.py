@@ -7,11 +7,22 @@ from config import DATA_DIR
 
 LOCK_FILE = os.path.join(DATA_DIR, 'pyget-web.pid')
 _lock_file_handle = None
+_reloader_enabled = False
 
 
-def is_flask_reloader_process():
-    """Check if we're running in Flask's reloader subprocess."""
-    return os.environ.get('WERKZEUG_RUN_MAIN') != 'true'
+def set_reloader_enabled(enabled):
+    """Tell the lock manager whether the Flask debug reloader is in use."""
+    global _reloader_enabled
+    _reloader_enabled = enabled
+
+
+def is_reloader_parent_process():
+    """
+    Check if we're the Flask reloader's watcher process.
+    With the reloader on, the app actually runs in a child process started
+    with WERKZEUG_RUN_MAIN=true; without it there is only one process.
+    """
+    return _reloader_enabled and os.environ.get('WERKZEUG_RUN_MAIN') != 'true'
 
 
 def is_process_running(pid):
@@ -36,9 +47,9 @@ def acquire_lock():
     """Acquire the application lock. Returns True if successful, False otherwise."""
     global _lock_file_handle
 
-    # Skip lock acquisition in Flask's reloader subprocess
-    if is_flask_reloader_process():
-        print("Skipping lock acquisition (Flask reloader subprocess)")
+    # Skip lock acquisition in Flask's reloader watcher process
+    if is_reloader_parent_process():
+        print("Skipping lock acquisition (Flask reloader watcher process)")
         return True
 
     existing_pid = read_pid_from_lock()
@@ -83,8 +94,8 @@ def release_lock():
     """Release the application lock."""
     global _lock_file_handle
 
-    # Skip lock release in Flask's reloader subprocess
-    if is_flask_reloader_process():
+    # Skip lock release in Flask's reloader watcher process
+    if is_reloader_parent_process():
         return
 
     try:
@@ -102,8 +113,8 @@ def release_lock():
 
 def setup_signal_handlers():
     """Setup signal handlers for graceful shutdown."""
-    # Only set up handlers in the main process
-    if is_flask_reloader_process():
+    # Only set up handlers in the process that runs the app
+    if is_reloader_parent_process():
         return
 
     def signal_handler(signum, frame):
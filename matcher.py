@@ -0,0 +1,258 @@
+"""
+Routing of feed entries to tracked shows.
+
+A ShowMatcher is compiled from the tracked shows and their match rules.
+The show name parsed from an entry's title is looked up by its normalized
+form among the show names and aliases; aliases are also found anywhere in
+the title by a word-level Aho-Corasick automaton, for titles whose show
+name doesn't parse or is given in another language. Candidates are then
+filtered by the rules of each show (subgroup, quality, minimum version and
+episode range), so an entry costs time linear in its title length however
+many shows are tracked.
+
+The shared matcher behind get_matcher() follows the tracked_shows data
+version and only re-indexes shows whose name, aliases or rules changed.
+"""
+import json
+import math
+import sqlite3
+import threading
+from collections import deque
+from config import DB_PATH
+from database import get_data_versions
+from utils import parse_title
+from anime_art import normalize_title
+
+# Columns of tracked_shows holding match rules, as accepted by the API
+RULE_FIELDS = ('aliases', 'rule_subgroup', 'rule_quality', 'rule_min_version',
+               'rule_episode_min', 'rule_episode_max')
+
+
+def parse_rules(data):
+    """
+    Column values of the match rules in an API request body, in RULE_FIELDS
+    order. Empty fields clear a rule; aliases may be a list or a comma
+    separated string. Raises ValueError for malformed values.
+    """
+    aliases = data.get('aliases') or []
+    if isinstance(aliases, str):
+        aliases = aliases.split(',')
+    if not isinstance(aliases, list) or not all(isinstance(a, str) for a in aliases):
+        raise ValueError('aliases must be a list of names')
+    aliases = [a.strip() for a in aliases if a.strip()]
+
+    def number(field, cast):
+        value = data.get(field)
+        if value is None or value == '':
+            return None
+        try:
+            number = cast(value)
+        except (TypeError, ValueError, OverflowError):
+            raise ValueError(f'{field} must be a number')
+        if not math.isfinite(number):
+            raise ValueError(f'{field} must be a finite number')
+        return number
+
+    def text(field):
+        value = data.get(field)
+        return (value.strip() or None) if isinstance(value, str) else None
+
+    return (json.dumps(aliases) if aliases else None,
+            text('rule_subgroup'), text('rule_quality'),
+            number('rule_min_version', int),
+            number('rule_episode_min', float), number('rule_episode_max', float))
+
+
+class ShowRules:
+    """Per-show filters an entry must pass once its title matched."""
+    __slots__ = ('subgroup', 'quality', 'min_version', 'episode_min', 'episode_max')
+
+    def __init__(self, subgroup, quality, min_version, episode_min, episode_max):
+        self.subgroup = subgroup.casefold() if subgroup else None
+        self.quality = quality.casefold() if quality else None
+        self.min_version = min_version
+        self.episode_min = episode_min
+        self.episode_max = episode_max
+
+    def accepts(self, info):
+        if self.subgroup and (info.subgroup or '').casefold() != self.subgroup:
+            return False
+        if self.quality and (info.quality or '').casefold() != self.quality:
+            return False
+        if self.min_version and info.version < self.min_version:
+            return False
+        if self.episode_min is not None or self.episode_max is not None:
+            if not info.episode:
+                return False
+            # Batches must lie within the range as a whole
+            first = float(info.episode)
+            last = float(info.episode_end) if info.episode_end else first
+            if self.episode_min is not None and first < self.episode_min:
+                return False
+            if self.episode_max is not None and last > self.episode_max:
+                return False
+        return True
+
+
+class _AliasAutomaton:
+    """Aho-Corasick automaton over words, reporting every phrase in a title."""
+
+    def __init__(self, patterns):
+        # patterns maps word tuples to the show ids they stand for
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [()]
+        for words, show_ids in patterns.items():
+            state = 0
+            for word in words:
+                nxt = self.goto[state].get(word)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][word] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(())
+                state = nxt
+            self.output[state] = tuple(show_ids)
+
+        pending = deque(self.goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for word, nxt in self.goto[state].items():
+                pending.append(nxt)
+                fallback = self.fail[state]
+                while fallback and word not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(word, 0)
+                self.output[nxt] += self.output[self.fail[nxt]]
+
+    def find(self, words):
+        found = set()
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for word in words:
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            found.update(output[state])
+        return found
+
+
+class ShowMatcher:
+    """Routes release titles to the tracked shows they belong to."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._shows = {}     # show id -> (source row, names, alias words, ShowRules)
+        self._by_name = {}   # normalized name or alias -> set of show ids
+        self._aliases = {}   # alias words -> set of show ids
+        self._automaton = _AliasAutomaton({})
+        self._phrase_automaton = None  # over all names, built on demand
+        self.version = None
+
+    def sync(self, rows):
+        """
+        Bring the matcher in line with rows of (id, show_name, aliases and
+        the rule columns). Only added, changed and removed shows are
+        re-indexed; the automatons are rebuilt if a name or alias changed.
+        """
+        rows = {row[0]: tuple(row) for row in rows}
+        with self._lock:
+            names_changed = aliases_changed = False
+            for show_id in set(self._shows) - set(rows):
+                _, alias_words = self._remove(show_id)
+                names_changed = True
+                aliases_changed |= bool(alias_words)
+            for show_id, row in rows.items():
+                current = self._shows.get(show_id)
+                if current and current[0] == row:
+                    continue
+                old = self._remove(show_id) if current else (set(), set())
+                new = self._add(row)
+                names_changed |= old[0] != new[0]
+                aliases_changed |= old[1] != new[1]
+            if aliases_changed:
+                self._automaton = _AliasAutomaton(self._aliases)
+            if names_changed:
+                self._phrase_automaton = None
+
+    def _add(self, row):
+        show_id, show_name, aliases = row[:3]
+        aliases = [normalize_title(a) for a in json.loads(aliases or '[]')]
+        aliases = [a for a in aliases if a]
+        names = {normalize_title(show_name), *aliases}
+        alias_words = {tuple(alias.split()) for alias in aliases}
+        self._shows[show_id] = (row, names, alias_words, ShowRules(*row[3:]))
+        for name in names:
+            self._by_name.setdefault(name, set()).add(show_id)
+        for words in alias_words:
+            self._aliases.setdefault(words, set()).add(show_id)
+        return names, alias_words
+
+    def _remove(self, show_id):
+        _, names, alias_words, _ = self._shows.pop(show_id)
+        for index, keys in ((self._by_name, names), (self._aliases, alias_words)):
+            for key in keys:
+                index[key].discard(show_id)
+                if not index[key]:
+                    del index[key]
+        return names, alias_words
+
+    def route(self, title, show_ids=None):
+        """
+        Ids of the tracked shows a release title belongs to and whose rules
+        it passes, optionally limited to show_ids.
+        """
+        info = parse_title(title)
+        with self._lock:
+            candidates = set()
+            if info.show_name:
+                candidates.update(self._by_name.get(normalize_title(info.show_name), ()))
+            if self._aliases:
+                candidates.update(self._automaton.find(normalize_title(title).split()))
+            if show_ids is not None:
+                candidates.intersection_update(show_ids)
+            return sorted(show_id for show_id in candidates
+                          if self._shows[show_id][3].accepts(info))
+
+    def search(self, title, show_ids=None):
+        """
+        Like route, but a show also matches if its name or an alias occurs
+        anywhere in the title, as the words of a search query would. Used
+        to split the results of a combined search among its shows.
+        """
+        info = parse_title(title)
+        with self._lock:
+            if self._phrase_automaton is None:
+                self._phrase_automaton = _AliasAutomaton(
+                    {tuple(name.split()): ids for name, ids in self._by_name.items()})
+            candidates = self._phrase_automaton.find(normalize_title(title).split())
+            if show_ids is not None:
+                candidates.intersection_update(show_ids)
+            return sorted(show_id for show_id in candidates
+                          if self._shows[show_id][3].accepts(info))
+
+    def accepts(self, show_id, title):
+        """Whether a title passes the rules of a show, whatever its name."""
+        with self._lock:
+            show = self._shows.get(show_id)
+        return show is None or show[3].accepts(parse_title(title))
+
+
+_matcher = ShowMatcher()
+_sync_lock = threading.Lock()
+
+
+def get_matcher():
+    """The shared matcher, synced with tracked_shows if it changed."""
+    with _sync_lock:
+        version = get_data_versions(('tracked_shows',))
+        if version != _matcher.version:
+            conn = sqlite3.connect(DB_PATH, timeout=30)
+            rows = conn.execute(f'''
+                SELECT id, show_name, {', '.join(RULE_FIELDS)} FROM tracked_shows
+            ''').fetchall()
+            conn.close()
+            _matcher.sync(rows)
+            _matcher.version = version
+    return _matcher
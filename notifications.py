@@ -1,6 +1,7 @@
 import sqlite3
 from datetime import datetime
 from config import DB_PATH
+from events import publish
 
 def get_notification_settings():
     """Get notification settings from database."""
@@ -27,8 +28,20 @@ def log_notification(message, notification_type='info', torrent_name=None, show_
             INSERT INTO notification_log (message, type, torrent_name, show_name)
             VALUES (?, ?, ?, ?)
         ''', (message, notification_type, torrent_name, show_name))
+        log_id = c.lastrowid
+        c.execute('SELECT timestamp FROM notification_log WHERE id = ?', (log_id,))
+        timestamp = c.fetchone()[0]
         conn.commit()
         conn.close()
+
+        publish('log', {
+            'id': log_id,
+            'timestamp': timestamp,
+            'message': message,
+            'type': notification_type,
+            'torrent_name': torrent_name,
+            'show_name': show_name
+        })
     except Exception as e:
         print(f"Error logging notification: {e}")
 
@@ -15,6 +15,7 @@ a = Analysis(
         'flask_cors',
         'feedparser',
         'transmissionrpc',
+        'waitress',
     ] + collect_submodules('flask'),
     hookspath=[],
     hooksconfig={},
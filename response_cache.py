@@ -0,0 +1,100 @@
+"""
+ETags and a small in-process cache for read-only API endpoints.
+
+Every write to a versioned table bumps its counter in data_versions (see
+database.init_db), so the versions of the tables an endpoint reads from
+identify its response. They are used both as the ETag - a client that
+already has the current data gets a 304 without the handler running - and
+as the key of a bounded LRU cache of rendered response bodies.
+"""
+import uuid
+import hashlib
+import threading
+from datetime import datetime, timezone
+from functools import wraps
+from collections import OrderedDict
+from flask import request, current_app
+from database import get_data_versions
+
+MAX_ENTRIES = 64
+
+# Responses rendered by an older process may differ even if the data hasn't
+# changed (e.g. after an upgrade), so ETags are scoped to this process.
+_BOOT_ID = uuid.uuid4().hex
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def _cache_key(tables, per_day):
+    key = [request.path, tuple(sorted(request.args.items(multi=True))),
+           get_data_versions(tables)]
+    if per_day:
+        key.append(datetime.now(timezone.utc).date().isoformat())
+    return tuple(key)
+
+
+def _etag_for(key):
+    return hashlib.sha1(repr((_BOOT_ID, key)).encode()).hexdigest()
+
+
+def _get(key):
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None:
+            _cache.move_to_end(key)
+        return entry
+
+
+def _put(key, entry):
+    with _lock:
+        _cache[key] = entry
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+
+def clear():
+    with _lock:
+        _cache.clear()
+
+
+def cached_response(*tables, per_day=False):
+    """
+    Cache GET responses of a view for as long as tables are unchanged.
+
+    per_day adds the current UTC date to the key, for responses that are
+    computed relative to today. Other methods go straight to the view, as
+    do error responses and streamed bodies, which are never stored.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET':
+                return view(*args, **kwargs)
+
+            key = _cache_key(tables, per_day)
+            etag = _etag_for(key)
+
+            if request.if_none_match.contains(etag):
+                response = current_app.response_class(status=304)
+            else:
+                entry = _get(key)
+                if entry is not None:
+                    body, mimetype, headers = entry
+                    response = current_app.response_class(body, mimetype=mimetype)
+                    response.headers.extend(headers)
+                else:
+                    response = current_app.make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    if not response.is_streamed:
+                        headers = [(k, v) for k, v in response.headers
+                                   if k.lower().startswith('x-')]
+                        _put(key, (response.get_data(), response.mimetype, headers))
+
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
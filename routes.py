@@ -1,83 +1,71 @@
 import os
-import sqlite3
-import threading
 import base64
-import io
-from datetime import datetime, timedelta, timezone
-from flask import Blueprint, jsonify, request, send_from_directory, current_app
-from werkzeug.datastructures import FileStorage
-import requests
-from PIL import Image
-from config import DB_PATH, DATA_DIR
-from database import get_db_connection
-from utils import build_feed_url, extract_episode_number, parse_anime_title
-from services import check_single_show, cache_single_profile, get_transmission_client
+import hmac
+import json
+import secrets
+from flask import Blueprint, Response, jsonify, request, send_from_directory, current_app
+from config import DATA_DIR
+from database import get_db_connection, write_webhook_token
+from utils import build_feed_url
+import services
+import jobs
+from backends import DEFAULT_BACKEND_ID, get_backends, forget_backend
+from response_cache import cached_response
+import events
+from schedule import get_schedule as build_schedule
+import assets
+from artwork import (
+    MAX_IMAGE_BYTES,
+    srcset,
+    load_thumbnails,
+    remove_orphans,
+    CONTENT_NAME_RE,
+    submit_artwork_job,
+    submit_artwork_backfill,
+    save_upload
+)
 from notifications import send_test_notification
-from anime_art import fetch_artwork_url
+from anime_art import search_titles, scheduler_metrics
+from matcher import RULE_FIELDS, parse_rules
 
 api_bp = Blueprint('api', __name__)
 
+SHOWS_PAGE_MAX = 1000
 
-def save_artwork_image(show_name, tracked_id, image_data):
-    art_dir = os.path.join(DATA_DIR, 'art')
-    os.makedirs(art_dir, exist_ok=True)
 
-    ext = '.jpg'
-    safe_name = base64.urlsafe_b64encode(show_name.encode()).decode()
-    safe_name = safe_name.rstrip('=')
-    filename = f"{safe_name}{ext}"
-    filepath = os.path.join(art_dir, filename)
+def _send_asset(asset, cache_control):
+    """Send a prebuilt asset in the best encoding the client accepts."""
+    response = current_app.response_class(mimetype=asset.mimetype)
+    response.set_etag(asset.etag)
+    response.headers['Cache-Control'] = cache_control
+    response.headers['Vary'] = 'Accept-Encoding'
+    if request.if_none_match.contains(asset.etag):
+        response.status_code = 304
+        return response
 
-    log(f"saving {len(image_data)} bytes to {filepath}")
-    with open(filepath, 'wb') as f:
-        f.write(image_data)
-
-    rel_path = f"art/{filename}"
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute('UPDATE tracked_shows SET image_path = ? WHERE id = ?',
-              (rel_path, tracked_id))
-    conn.commit()
-    conn.close()
-    log(f"DB updated: {rel_path}")
-    return rel_path
-
-
-def log(msg):
-    print(f"[artwork] {msg}", flush=True)
-
-
-def fetch_and_save_artwork(show_name, tracked_id, season_name=None, anidb_id=None):
-    log(f"fetching artwork for show={show_name!r} season={season_name!r} aid={anidb_id!r}")
-    url = fetch_artwork_url(show_name, season_name, anidb_id)
-    if not url:
-        log("no artwork URL returned from AniDB")
-        return None
-
-    log(f"downloading image from {url}")
-    try:
-        resp = requests.get(url, timeout=30)
-        log(f"image download: HTTP {resp.status_code}")
-        if resp.status_code != 200:
-            log(f"bad status downloading image: {resp.status_code}")
-            return None
-        ct = resp.headers.get('content-type', '')
-        log(f"content-type: {ct}, size: {len(resp.content)} bytes")
-        if not ct.startswith('image/'):
-            log(f"not an image: {ct}")
-            return None
-        path = save_artwork_image(show_name, tracked_id, resp.content)
-        log(f"saved artwork to {path}")
-        return path
-    except requests.RequestException as e:
-        log(f"download failed: {e}")
-        return None
+    encoding, body = asset.negotiate(request.accept_encodings)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.set_data(body)
+    return response
 
 
 @api_bp.route('/')
 def index():
-    """Serve the main HTML page."""
-    return send_from_directory('static', 'index.html')
+    """Serve the main HTML page with references to fingerprinted assets."""
+    page = assets.get_index()
+    if page is None:
+        return send_from_directory('static', 'index.html')
+    return _send_asset(page, 'no-cache')
+
+
+@api_bp.route('/assets/<path:name>')
+def serve_asset(name):
+    """Serve a fingerprinted asset; its name changes with its content."""
+    asset = assets.get_asset(name)
+    if asset is None:
+        return jsonify({'error': 'Not found'}), 404
+    return _send_asset(asset, 'public, max-age=31536000, immutable')
 
 
 @api_bp.route('/<path:path>')
@@ -89,7 +77,11 @@ def serve_static(path):
 @api_bp.route('/art/<path:filename>')
 def serve_art(filename):
     """Serve artwork from the data directory."""
-    return send_from_directory(os.path.join(DATA_DIR, 'art'), filename)
+    response = send_from_directory(os.path.join(DATA_DIR, 'art'), filename)
+    if filename.startswith('thumbs/') or CONTENT_NAME_RE.match(filename):
+        # Named after their content, so a name never changes meaning
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
 
 
 @api_bp.route('/api/profiles/<int:profile_id>', methods=['DELETE', 'PUT'])
@@ -130,16 +122,14 @@ def manage_profile_id(profile_id):
 
         conn.close()
 
-        # Immediately update cache for this profile
-        threading.Thread(
-            target=cache_single_profile,
-            args=(profile,),
-            daemon=True
-        ).start()
+        # Immediately update cache for this profile. Not deduplicated, a
+        # pending job would cache the profile as it was before this edit
+        jobs.submit('cache_profile', (profile,), label=f"Cache shows of {data['name']}")
         
         return jsonify({'id': profile_id, 'status': 'updated'}), 200
 
 @api_bp.route('/api/profiles', methods=['GET', 'POST'])
+@cached_response('feed_profiles')
 def manage_profiles():
     """Get all profiles or create a new profile."""
     conn = get_db_connection()
@@ -189,65 +179,123 @@ def manage_profiles():
         conn.close()
         
         # Immediately update cache for this profile
-        threading.Thread(
-            target=cache_single_profile,
-            args=(profile,),
-            daemon=True
-        ).start()
+        jobs.submit('cache_profile', (profile,), key=profile_id,
+                    label=f"Cache shows of {data['name']}")
         
         return jsonify({'id': profile_id, 'status': 'created'}), 201
 
 
-@api_bp.route('/api/shows', methods=['GET'])
-def get_shows():
-    """Get list of shows from cached data with optional search."""
-    search_query = request.args.get('q', '').lower()
+def _encode_cursor(show_name):
+    return base64.urlsafe_b64encode(show_name.encode()).decode().rstrip('=')
 
-    conn = get_db_connection()
-    c = conn.cursor()
 
+def _decode_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    return base64.urlsafe_b64decode(padded.encode()).decode()
+
+
+def _query_shows(c, search_query, after, limit):
+    """
+    Yield (show_name, sources_json) for cached shows ordered by name.
+    Sources are grouped in SQL, keeping the newest row per profile.
+    """
+    filters, params = [], []
     if search_query:
-        c.execute('''
-            SELECT show_name, profile_id, profile_name, base_url, uploader, quality, color
+        filters.append('LOWER(show_name) LIKE ?')
+        params.append(f'%{search_query}%')
+    if after is not None:
+        filters.append('show_name > ?')
+        params.append(after)
+    where = f"WHERE {' AND '.join(filters)}" if filters else ''
+
+    query = f'''
+        SELECT show_name,
+               json_group_array(json_object(
+                   'profile_id', profile_id,
+                   'profile_name', profile_name,
+                   'base_url', base_url,
+                   'uploader', uploader,
+                   'quality', quality,
+                   'color', COALESCE(NULLIF(color, ''), '#88c0d0')
+               )) AS sources
+        FROM (
+            SELECT show_name, profile_id, profile_name, base_url, uploader,
+                   quality, color, MAX(id)
             FROM cached_shows
-            WHERE LOWER(show_name) LIKE ?
-            ORDER BY show_name
-        ''', (f'%{search_query}%',))
-    else:
-        c.execute('SELECT show_name, profile_id, profile_name, base_url, uploader, quality, color FROM cached_shows ORDER BY show_name')
+            {where}
+            GROUP BY show_name, profile_id
+        )
+        GROUP BY show_name
+        ORDER BY show_name
+    '''
+    if limit is not None:
+        query += ' LIMIT ?'
+        params.append(limit)
 
-    cached = c.fetchall()
-    conn.close()
+    c.execute(query, params)
+    for row in c:
+        yield row['show_name'], row['sources']
 
-    # Group by show name
-    shows_dict = {}
-    for row in cached:
-        show_name = row['show_name']
-        if show_name not in shows_dict:
-            shows_dict[show_name] = []
-
-        shows_dict[show_name].append({
-            'profile_id': row['profile_id'],
-            'profile_name': row['profile_name'],
-            'base_url': row['base_url'],
-            'uploader': row['uploader'],
-            'quality': row['quality'],
-            'color': row['color'] or '#88c0d0'
-        })
 
-    shows = []
-    for show_name, sources in shows_dict.items():
-        # Deduplicate sources by profile_id
-        unique_sources = {s['profile_id']: s for s in sources}
-        shows.append({
-            'name': show_name,
-            'sources': list(unique_sources.values())
-        })
+def _show_json(show_name, sources):
+    # sources is already JSON text from SQLite, so splice it in as is
+    return f'{{"name": {json.dumps(show_name)}, "sources": {sources}}}'
+
+
+@api_bp.route('/api/shows', methods=['GET'])
+@cached_response('cached_shows')
+def get_shows():
+    """
+    Get list of shows from cached data with optional search.
+
+    With limit, returns one page and sets X-Next-Cursor when there are more;
+    pass it back as cursor for the next page. Without limit, the full list is
+    streamed as it is read.
+    """
+    search_query = request.args.get('q', '').lower()
+    limit = request.args.get('limit', type=int)
+    cursor = request.args.get('cursor')
+
+    after = None
+    if cursor:
+        try:
+            after = _decode_cursor(cursor)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+
+    if limit is not None:
+        limit = max(1, min(limit, SHOWS_PAGE_MAX))
+        conn = get_db_connection()
+        c = conn.cursor()
+        rows = list(_query_shows(c, search_query, after, limit + 1))
+        conn.close()
+
+        response = current_app.response_class(
+            '[' + ','.join(_show_json(*row) for row in rows[:limit]) + ']',
+            mimetype='application/json'
+        )
+        if len(rows) > limit:
+            response.headers['X-Next-Cursor'] = _encode_cursor(rows[limit - 1][0])
+        return response
+
+    def generate():
+        conn = get_db_connection()
+        try:
+            c = conn.cursor()
+            yield '['
+            first = True
+            for row in _query_shows(c, search_query, after, None):
+                yield ('' if first else ',') + _show_json(*row)
+                first = False
+            yield ']'
+        finally:
+            conn.close()
 
-    return jsonify(shows)
+    return Response(generate(), mimetype='application/json')
 
 
 @api_bp.route('/api/tracked', methods=['GET', 'POST'])
+@cached_response('tracked_shows', 'feed_profiles')
 def manage_tracked_shows():
     """Get tracked shows or add a new tracked show."""
     conn = get_db_connection()
@@ -256,7 +304,9 @@ def manage_tracked_shows():
     if request.method == 'GET':
         c.execute('''
             SELECT ts.id, ts.show_name, ts.feed_url, ts.profile_id, ts.added_at,
-                   ts.season_name, ts.max_age, ts.image_path,
+                   ts.season_name, ts.max_age, ts.image_path, ts.image_thumbs,
+                   ts.anidb_id, ts.aliases, ts.rule_subgroup, ts.rule_quality,
+                   ts.rule_min_version, ts.rule_episode_min, ts.rule_episode_max,
                    fp.name as profile_name, fp.base_url, fp.uploader, fp.quality, fp.color
             FROM tracked_shows ts
             LEFT JOIN feed_profiles fp ON ts.profile_id = fp.id
@@ -264,6 +314,7 @@ def manage_tracked_shows():
         ''')
         tracked = []
         for row in c.fetchall():
+            thumbnails = load_thumbnails(row['image_thumbs'])
             tracked.append({
                 'id': row['id'],
                 'show_name': row['show_name'],
@@ -273,6 +324,15 @@ def manage_tracked_shows():
                 'season_name': row['season_name'],
                 'max_age': row['max_age'],
                 'image_path': row['image_path'],
+                'thumbnails': thumbnails,
+                'image_srcset': srcset(thumbnails),
+                'anidb_id': row['anidb_id'],
+                'aliases': json.loads(row['aliases'] or '[]'),
+                'rule_subgroup': row['rule_subgroup'],
+                'rule_quality': row['rule_quality'],
+                'rule_min_version': row['rule_min_version'],
+                'rule_episode_min': row['rule_episode_min'],
+                'rule_episode_max': row['rule_episode_max'],
                 'profile_name': row['profile_name'],
                 'base_url': row['base_url'],
                 'uploader': row['uploader'],
@@ -311,20 +371,14 @@ def manage_tracked_shows():
         conn.commit()
         tracked_id = c.lastrowid
         conn.close()
+        events.publish('tracked', {'action': 'added', 'id': tracked_id})
 
         # Trigger immediate check for new torrents
-        threading.Thread(
-            target=check_single_show,
-            args=(tracked_id,),
-            daemon=True
-        ).start()
+        jobs.submit('check_show', (tracked_id,), key=tracked_id,
+                    label=f"Check {show_name}")
 
         # Auto-fetch artwork from AniDB
-        threading.Thread(
-            target=fetch_and_save_artwork,
-            args=(show_name, tracked_id, season_name),
-            daemon=True
-        ).start()
+        submit_artwork_job(tracked_id, 'anidb')
 
         return jsonify({
             'id': tracked_id,
@@ -333,176 +387,237 @@ def manage_tracked_shows():
         }), 201
 
 
-@api_bp.route('/api/tracked/<int:tracked_id>/art', methods=['POST'])
-def upload_show_art(tracked_id):
-    """Upload artwork for a tracked show."""
-    if 'file' not in request.files:
-        return jsonify({'error': 'No file part'}), 400
-    file = request.files['file']
-    if file.filename == '':
-        return jsonify({'error': 'No selected file'}), 400
-    
-    if file:
-        # Check file size (10MB limit)
-        file.seek(0, 2)  # Seek to end
-        file_size = file.tell()
-        file.seek(0)  # Reset to beginning
+BULK_MAX_SHOWS = 500
 
-        if file_size > 10 * 1024 * 1024:  # 10MB
-            return jsonify({'error': 'File exceeds 10MB limit'}), 400
 
-        conn = get_db_connection()
-        c = conn.cursor()
-        c.execute('SELECT show_name FROM tracked_shows WHERE id = ?', (tracked_id,))
-        row = c.fetchone()
-        if not row:
-            conn.close()
-            return jsonify({'error': 'Show not found'}), 404
+def _bulk_items(data, field):
+    """Return the list under field of a bulk request body, or None if invalid."""
+    items = (data or {}).get(field)
+    if not isinstance(items, list) or not items or len(items) > BULK_MAX_SHOWS:
+        return None
+    return items
+
 
-        show_name = row[0]
+def _invalid_bulk_request(field):
+    return jsonify({'error': f'{field} must be a list of 1 to {BULK_MAX_SHOWS} items'}), 400
 
-        # Create art directory
-        art_dir = os.path.join(DATA_DIR, 'art')
-        os.makedirs(art_dir, exist_ok=True)
 
-        # Generate filename
-        # User requested base64-encoded name
-        ext = os.path.splitext(file.filename)[1]
-        if not ext:
-            ext = '.jpg' # Default fallback
+@api_bp.route('/api/tracked/bulk', methods=['POST', 'PUT', 'DELETE'])
+def bulk_tracked_shows():
+    """
+    Track, update or untrack many shows in one transaction.
 
-        safe_name = base64.urlsafe_b64encode(show_name.encode()).decode()
-        # Remove padding characters to make it cleaner
-        safe_name = safe_name.rstrip('=')
+    POST takes {shows: [{show_name, profile_id, season_name, max_age}]},
+    PUT {shows: [{id, show_name, season_name, max_age, anidb_id, aliases,
+    rule_*}]} and DELETE {ids: [...]}. A batch with an invalid item is rejected as a
+    whole. Newly tracked shows get one initial feed check per profile and
+    their artwork is fetched at background priority.
+    """
+    data = request.get_json(silent=True)
 
-        filename = f"{safe_name}{ext}"
-        filepath = os.path.join(art_dir, filename)
+    if request.method == 'DELETE':
+        ids = _bulk_items(data, 'ids')
+        if ids is None or not all(isinstance(i, int) for i in ids):
+            return _invalid_bulk_request('ids')
 
-        file.save(filepath)
+        conn = get_db_connection()
+        with conn:
+            conn.executemany('DELETE FROM downloaded_torrents WHERE tracked_show_id = ?',
+                             [(i,) for i in ids])
+            removed = conn.executemany('DELETE FROM tracked_shows WHERE id = ?',
+                                       [(i,) for i in ids]).rowcount
+        conn.close()
+        events.publish('tracked', {'action': 'removed', 'ids': ids})
+        return jsonify({'status': 'removed', 'removed': removed})
+
+    shows = _bulk_items(data, 'shows')
+    if shows is None:
+        return _invalid_bulk_request('shows')
+
+    required = ('id', 'show_name') if request.method == 'PUT' else ('show_name', 'profile_id')
+    errors = [{'index': index, 'error': f"{', '.join(required)} required"}
+              for index, show in enumerate(shows)
+              if not isinstance(show, dict) or not all(show.get(k) for k in required)]
+    if errors:
+        return jsonify({'error': 'Invalid shows', 'errors': errors}), 400
+
+    if request.method == 'PUT':
+        rules = []
+        for index, show in enumerate(shows):
+            try:
+                rules.append(parse_rules(show))
+            except ValueError as e:
+                errors.append({'index': index, 'error': str(e)})
+        if errors:
+            return jsonify({'error': 'Invalid shows', 'errors': errors}), 400
 
-        # Save relative path to DB
-        rel_path = f"art/{filename}"
-        c.execute('UPDATE tracked_shows SET image_path = ? WHERE id = ?', (rel_path, tracked_id))
-        conn.commit()
+    conn = get_db_connection()
+    c = conn.cursor()
+
+    if request.method == 'PUT':
+        with conn:
+            c.executemany(f'''
+                UPDATE tracked_shows
+                SET show_name = ?, season_name = ?, max_age = ?, anidb_id = ?,
+                    {', '.join(f'{field} = ?' for field in RULE_FIELDS)}
+                WHERE id = ?
+            ''', [(show['show_name'], show.get('season_name'), show.get('max_age'),
+                   show.get('anidb_id'), *show_rules, show['id'])
+                  for show, show_rules in zip(shows, rules)])
+            updated = c.rowcount
+        conn.close()
+        ids = [show['id'] for show in shows]
+        events.publish('tracked', {'action': 'updated', 'ids': ids})
+        return jsonify({'status': 'updated', 'updated': updated})
+
+    profile_ids = sorted({show['profile_id'] for show in shows}, key=str)
+    c.execute(f'''
+        SELECT id, base_url, uploader, quality FROM feed_profiles
+        WHERE id IN ({','.join('?' * len(profile_ids))})
+    ''', profile_ids)
+    profiles = {str(row['id']): row for row in c.fetchall()}
+
+    errors = [{'index': index, 'error': 'Profile not found'}
+              for index, show in enumerate(shows)
+              if str(show['profile_id']) not in profiles]
+    if errors:
         conn.close()
+        return jsonify({'error': 'Invalid shows', 'errors': errors}), 404
+
+    tracked = []
+    by_profile = {}
+    with conn:
+        for show in shows:
+            profile = profiles[str(show['profile_id'])]
+            feed_url = build_feed_url(profile['base_url'], profile['uploader'],
+                                      profile['quality'], show['show_name'])
+            c.execute('''
+                INSERT INTO tracked_shows (show_name, feed_url, profile_id, season_name, max_age)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (show['show_name'], feed_url, profile['id'],
+                  show.get('season_name'), show.get('max_age')))
+            tracked.append({'id': c.lastrowid, 'show_name': show['show_name'],
+                            'feed_url': feed_url})
+            by_profile.setdefault(profile['id'], []).append(c.lastrowid)
+    conn.close()
+    events.publish('tracked', {'action': 'added', 'ids': [t['id'] for t in tracked]})
+
+    # One initial check per profile instead of one per show
+    for profile_id, tracked_ids in by_profile.items():
+        jobs.submit('check_profile_shows', (profile_id, tracked_ids),
+                    label=f"Check {len(tracked_ids)} new shows")
+
+    for show in tracked:
+        submit_artwork_job(show['id'], 'anidb', priority=jobs.PRIORITY_BACKGROUND)
 
-        return jsonify({'image_path': rel_path})
+    return jsonify({'status': 'tracked', 'tracked': tracked}), 201
+
+
+def _show_exists(tracked_id):
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute('SELECT 1 FROM tracked_shows WHERE id = ?', (tracked_id,))
+    exists = c.fetchone() is not None
+    conn.close()
+    return exists
+
+
+def _artwork_job_response(job):
+    """Answer an artwork request with the job that will handle it."""
+    response = jsonify(job)
+    response.status_code = 202
+    response.headers['Location'] = f"/api/jobs/{job['id']}"
+    return response
+
+
+@api_bp.route('/api/tracked/<int:tracked_id>/art', methods=['POST'])
+def upload_show_art(tracked_id):
+    """Upload artwork for a tracked show; it is verified in the background."""
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file part'}), 400
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
+
+    # Check file size (10MB limit)
+    file.seek(0, 2)  # Seek to end
+    file_size = file.tell()
+    file.seek(0)  # Reset to beginning
+
+    if file_size > MAX_IMAGE_BYTES:
+        return jsonify({'error': 'File exceeds 10MB limit'}), 400
+
+    if not _show_exists(tracked_id):
+        return jsonify({'error': 'Show not found'}), 404
+
+    job = submit_artwork_job(tracked_id, 'upload', upload_path=save_upload(file))
+    return _artwork_job_response(job)
 
 
 @api_bp.route('/api/tracked/<int:tracked_id>/art/url', methods=['POST'])
 def upload_show_art_from_url(tracked_id):
-    """Upload artwork from URL."""
+    """Download artwork from a URL in the background."""
     data = request.get_json()
     url = data.get('url')
     if not url or not url.startswith(('http://', 'https://')):
         return jsonify({'error': 'Valid HTTP/HTTPS URL required'}), 400
 
-    try:
-        # Download image with timeout and size limit
-        response = requests.get(url, timeout=30, stream=True)
-        response.raise_for_status()
-
-        # Check content type
-        content_type = response.headers.get('content-type', '')
-        if not content_type.startswith('image/'):
-            return jsonify({'error': 'URL does not point to an image'}), 400
-
-        # Check size (read up to 10MB + 1 byte)
-        content = b''
-        for chunk in response.iter_content(chunk_size=8192):
-            content += chunk
-            if len(content) > 10 * 1024 * 1024 + 1:  # 10MB + 1
-                return jsonify({'error': 'Image exceeds 10MB limit'}), 400
-
-        if len(content) > 10 * 1024 * 1024:
-            return jsonify({'error': 'Image exceeds 10MB limit'}), 400
-
-        # Validate it's actually an image
-        try:
-            Image.open(io.BytesIO(content)).verify()
-        except Exception:
-            return jsonify({'error': 'Invalid image file'}), 400
-
-        # Create FileStorage-like object for existing logic
-        file_storage = FileStorage(
-            stream=io.BytesIO(content),
-            filename=url.split('/')[-1] or 'downloaded-image.jpg',
-            content_type=content_type
-        )
-
-        # Get show name for filename generation
-        conn = get_db_connection()
-        c = conn.cursor()
-        c.execute('SELECT show_name FROM tracked_shows WHERE id = ?', (tracked_id,))
-        row = c.fetchone()
-        if not row:
-            conn.close()
-            return jsonify({'error': 'Show not found'}), 404
-
-        show_name = row[0]
-
-        # Create art directory
-        art_dir = os.path.join(DATA_DIR, 'art')
-        os.makedirs(art_dir, exist_ok=True)
-
-        # Generate filename
-        ext = os.path.splitext(file_storage.filename)[1]
-        if not ext:
-            # Try to infer from content type
-            if 'jpeg' in content_type or 'jpg' in content_type:
-                ext = '.jpg'
-            elif 'png' in content_type:
-                ext = '.png'
-            elif 'gif' in content_type:
-                ext = '.gif'
-            elif 'webp' in content_type:
-                ext = '.webp'
-            else:
-                ext = '.jpg'  # Default fallback
-
-        safe_name = base64.urlsafe_b64encode(show_name.encode()).decode()
-        safe_name = safe_name.rstrip('=')
-        filename = f"{safe_name}{ext}"
-        filepath = os.path.join(art_dir, filename)
-
-        # Save the file
-        file_storage.save(filepath)
-
-        # Save relative path to DB
-        rel_path = f"art/{filename}"
-        c.execute('UPDATE tracked_shows SET image_path = ? WHERE id = ?', (rel_path, tracked_id))
-        conn.commit()
-        conn.close()
-
-        return jsonify({'image_path': rel_path})
+    if not _show_exists(tracked_id):
+        return jsonify({'error': 'Show not found'}), 404
 
-    except requests.exceptions.RequestException as e:
-        return jsonify({'error': f'Failed to download image: {str(e)}'}), 400
+    return _artwork_job_response(submit_artwork_job(tracked_id, 'url', url=url))
 
 
 @api_bp.route('/api/tracked/<int:tracked_id>/art/anidb', methods=['POST'])
 def fetch_show_art_from_anidb(tracked_id):
-    log(f"manual fetch requested for tracked_id={tracked_id}")
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute('SELECT show_name, season_name, anidb_id FROM tracked_shows WHERE id = ?',
-              (tracked_id,))
-    row = c.fetchone()
-    conn.close()
-
-    if not row:
-        log(f"tracked_id {tracked_id} not found")
+    """Fetch artwork from AniDB in the background."""
+    if not _show_exists(tracked_id):
         return jsonify({'error': 'Show not found'}), 404
 
-    show_name, season_name, anidb_id = row['show_name'], row['season_name'], row['anidb_id']
-    log(f"fetching for show={show_name!r} season={season_name!r} aid={anidb_id!r}")
+    return _artwork_job_response(submit_artwork_job(tracked_id, 'anidb'))
+
+
+ANIDB_SEARCH_MAX = 50
+
+
+@api_bp.route('/api/anidb/search', methods=['GET'])
+def search_anidb_titles():
+    """Rank AniDB titles by similarity to q, for picking a show's AniDB ID."""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'q is required'}), 400
+    limit = max(1, min(request.args.get('limit', 10, type=int), ANIDB_SEARCH_MAX))
+
+    results = search_titles(query, limit)
+    if results is None:
+        return jsonify({'error': 'AniDB title dump not available'}), 503
+    return jsonify(results)
 
-    path = fetch_and_save_artwork(show_name, tracked_id, season_name, anidb_id)
-    if path:
-        log(f"success: {path}")
-        return jsonify({'image_path': path})
-    log("failed to fetch artwork")
-    return jsonify({'error': 'No artwork found on AniDB'}), 404
+
+@api_bp.route('/api/anidb/metrics', methods=['GET'])
+def get_anidb_metrics():
+    """Queue depth, wait times and error counters of the AniDB request scheduler."""
+    return jsonify(scheduler_metrics())
+
+
+@api_bp.route('/api/jobs', methods=['GET'])
+def get_jobs():
+    """List recent background jobs, optionally filtered by status and kind."""
+    limit = max(1, min(request.args.get('limit', 50, type=int), 500))
+    return jsonify(jobs.list_jobs(
+        status=request.args.get('status'),
+        kind=request.args.get('kind'),
+        limit=limit
+    ))
+
+
+@api_bp.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """Get the status of a background job."""
+    job = jobs.get_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
 
 
 @api_bp.route('/api/tracked/<int:tracked_id>', methods=['DELETE', 'PUT'])
@@ -520,51 +635,183 @@ def delete_tracked_show(tracked_id):
         
         conn.commit()
         conn.close()
+        events.publish('tracked', {'action': 'removed', 'id': tracked_id})
         return jsonify({'status': 'removed'})
 
     elif request.method == 'PUT':
         data = request.json
-        c.execute('''
+        try:
+            rules = parse_rules(data)
+        except ValueError as e:
+            conn.close()
+            return jsonify({'error': str(e)}), 400
+        c.execute(f'''
             UPDATE tracked_shows
-            SET show_name = ?, season_name = ?, max_age = ?, anidb_id = ?
+            SET show_name = ?, season_name = ?, max_age = ?, anidb_id = ?,
+                {', '.join(f'{field} = ?' for field in RULE_FIELDS)}
             WHERE id = ?
         ''', (
             data['show_name'],
             data.get('season_name'),
             data.get('max_age'),
             data.get('anidb_id'),
+            *rules,
             tracked_id
         ))
         conn.commit()
         conn.close()
+        events.publish('tracked', {'action': 'updated', 'id': tracked_id})
         return jsonify({'id': tracked_id, 'status': 'updated'}), 200
 
 
 @api_bp.route('/api/transmission/torrents', methods=['GET'])
 def get_torrents():
-    """Get list of torrents from Transmission."""
-    tc, _ = get_transmission_client()
-    if not tc:
+    """Get list of torrents from all Transmission backends."""
+    torrents = services.list_all_torrents()
+    if torrents is None:
         return jsonify({'error': 'Cannot connect to Transmission'}), 503
+    return jsonify(torrents)
+
+
+@api_bp.route('/api/transmission/backends', methods=['GET', 'POST'])
+def manage_backends():
+    """List Transmission backends with their health, or add a new backend."""
+    if request.method == 'GET':
+        refresh = request.args.get('refresh') == '1'
+        backends = get_backends()
+        if refresh:
+            for backend in backends:
+                backend.check_health(force=True)
+        return jsonify({
+            'placement': _get_placement_setting(),
+            'backends': [b.to_dict(include_health=True) for b in backends]
+        })
+
+    data = request.json
+    if not data.get('name') or not data.get('host'):
+        return jsonify({'error': 'Name and host are required'}), 400
+
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute('''
+        INSERT INTO transmission_backends
+        (name, host, port, username, password, weight, download_dir, local, enabled)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (
+        data['name'],
+        data['host'],
+        data.get('port', 9091),
+        data.get('username'),
+        data.get('password'),
+        data.get('weight', 1),
+        data.get('download_dir'),
+        1 if data.get('local') else 0,
+        1 if data.get('enabled', True) else 0
+    ))
+    conn.commit()
+    backend_id = c.lastrowid
+    conn.close()
+    return jsonify({'id': backend_id, 'status': 'created'}), 201
+
+
+@api_bp.route('/api/transmission/backends/<int:backend_id>', methods=['PUT', 'DELETE'])
+def manage_backend_id(backend_id):
+    """Update or remove an additional Transmission backend."""
+    if backend_id == DEFAULT_BACKEND_ID:
+        return jsonify({'error': 'The default backend is configured in settings'}), 400
+
+    conn = get_db_connection()
+    c = conn.cursor()
+
+    if request.method == 'DELETE':
+        c.execute('DELETE FROM transmission_backends WHERE id = ?', (backend_id,))
+        c.execute('UPDATE tracked_shows SET backend_id = NULL WHERE backend_id = ?',
+                  (backend_id,))
+        conn.commit()
+        conn.close()
+        forget_backend(backend_id)
+        return jsonify({'status': 'deleted'})
+
+    data = request.json
+    c.execute('''
+        UPDATE transmission_backends
+        SET name = ?, host = ?, port = ?, username = ?, password = ?,
+            weight = ?, download_dir = ?, local = ?, enabled = ?
+        WHERE id = ?
+    ''', (
+        data['name'],
+        data['host'],
+        data.get('port', 9091),
+        data.get('username'),
+        data.get('password'),
+        data.get('weight', 1),
+        data.get('download_dir'),
+        1 if data.get('local') else 0,
+        1 if data.get('enabled', True) else 0,
+        backend_id
+    ))
+    conn.commit()
+    conn.close()
+    forget_backend(backend_id)
+    return jsonify({'id': backend_id, 'status': 'updated'})
+
+
+@api_bp.route('/api/transmission/reconcile', methods=['GET', 'POST'])
+def reconcile_torrents():
+    """Get the last missing-torrent reconciliation report, or run one now."""
+    if request.method == 'POST':
+        try:
+            return jsonify(services.reconcile_missing_torrents())
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    return jsonify(services.last_reconcile_report or {})
+
+
+@api_bp.route('/api/hooks/torrent-done', methods=['POST'])
+def torrent_done_hook():
+    """
+    Called by Transmission's script-torrent-done hook (see torrent-done.sh)
+    with the finished torrent's hash. Requests must carry the webhook_token
+    setting, which torrent-done.sh reads from the data directory.
+    """
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute('SELECT value FROM settings WHERE key = ?', ('webhook_token',))
+    row = c.fetchone()
+    conn.close()
+    token = row[0] if row else ''
+
+    data = request.get_json(silent=True)
+    if data is None:
+        data = request.form
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be an object'}), 400
+    supplied = request.headers.get('X-Pyget-Token') or data.get('token')
+    if not token:
+        return jsonify({'error': 'Set webhook_token to accept hooks'}), 403
+    if not isinstance(supplied, str) or not hmac.compare_digest(
+            supplied.encode(), token.encode()):
+        return jsonify({'error': 'Invalid token'}), 403
+
+    info_hash = data.get('hash') or data.get('TR_TORRENT_HASH')
+    if not info_hash or not isinstance(info_hash, str):
+        return jsonify({'error': 'Torrent hash required'}), 400
 
     try:
-        torrents = tc.get_torrents()
-        result = []
-        for t in torrents:
-            result.append({
-                'id': t.id,
-                'name': t.name,
-                'status': t.status,
-                'progress': t.progress,
-                'download_rate': t.rateDownload,
-                'upload_rate': t.rateUpload,
-                'done_date': t.doneDate
-            })
-        return jsonify(result)
+        return jsonify(services.handle_torrent_done(info_hash))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+def _get_placement_setting():
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute('SELECT value FROM settings WHERE key = ?', ('backend_placement',))
+    row = c.fetchone()
+    conn.close()
+    return row[0] if row else 'torrent_count'
+
+
 @api_bp.route('/api/settings', methods=['GET', 'POST'])
 def manage_settings():
     """Get or update settings."""
@@ -580,6 +827,10 @@ def manage_settings():
     elif request.method == 'POST':
         data = request.json
 
+        if 'webhook_token' in data:
+            # Clearing the token rotates it; the hook never runs without one
+            data['webhook_token'] = str(data['webhook_token'] or '').strip() or secrets.token_hex(32)
+
         for key, value in data.items():
             c.execute('''
                 INSERT OR REPLACE INTO settings (key, value)
@@ -588,6 +839,8 @@ def manage_settings():
 
         conn.commit()
         conn.close()
+        if 'webhook_token' in data:
+            write_webhook_token(data['webhook_token'])
         return jsonify({'status': 'updated'})
 
 
@@ -642,94 +895,12 @@ def get_path_suggestions():
 
 
 @api_bp.route('/api/schedule', methods=['GET'])
+@cached_response('tracked_shows', 'feed_profiles', 'downloaded_torrents', per_day=True)
 def get_schedule():
     """Get download history and predicted future releases for tracked shows."""
     try:
         conn = get_db_connection()
-        c = conn.cursor()
-
-        # Get all tracked shows
-        c.execute('''
-            SELECT ts.id, ts.show_name, ts.image_path, fp.color
-            FROM tracked_shows ts
-            LEFT JOIN feed_profiles fp ON ts.profile_id = fp.id
-        ''')
-        shows = {row['id']: dict(row) for row in c.fetchall()}
-
-        # Get download history
-        c.execute('''
-            SELECT tracked_show_id, torrent_name, added_at, published_at
-            FROM downloaded_torrents
-            ORDER BY COALESCE(published_at, added_at) DESC
-        ''')
-        history = c.fetchall()
-        
-        # Group history by show
-        show_history = {}
-        for row in history:
-            sid = row['tracked_show_id']
-            if sid not in shows:
-                continue
-            if sid not in show_history:
-                show_history[sid] = []
-            
-            item = dict(row)
-            item['release_date'] = row['published_at'] or row['added_at']
-            item['episode'] = extract_episode_number(row['torrent_name'])
-            show_history[sid].append(item)
-
-        schedule = []
-        now = datetime.now(timezone.utc)
-        # Create a date object for comparison (start of today in UTC)
-        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
-
-        for sid, info in shows.items():
-            releases = show_history.get(sid, [])
-            predictions = []
-            
-            if releases:
-                # Use the latest release as the anchor
-                last_rel = releases[0]
-                try:
-                    last_ep_num = int(last_rel.get('episode') or 0)
-                except ValueError:
-                    last_ep_num = 0
-                    
-                last_date = datetime.strptime(last_rel['release_date'], '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
-                
-                # Start predicting from the next episode
-                current_ep = last_ep_num + 1
-                # Base expected date is 1 week after last release
-                current_date = last_date + timedelta(days=7)
-                
-                # If the expected date is in the past, it means a release was missed.
-                # Shift all subsequent releases by a week until the expected date is today or in the future.
-                while current_date < today:
-                    current_date += timedelta(days=7)
-                
-                # Predict until end of season (assume 12 episodes)
-                # If we're already past 12, predict 3 more
-                max_ep = max(12, last_ep_num + 3)
-                
-                ep_padding = len(last_rel.get('episode') or '01')
-                
-                while current_ep <= max_ep:
-                    predictions.append({
-                        'episode': str(current_ep).zfill(ep_padding),
-                        'date': current_date.strftime('%Y-%m-%d %H:%M:%S')
-                    })
-                    current_ep += 1
-                    current_date += timedelta(days=7)
-
-            schedule.append({
-                'id': sid,
-                'show_name': info['show_name'],
-                'image_path': info['image_path'],
-                'color': info['color'],
-                'history': releases[:20],
-                'predictions': predictions
-            })
-
+        schedule = build_schedule(conn)
         conn.close()
         return jsonify(schedule)
     except Exception as e:
@@ -742,34 +913,17 @@ def get_schedule():
 def cleanup_artwork():
     """Delete artwork files not associated with any tracked show."""
     try:
-        conn = get_db_connection()
-        c = conn.cursor()
-        c.execute('SELECT image_path FROM tracked_shows WHERE image_path IS NOT NULL')
-        used_images = {row[0] for row in c.fetchall()}
-        conn.close()
-
-        art_dir = os.path.join(DATA_DIR, 'art')
-        if not os.path.exists(art_dir):
-            return jsonify({'count': 0})
-
-        deleted_count = 0
-        for filename in os.listdir(art_dir):
-            filepath = os.path.join(art_dir, filename)
-            # image_path in DB is like "art/filename.jpg", so check "art/" + filename
-            rel_path = f"art/{filename}"
-            
-            if rel_path not in used_images:
-                try:
-                    os.remove(filepath)
-                    deleted_count += 1
-                except OSError as e:
-                    print(f"Error deleting {filepath}: {e}")
-
-        return jsonify({'count': deleted_count})
+        return jsonify({'count': remove_orphans()})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@api_bp.route('/api/settings/artwork/backfill', methods=['POST'])
+def backfill_missing_artwork():
+    """Fetch AniDB artwork for every tracked show without it, in the background."""
+    return _artwork_job_response(submit_artwork_backfill())
+
+
 @api_bp.route('/api/settings/replacements', methods=['GET', 'PUT'])
 def manage_replacement_settings():
     """Get or update replacement settings."""
@@ -937,6 +1091,19 @@ def test_notification():
         return jsonify({'error': str(e)}), 500
 
 
+@api_bp.route('/api/events')
+def event_stream():
+    """Stream live log, torrent and tracked show updates as server-sent events."""
+    subscriber = events.subscribe()
+    if subscriber is None:
+        return jsonify({'error': 'Too many event streams open'}), 503
+
+    response = Response(events.stream(subscriber), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @api_bp.route('/api/notifications/logs', methods=['GET'])
 def get_notification_logs():
     """Get notification history."""
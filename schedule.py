@@ -0,0 +1,171 @@
+"""
+Materialized release schedule.
+
+show_schedule holds, per tracked show, the latest episode, the time of the
+last release, the release cadence, the 20 most recent releases and the
+predicted upcoming episodes. Triggers in database.init_db mark a show stale
+whenever one of its torrents is recorded, changed or deleted; stale rows are
+recomputed from that show's history alone, so reading the schedule does not
+depend on the size of the whole download history.
+
+Predictions are stored anchored at the last release. They are moved forward
+to today when read, as the original per-request computation did.
+"""
+import json
+import sqlite3
+import statistics
+from datetime import datetime, timedelta, timezone
+from utils import extract_episode_number
+from artwork import srcset, load_thumbnails
+
+HISTORY_LIMIT = 20
+DEFAULT_CADENCE_DAYS = 7
+MAX_CADENCE_DAYS = 28
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _parse_date(value):
+    return datetime.strptime(value, DATE_FORMAT).replace(tzinfo=timezone.utc)
+
+
+def _cadence(releases):
+    """Median number of days between releases, defaulting to weekly."""
+    dates = [_parse_date(r['release_date']) for r in releases]
+    gaps = [(newer - older).total_seconds() / 86400
+            for newer, older in zip(dates, dates[1:])]
+    # Batch releases on the same day say nothing about the cadence
+    gaps = [gap for gap in gaps if gap >= 1]
+    if len(gaps) < 2:
+        return DEFAULT_CADENCE_DAYS
+    days = round(statistics.median(gaps))
+    return days if 1 <= days <= MAX_CADENCE_DAYS else DEFAULT_CADENCE_DAYS
+
+
+def _predict(last_release, latest_episode, cadence):
+    """Predict the remaining episodes of the season, one cadence apart."""
+    try:
+        last_ep_num = int(latest_episode or 0)
+    except ValueError:
+        last_ep_num = 0
+
+    # Predict until end of season (assume 12 episodes)
+    # If we're already past 12, predict 3 more
+    max_ep = max(12, last_ep_num + 3)
+    ep_padding = len(latest_episode or '01')
+
+    predictions = []
+    current_date = _parse_date(last_release)
+    for episode in range(last_ep_num + 1, max_ep + 1):
+        current_date += timedelta(days=cadence)
+        predictions.append({
+            'episode': str(episode).zfill(ep_padding),
+            'date': current_date.strftime(DATE_FORMAT)
+        })
+    return predictions
+
+
+def refresh_show(c, show_id):
+    """Recompute the schedule row of one show from its latest releases."""
+    c.execute('''
+        SELECT tracked_show_id, torrent_name, added_at, published_at
+        FROM downloaded_torrents
+        WHERE tracked_show_id = ?
+        ORDER BY COALESCE(published_at, added_at) DESC
+        LIMIT ?
+    ''', (show_id, HISTORY_LIMIT))
+
+    history = []
+    for row in c.fetchall():
+        item = dict(row)
+        item['release_date'] = row['published_at'] or row['added_at']
+        item['episode'] = extract_episode_number(row['torrent_name'])
+        history.append(item)
+
+    latest_episode = last_release = None
+    cadence = DEFAULT_CADENCE_DAYS
+    predictions = []
+    if history:
+        # Use the latest release as the anchor
+        latest_episode = history[0]['episode']
+        last_release = history[0]['release_date']
+        cadence = _cadence(history)
+        predictions = _predict(last_release, latest_episode, cadence)
+
+    c.execute('''
+        UPDATE show_schedule
+        SET latest_episode = ?, last_release = ?, cadence_days = ?,
+            history_json = ?, predictions_json = ?, stale = 0,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE tracked_show_id = ?
+    ''', (latest_episode, last_release, cadence, json.dumps(history),
+          json.dumps(predictions), show_id))
+
+
+def refresh_stale(conn):
+    """Recompute every stale schedule row. Returns the number refreshed."""
+    c = conn.cursor()
+    c.row_factory = sqlite3.Row
+    c.execute('SELECT tracked_show_id FROM show_schedule WHERE stale = 1')
+    show_ids = [row[0] for row in c.fetchall()]
+    for show_id in show_ids:
+        refresh_show(c, show_id)
+    if show_ids:
+        conn.commit()
+    return len(show_ids)
+
+
+def _shift_to_today(predictions, cadence, today):
+    """
+    If the first expected date is in the past a release was missed; shift
+    all predictions by whole cadences until it is today or in the future.
+    """
+    if not predictions:
+        return predictions
+    first = _parse_date(predictions[0]['date'])
+    if first >= today:
+        return predictions
+    steps = -(-(today - first).days // cadence)
+    shift = timedelta(days=steps * cadence)
+    if first + shift < today:
+        shift += timedelta(days=cadence)
+    return [{
+        'episode': p['episode'],
+        'date': (_parse_date(p['date']) + shift).strftime(DATE_FORMAT)
+    } for p in predictions]
+
+
+def get_schedule(conn):
+    """Return the schedule of every tracked show, refreshing stale rows first."""
+    refresh_stale(conn)
+
+    c = conn.cursor()
+    c.row_factory = sqlite3.Row
+    c.execute('''
+        SELECT ts.id, ts.show_name, ts.image_path, ts.image_thumbs, fp.color,
+               ss.cadence_days, ss.history_json, ss.predictions_json
+        FROM tracked_shows ts
+        LEFT JOIN feed_profiles fp ON ts.profile_id = fp.id
+        LEFT JOIN show_schedule ss ON ss.tracked_show_id = ts.id
+        ORDER BY ts.id
+    ''')
+
+    now = datetime.now(timezone.utc)
+    # Start of today in UTC
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    schedule = []
+    for row in c.fetchall():
+        cadence = row['cadence_days'] or DEFAULT_CADENCE_DAYS
+        predictions = json.loads(row['predictions_json'] or '[]')
+        thumbnails = load_thumbnails(row['image_thumbs'])
+        schedule.append({
+            'id': row['id'],
+            'show_name': row['show_name'],
+            'image_path': row['image_path'],
+            'thumbnails': thumbnails,
+            'image_srcset': srcset(thumbnails),
+            'color': row['color'],
+            'history': json.loads(row['history_json'] or '[]'),
+            'predictions': _shift_to_today(predictions, cadence, today)
+        })
+    return schedule
@@ -3,38 +3,97 @@ import time
 import sqlite3
 import calendar
 import feedparser
-import transmissionrpc
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from config import DB_PATH
 from utils import parse_anime_title, build_feed_url, parse_episode_info
+from matcher import get_matcher
 from notifications import send_torrent_notification
+from events import publish, subscriber_count
+from schedule import refresh_stale as refresh_stale_schedules
+import jobs
+from torrent_cache import prefetch_torrents, add_torrent
+from backends import (
+    DEFAULT_BACKEND_ID,
+    get_backends,
+    get_backend,
+    get_healthy_backends,
+    choose_backend
+)
 
 def get_transmission_client():
-    """Connect to Transmission daemon."""
+    """Connect to the default Transmission daemon."""
     try:
-        # Get settings from database
-        conn = sqlite3.connect(DB_PATH, timeout=30)
-        c = conn.cursor()
-        c.execute('SELECT value FROM settings WHERE key = ?',
-                  ('transmission_host',))
-        host_row = c.fetchone()
-        c.execute('SELECT value FROM settings WHERE key = ?',
-                  ('transmission_port',))
-        port_row = c.fetchone()
-        c.execute('SELECT value FROM settings WHERE key = ?',
-                  ('download_directory',))
-        download_dir_row = c.fetchone()
-        conn.close()
-
-        host = host_row[0] if host_row else 'localhost'
-        port = int(port_row[0]) if port_row else 9091
-        download_dir = download_dir_row[0] if download_dir_row else None
-
-        return transmissionrpc.Client(address=host, port=port), download_dir
+        backend = get_backend(DEFAULT_BACKEND_ID)
+        return backend.client(retry=True), backend.download_dir
     except Exception as e:
         print(f"Transmission connection error: {e}")
         return None, None
 
+def _download_path(root, show_name, season_name):
+    """Build the per-show download directory under a backend's root."""
+    if season_name:
+        return os.path.join(root, show_name, season_name)
+    return os.path.join(root, show_name)
+
+def _add_to_backend(backend, torrent_url, show_name, season_name):
+    """
+    Add a torrent to a backend under the show's directory. Returns the info
+    hash. Without a download root the daemon's own default is used, and the
+    directory is only created here for backends on this machine.
+    """
+    download_path = None
+    if backend.download_dir:
+        download_path = _download_path(backend.download_dir, show_name, season_name)
+        if backend.local:
+            os.makedirs(download_path, exist_ok=True)
+    try:
+        return add_torrent(backend.client(), torrent_url, download_path)
+    except Exception:
+        backend.invalidate()
+        raise
+
+def _entry_torrent_url(entry):
+    """Return the .torrent link of a feed entry, falling back to its link."""
+    if hasattr(entry, 'links'):
+        for link in entry.links:
+            if link.get('type') == 'application/x-bittorrent':
+                return link.get('href')
+    if hasattr(entry, 'link'):
+        return entry.link
+    return None
+
+def _entry_too_old(entry, max_age):
+    """Return True if the entry was published more than max_age days ago."""
+    if not max_age or not hasattr(entry, 'published_parsed'):
+        return False
+    published_date = datetime.fromtimestamp(
+        calendar.timegm(entry.published_parsed), timezone.utc)
+    return datetime.now(timezone.utc) - published_date > timedelta(days=max_age)
+
+def _prefetch_new_entries(c, entries, max_age):
+    """Concurrently cache the .torrent files of entries not yet recorded."""
+    new_urls = []
+    for entry in entries:
+        torrent_url = _entry_torrent_url(entry)
+        if not torrent_url or _entry_too_old(entry, max_age):
+            continue
+        c.execute('SELECT 1 FROM downloaded_torrents WHERE torrent_url = ?',
+                  (torrent_url,))
+        if not c.fetchone():
+            new_urls.append(torrent_url)
+    if new_urls:
+        prefetch_torrents(new_urls)
+
+def _publish_torrent_added(show_id, show_name, torrent_name, info_hash, backend):
+    publish('torrent_added', {
+        'show_id': show_id,
+        'show_name': show_name,
+        'torrent_name': torrent_name,
+        'hash': info_hash,
+        'backend_id': backend.id
+    })
+
 def update_cached_shows_once():
     """Run cache update once on startup."""
     time.sleep(2)  # Wait for app to fully start
@@ -82,202 +141,454 @@ def update_cached_shows_once():
     except Exception as e:
         print(f"Error in initial cache: {e}")
 
-def check_and_download_torrents():
+READD_BACKOFF_BASE = 300  # seconds before the second re-add attempt
+READD_BACKOFF_MAX = 86400
+READD_MAX_ATTEMPTS = 8
+last_reconcile_report = None
+REPLACEMENT_POLL_INTERVAL = 900  # safety-net interval, the torrent-done hook is immediate
+TRANSMISSION_SYNC_INTERVAL = 5  # seconds between torrent polls while /api/events has listeners
+CHECK_SHOW_WORKERS = 2
+CACHE_PROFILE_WORKERS = 2
+SEARCH_QUERY_MAX_LENGTH = 200  # default of the search_query_max_length setting
+FEED_PAGE_SIZE = 75  # entries in one page of a Nyaa RSS search
+
+def _search_query_max_length(c):
+    c.execute('SELECT value FROM settings WHERE key = ?', ('search_query_max_length',))
+    row = c.fetchone()
+    try:
+        return int(row[0]) if row and row[0] else SEARCH_QUERY_MAX_LENGTH
+    except ValueError:
+        return SEARCH_QUERY_MAX_LENGTH
+
+def _search_terms(show_names):
+    """Search for any of show_names; a single show is searched as before."""
+    if len(show_names) == 1:
+        return show_names[0]
+    phrases = ('"' + name.replace('"', '') + '"' for name in show_names)
+    return '(' + '|'.join(phrases) + ')'
+
+def _pack_searches(shows, quality, max_length):
+    """Split shows into batches whose combined query fits in max_length."""
+    batches = []
+    batch = []
+    for show in sorted(shows, key=lambda s: s['show_name'].casefold()):
+        names = [s['show_name'] for s in batch + [show]]
+        query = ' '.join(filter(None, (_search_terms(names), quality)))
+        if batch and len(query) > max_length:
+            batches.append(batch)
+            batch = []
+        batch.append(show)
+    if batch:
+        batches.append(batch)
+    return batches
+
+def _search_batch(profile, shows, matcher):
     """
-    Background task to check RSS feeds and download new torrents.
-    Checks each tracked show based on its profile's interval setting.
+    Fetch one combined search for shows and split its entries among them.
+
+    A search that fills a whole feed page may have crowded out shows with
+    older releases. Shows that got entries are covered back to the oldest
+    entry of the page, which is well before the previous check; the others
+    are searched again, in halves if none got any. Yields (show, entries)
+    and returns the number of requests made.
     """
-    print("Starting torrent checker thread...")
-    profile_last_checked = {}  # Track when each profile was last checked
+    requests = 0
+    pending = [shows]
+    while pending:
+        shows = pending.pop()
+        feed_url = build_feed_url(profile['base_url'], profile['uploader'], profile['quality'],
+                                  _search_terms([show['show_name'] for show in shows]))
+        entries = feedparser.parse(feed_url).entries
+        requests += 1
+
+        if len(shows) == 1:
+            yield shows[0], entries
+            continue
+
+        show_ids = {show['id'] for show in shows}
+        routed = {}
+        for entry in entries:
+            for show_id in matcher.search(entry.title, show_ids):
+                routed.setdefault(show_id, []).append(entry)
+
+        missing = [show for show in shows if show['id'] not in routed]
+        if len(entries) < FEED_PAGE_SIZE or not missing:
+            missing = []
+        elif len(missing) == len(shows):
+            middle = len(shows) // 2
+            pending += [shows[middle:], shows[:middle]]
+            continue
+        else:
+            pending.append(missing)
+
+        for show in shows:
+            if show not in missing:
+                yield show, routed.get(show['id'], [])
+    return requests
+
+def _show_feeds(c, shows, matcher):
+    """
+    Yield (show, feed entries) for each of shows. Shows whose feed is the
+    search built from their profile are looked up together, in as few
+    combined searches per profile as the query length allows; shows with
+    another feed URL are fetched on their own.
+    """
+    c.execute('SELECT * FROM feed_profiles')
+    profiles = {row['id']: row for row in c.fetchall()}
+    max_length = _search_query_max_length(c)
+
+    by_profile = {}
+    for show in shows:
+        profile = profiles.get(show['profile_id'])
+        if profile and show['feed_url'] == build_feed_url(
+                profile['base_url'], profile['uploader'], profile['quality'], show['show_name']):
+            by_profile.setdefault(profile['id'], []).append(show)
+        else:
+            yield show, feedparser.parse(show['feed_url']).entries
+
+    for profile_id, profile_shows in by_profile.items():
+        profile = profiles[profile_id]
+        requests = 0
+        for batch in _pack_searches(profile_shows, profile['quality'], max_length):
+            requests += yield from _search_batch(profile, batch, matcher)
+        print(f"Searched {len(profile_shows)} shows of {profile['name']} in {requests} requests")
+
+def run_checker_cycle(profile_last_checked):
+    """
+    Run one pass of the torrent checker: fetch the feeds of every profile
+    whose interval has elapsed, add new torrents, then reconcile missing ones.
+    profile_last_checked maps profile ids to the time they were last checked
+    and is updated in place.
+    """
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    c = conn.cursor()
+
+    # Get all tracked shows with their profile intervals
+    c.execute('''
+        SELECT ts.*, fp.interval as profile_interval
+        FROM tracked_shows ts
+        LEFT JOIN feed_profiles fp ON ts.profile_id = fp.id
+    ''')
+    tracked_shows = c.fetchall()
+
+    if not get_healthy_backends():
+        print("Cannot connect to Transmission, skipping check")
+        conn.close()
+        return
+
+    current_time = time.time()
+    profiles_to_check = set()
+
+    # First pass: identify which profiles need checking
+    for show in tracked_shows:
+        profile_id = show['profile_id']
+        interval = (show['profile_interval'] or 30) * 60  # Convert minutes to seconds
+        
+        # Check if this profile needs to be checked
+        if (profile_id not in profile_last_checked or 
+            current_time - profile_last_checked[profile_id] >= interval):
+            profiles_to_check.add(profile_id)
+            
+            # Update last checked time for this profile
+            profile_last_checked[profile_id] = current_time
+
+    # Second pass: add all shows for profiles that need checking
+    shows_to_check = [show for show in tracked_shows if show['profile_id'] in profiles_to_check]
+
+    if shows_to_check:
+        print(f"Checking {len(shows_to_check)} shows due for RSS check")
+    matcher = get_matcher()
+
+    for show, entries in _show_feeds(c, shows_to_check, matcher):
+        show_id, show_name, feed_url, profile_id, added_at, season_name, max_age, image_path = show[:8]
 
-    while True:
         try:
-            conn = sqlite3.connect(DB_PATH, timeout=30)
-            conn.row_factory = sqlite3.Row
-            c = conn.cursor()
+            # Download new .torrent files concurrently up front
+            _prefetch_new_entries(c, entries, max_age)
 
-            # Get all tracked shows with their profile intervals
-            c.execute('''
-                SELECT ts.*, fp.interval as profile_interval
-                FROM tracked_shows ts
-                LEFT JOIN feed_profiles fp ON ts.profile_id = fp.id
-            ''')
-            tracked_shows = c.fetchall()
-
-            tc, download_dir = get_transmission_client()
-            if not tc:
-                print("Cannot connect to Transmission, skipping check")
-                conn.close()
-                time.sleep(60)  # Wait 1 minute before retry
-                continue
+            for entry in entries:
+                if _entry_too_old(entry, max_age):
+                    continue
 
-            # Build set of active torrent names for re-add detection
-            active_torrent_names = set()
-            try:
-                active_torrent_names = {t.name for t in tc.get_torrents()}
-            except Exception as e:
-                print(f"Could not fetch active torrents: {e}")
+                torrent_url = _entry_torrent_url(entry)
+                if not torrent_url:
+                    continue
 
-            current_time = time.time()
-            profiles_to_check = set()
+                # The show's own search results only go through its rules
+                if not matcher.accepts(show_id, entry.title):
+                    continue
 
-            # First pass: identify which profiles need checking
-            for show in tracked_shows:
-                profile_id = show['profile_id']
-                interval = (show['profile_interval'] or 30) * 60  # Convert minutes to seconds
+                # Parse episode info for metadata and replacement logic
+                episode_info = parse_episode_info(entry.title)
                 
-                # Check if this profile needs to be checked
-                if (profile_id not in profile_last_checked or 
-                    current_time - profile_last_checked[profile_id] >= interval):
-                    profiles_to_check.add(profile_id)
+                # Check if this is a potential replacement
+                replacement_candidate = None
+                if episode_info['episode'] and episode_info['subgroup']:
+                    # Look for existing episodes from same subgroup with lower version
+                    c.execute('''
+                        SELECT id, version FROM downloaded_torrents
+                        WHERE episode_number = ? AND subgroup = ? 
+                        AND is_deleted = FALSE AND tracked_show_id = ?
+                        ORDER BY version DESC
+                    ''', (episode_info['episode'], episode_info['subgroup'], show_id))
                     
-                    # Update last checked time for this profile
-                    profile_last_checked[profile_id] = current_time
-
-            # Second pass: add all shows for profiles that need checking
-            shows_to_check = [show for show in tracked_shows if show['profile_id'] in profiles_to_check]
-
-            if shows_to_check:
-                print(f"Checking {len(shows_to_check)} shows due for RSS check")
+                    existing = c.fetchone()
+                    if existing and episode_info['version'] > existing['version']:
+                        replacement_candidate = existing['id']
+                        print(f"Found replacement candidate: {entry.title} replaces version {existing['version']}")
+                
+                # Check if already downloaded; torrents that went
+                # missing from Transmission are handled by
+                # reconcile_missing_torrents
+                c.execute('''
+                    SELECT id FROM downloaded_torrents
+                    WHERE torrent_url = ?
+                ''', (torrent_url,))
 
-            for show in shows_to_check:
-                show_id, show_name, feed_url, profile_id, added_at, season_name, max_age, image_path = show[:8]
-                download_path = os.path.join(download_dir, show_name, season_name) if season_name else os.path.join(download_dir, show_name)
+                if c.fetchone():
+                    continue  # Already recorded in DB
 
+                # Add torrent to Transmission
                 try:
-                    # Parse the RSS feed
-                    feed = feedparser.parse(feed_url)
-
-                    for entry in feed.entries:
-                        # Check max_age
-                        if max_age and hasattr(entry, 'published_parsed'):
-                            published_date = datetime.fromtimestamp(
-                                calendar.timegm(entry.published_parsed), timezone.utc)
-                            if datetime.now(timezone.utc) - published_date > timedelta(days=max_age):
-                                continue
-
-                        torrent_url = None
-
-                        # Find torrent link
-                        if hasattr(entry, 'links'):
-                            for link in entry.links:
-                                if (link.get('type') ==
-                                        'application/x-bittorrent'):
-                                    torrent_url = link.get('href')
-                                    break
-
-                        if not torrent_url and hasattr(entry, 'link'):
-                            torrent_url = entry.link
-
-                        if not torrent_url:
-                            continue
-
-                        # Parse episode info for metadata and replacement logic
-                        episode_info = parse_episode_info(entry.title)
+                    # Get publication date
+                    published_at = None
+                    if hasattr(entry, 'published_parsed'):
+                        published_at = datetime.fromtimestamp(
+                            calendar.timegm(entry.published_parsed), timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+                    backend = choose_backend(show_id)
+                    if not backend:
+                        print(f"No Transmission backend available for {entry.title}")
+                        continue
+                    info_hash = _add_to_backend(
+                        backend, torrent_url, show_name, season_name)
+                    print(f"Added to Transmission ({backend.name}): {entry.title}")
+
+                    # Send notification
+                    send_torrent_notification(entry.title, show_name, episode_info)
+
+                    # Only record if successfully added
+                    try:
+                        c.execute('''
+                            INSERT INTO downloaded_torrents
+                            (tracked_show_id, torrent_url,
+                             torrent_name, published_at, episode_number,
+                             version, subgroup, info_hash, backend_id)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ''', (show_id, torrent_url, entry.title, published_at,
+                              episode_info['episode'], episode_info['version'], 
+                              episode_info['subgroup'], info_hash, backend.id))
+                        conn.commit()
+                        _publish_torrent_added(show_id, show_name, entry.title,
+                                               info_hash, backend)
                         
-                        # Check if this is a potential replacement
-                        replacement_candidate = None
-                        if episode_info['episode'] and episode_info['subgroup']:
-                            # Look for existing episodes from same subgroup with lower version
+                        # If this is a replacement, track it for deletion after download completes
+                        if replacement_candidate:
+                            new_torrent_id = c.lastrowid
                             c.execute('''
-                                SELECT id, version FROM downloaded_torrents
-                                WHERE episode_number = ? AND subgroup = ? 
-                                AND is_deleted = FALSE AND tracked_show_id = ?
-                                ORDER BY version DESC
-                            ''', (episode_info['episode'], episode_info['subgroup'], show_id))
+                                UPDATE downloaded_torrents
+                                SET replaced_by = ?
+                                WHERE id = ?
+                            ''', (new_torrent_id, replacement_candidate))
+                            conn.commit()
+                            print(f"Scheduled replacement: torrent {replacement_candidate} will be replaced by {new_torrent_id}")
                             
-                            existing = c.fetchone()
-                            if existing and episode_info['version'] > existing['version']:
-                                replacement_candidate = existing['id']
-                                print(f"Found replacement candidate: {entry.title} replaces version {existing['version']}")
-                        
-                        # Check if already downloaded
-                        c.execute('''
-                            SELECT id, torrent_name, is_deleted
-                            FROM downloaded_torrents
-                            WHERE torrent_url = ?
-                        ''', (torrent_url,))
-
-                        existing = c.fetchone()
-                        if existing:
-                            # Re-add if torrent disappeared from Transmission
-                            if (not existing['is_deleted'] and
-                                    existing['torrent_name']
-                                    not in active_torrent_names):
-                                try:
-                                    os.makedirs(download_path, exist_ok=True)
-                                    tc.add_torrent(
-                                        torrent_url,
-                                        download_dir=download_path
-                                    )
-                                    print(
-                                        f"Re-added missing torrent: "
-                                        f"{entry.title}"
-                                    )
-                                except Exception as e:
-                                    print(
-                                        f"Error re-adding torrent "
-                                        f"{entry.title}: {e}"
-                                    )
-                            continue  # Already recorded in DB
-
-                        # Add torrent to Transmission
-                        try:
-                            # Get publication date
-                            published_at = None
-                            if hasattr(entry, 'published_parsed'):
-                                published_at = datetime.fromtimestamp(
-                                    calendar.timegm(entry.published_parsed), timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
-
-                            os.makedirs(download_path, exist_ok=True)
-                            tc.add_torrent(torrent_url, download_dir=download_path)
-                            print(f"Added to Transmission: {entry.title}")
-
-                            # Send notification
-                            send_torrent_notification(entry.title, show_name, episode_info)
-
-                            # Only record if successfully added
-                            try:
-                                c.execute('''
-                                    INSERT INTO downloaded_torrents
-                                    (tracked_show_id, torrent_url,
-                                     torrent_name, published_at, episode_number,
-                                     version, subgroup)
-                                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                                ''', (show_id, torrent_url, entry.title, published_at,
-                                      episode_info['episode'], episode_info['version'], 
-                                      episode_info['subgroup']))
-                                conn.commit()
-                                
-                                # If this is a replacement, track it for deletion after download completes
-                                if replacement_candidate:
-                                    new_torrent_id = c.lastrowid
-                                    c.execute('''
-                                        UPDATE downloaded_torrents
-                                        SET replaced_by = ?
-                                        WHERE id = ?
-                                    ''', (new_torrent_id, replacement_candidate))
-                                    conn.commit()
-                                    print(f"Scheduled replacement: torrent {replacement_candidate} will be replaced by {new_torrent_id}")
-                                    
-                            except sqlite3.IntegrityError:
-                                # Already in database, skip
-                                pass
-
-                        except Exception as e:
-                            print(f"Error adding torrent {entry.title}: {e}")
+                    except sqlite3.IntegrityError:
+                        # Already in database, skip
+                        pass
 
                 except Exception as e:
-                    print(f"Error checking feed for {show_name}: {e}")
+                    print(f"Error adding torrent {entry.title}: {e}")
 
-            conn.close()
+        except Exception as e:
+            print(f"Error checking feed for {show_name}: {e}")
 
+    # Bring the materialized schedule up to date with the new torrents
+    refresh_stale_schedules(conn)
+    conn.close()
+
+    # Re-add torrents that went missing from Transmission
+    reconcile_missing_torrents()
+
+def check_and_download_torrents():
+    """
+    Background task to check RSS feeds and download new torrents.
+    Checks each tracked show based on its profile's interval setting.
+    """
+    print("Starting torrent checker thread...")
+    profile_last_checked = {}  # Track when each profile was last checked
+
+    while True:
+        try:
+            run_checker_cycle(profile_last_checked)
         except Exception as e:
             print(f"Error in torrent checker: {e}")
 
         # Check every minute for interval evaluation
         time.sleep(60)
 
+def _readd_backoff(attempts):
+    """Seconds to wait before re-adding a torrent that has been re-added `attempts` times."""
+    if attempts <= 0:
+        return 0
+    return min(READD_BACKOFF_BASE * 2 ** (attempts - 1), READD_BACKOFF_MAX)
+
+def reconcile_missing_torrents():
+    """
+    Re-add recorded torrents that are no longer present in Transmission.
+
+    Diffs non-deleted downloaded_torrents rows against the torrents of every
+    reachable backend by info hash (by name for rows without a hash), then
+    re-adds the missing ones in one batch. Each re-add bumps readd_attempts
+    and is retried with exponential backoff until READD_MAX_ATTEMPTS.
+
+    Only rows added since reconcile_since or within their show's max_age
+    are re-added, and each only until a re-add succeeds. Other missing rows
+    predate the pass, or went missing again after being re-added, and were
+    most likely removed on purpose; they are marked removed_by_user and
+    left alone from then on. Rows whose backend was deleted or is
+    unreachable are counted as stranded.
+    Returns a report dict, which is also kept in last_reconcile_report.
+    """
+    global last_reconcile_report
+
+    started = time.time()
+    report = {
+        'started_at': datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),
+        'checked': 0,
+        'present': 0,
+        'missing': 0,
+        'readded': [],
+        'failed': [],
+        'backing_off': 0,
+        'abandoned': 0,
+        'removed_by_user': 0,
+        'stranded': 0,
+        'unreachable_backends': []
+    }
+
+    # Snapshot the torrents of every backend once
+    hashes = {}
+    names = {}
+    reachable = set()
+    for backend in get_backends():
+        if not backend.check_health()['healthy']:
+            report['unreachable_backends'].append(backend.name)
+            continue
+        try:
+            torrents = backend.client().get_torrents()
+        except Exception as e:
+            print(f"Could not fetch torrents from {backend.name}: {e}")
+            backend.invalidate()
+            report['unreachable_backends'].append(backend.name)
+            continue
+        reachable.add(backend.id)
+        names[backend.id] = set()
+        for t in torrents:
+            hashes[t.hashString] = backend.id
+            names[backend.id].add(t.name)
+
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    c = conn.cursor()
+    c.execute('SELECT value FROM settings WHERE key = ?', ('reconcile_since',))
+    since = c.fetchone()
+    c.execute('''
+        SELECT dt.id, dt.tracked_show_id, dt.torrent_url, dt.torrent_name,
+               dt.info_hash, dt.backend_id, dt.readd_attempts, dt.last_readd_at,
+               dt.readded_at, ts.show_name, ts.season_name,
+               (dt.added_at >= ?
+                OR (ts.max_age IS NOT NULL AND COALESCE(dt.published_at, dt.added_at)
+                    >= datetime('now', '-' || ts.max_age || ' days'))) AS readdable
+        FROM downloaded_torrents dt
+        JOIN tracked_shows ts ON dt.tracked_show_id = ts.id
+        WHERE dt.is_deleted = FALSE AND dt.replaced_by IS NULL
+              AND NOT COALESCE(dt.removed_by_user, FALSE)
+    ''', (since[0] if since else '',))
+    rows = c.fetchall()
+
+    now = time.time()
+    missing = []
+    for row in rows:
+        backend_id = row['backend_id'] if row['backend_id'] is not None else DEFAULT_BACKEND_ID
+        if backend_id not in reachable:
+            report['stranded'] += 1
+            continue
+        report['checked'] += 1
+
+        if row['info_hash']:
+            found_on = hashes.get(row['info_hash'])
+        else:
+            found_on = backend_id if row['torrent_name'] in names.get(backend_id, ()) else None
+
+        if found_on is not None:
+            report['present'] += 1
+            if found_on != backend_id:
+                # Moved to another backend by hand
+                c.execute('UPDATE downloaded_torrents SET backend_id = ? WHERE id = ?',
+                          (found_on, row['id']))
+            continue
+
+        report['missing'] += 1
+        if not row['readdable'] or row['readded_at']:
+            c.execute('UPDATE downloaded_torrents SET removed_by_user = TRUE WHERE id = ?',
+                      (row['id'],))
+            report['removed_by_user'] += 1
+            continue
+        attempts = row['readd_attempts'] or 0
+        if attempts >= READD_MAX_ATTEMPTS:
+            report['abandoned'] += 1
+            continue
+        if row['last_readd_at'] and now - row['last_readd_at'] < _readd_backoff(attempts):
+            report['backing_off'] += 1
+            continue
+        missing.append(row)
+
+    # Fetch any uncached .torrent files for the batch concurrently
+    if missing:
+        prefetch_torrents([row['torrent_url'] for row in missing])
+
+    for row in missing:
+        backend = get_backend(row['backend_id']) or choose_backend(row['tracked_show_id'])
+        try:
+            if not backend or not backend.client():
+                raise RuntimeError("no Transmission backend available")
+            info_hash = _add_to_backend(
+                backend, row['torrent_url'], row['show_name'], row['season_name'])
+            c.execute('''
+                UPDATE downloaded_torrents
+                SET info_hash = COALESCE(info_hash, ?), backend_id = ?,
+                    readd_attempts = readd_attempts + 1, last_readd_at = ?,
+                    readded_at = ?
+                WHERE id = ?
+            ''', (info_hash, backend.id, now, now, row['id']))
+            report['readded'].append(row['torrent_name'])
+        except Exception as e:
+            c.execute('''
+                UPDATE downloaded_torrents
+                SET readd_attempts = readd_attempts + 1, last_readd_at = ?
+                WHERE id = ?
+            ''', (now, row['id']))
+            report['failed'].append({'torrent_name': row['torrent_name'], 'error': str(e)})
+
+    conn.commit()
+    conn.close()
+
+    report['duration'] = round(time.time() - started, 3)
+    if report['removed_by_user']:
+        print(f"Reconciliation: {report['removed_by_user']} missing torrents "
+              f"left alone as removed by user")
+    if report['readded'] or report['failed']:
+        print(f"Reconciliation: {report['missing']} missing, "
+              f"{len(report['readded'])} re-added, {len(report['failed'])} failed, "
+              f"{report['backing_off']} backing off, {report['abandoned']} abandoned")
+        for name in report['readded']:
+            print(f"Re-added missing torrent: {name}")
+
+    last_reconcile_report = report
+    return report
+
 def update_cached_shows():
     """
     Background task to update cached shows from all profile feeds.
@@ -354,6 +665,71 @@ def update_cached_shows():
         # Check every minute for interval evaluation
         time.sleep(60)
 
+def _add_new_entries(conn, show_id, show_name, season_name, max_age, entries):
+    """
+    Add the feed entries of a newly tracked show that aren't recorded yet.
+    Used for the initial check, before any replacement bookkeeping applies.
+    """
+    c = conn.cursor()
+    matcher = get_matcher()
+    entries = [entry for entry in entries if matcher.accepts(show_id, entry.title)]
+
+    # Download new .torrent files concurrently up front
+    _prefetch_new_entries(c, entries, max_age)
+
+    for entry in entries:
+        if _entry_too_old(entry, max_age):
+            continue
+
+        torrent_url = _entry_torrent_url(entry)
+        if not torrent_url:
+            continue
+
+        # Check if already downloaded
+        c.execute('''
+            SELECT id FROM downloaded_torrents
+            WHERE torrent_url = ?
+        ''', (torrent_url,))
+
+        if c.fetchone():
+            continue
+
+        try:
+            # Get publication date
+            published_at = None
+            if hasattr(entry, 'published_parsed'):
+                published_at = datetime.fromtimestamp(
+                    calendar.timegm(entry.published_parsed), timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+            backend = choose_backend(show_id)
+            if not backend:
+                print(f"No Transmission backend available for {entry.title}")
+                continue
+            info_hash = _add_to_backend(backend, torrent_url, show_name, season_name)
+            print(f"Added to Transmission ({backend.name}): {entry.title}")
+
+            # Send notification
+            send_torrent_notification(entry.title, show_name)
+
+            # Only record if successfully added
+            try:
+                c.execute('''
+                    INSERT INTO downloaded_torrents
+                    (tracked_show_id, torrent_url, torrent_name, published_at,
+                     info_hash, backend_id)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (show_id, torrent_url, entry.title, published_at,
+                      info_hash, backend.id))
+                conn.commit()
+                _publish_torrent_added(show_id, show_name, entry.title,
+                                       info_hash, backend)
+            except sqlite3.IntegrityError:
+                # Already in database, skip
+                pass
+
+        except Exception as e:
+            print(f"Error adding torrent {entry.title}: {e}")
+
 def check_single_show(tracked_show_id):
     """
     Immediately check a single tracked show for torrents.
@@ -371,82 +747,81 @@ def check_single_show(tracked_show_id):
             conn.close()
             return
 
-        show_id, show_name, feed_url, profile_id, added_at, season_name, max_age, image_path = show
+        show_id, show_name, feed_url, profile_id, added_at, season_name, max_age, image_path = show[:8]
 
-        tc, download_dir = get_transmission_client()
-        if not tc:
+        if not get_healthy_backends():
             print("Cannot connect to Transmission")
             conn.close()
             return
 
-        download_path = os.path.join(download_dir, show_name, season_name) if season_name else os.path.join(download_dir, show_name)
-
         feed = feedparser.parse(feed_url)
+        _add_new_entries(conn, show_id, show_name, season_name, max_age, feed.entries)
 
-        for entry in feed.entries:
-            # Check max_age
-            if max_age and hasattr(entry, 'published_parsed'):
-                published_date = datetime.fromtimestamp(
-                    calendar.timegm(entry.published_parsed), timezone.utc)
-                if datetime.now(timezone.utc) - published_date > timedelta(days=max_age):
-                    continue
-
-            torrent_url = None
-
-            if hasattr(entry, 'links'):
-                for link in entry.links:
-                    if link.get('type') == 'application/x-bittorrent':
-                        torrent_url = link.get('href')
-                        break
-
-            if not torrent_url and hasattr(entry, 'link'):
-                torrent_url = entry.link
+        conn.close()
 
-            if not torrent_url:
-                continue
+    except Exception as e:
+        print(f"Error checking show: {e}")
 
-            # Check if already downloaded
-            c.execute('''
-                SELECT id FROM downloaded_torrents
-                WHERE torrent_url = ?
-            ''', (torrent_url,))
+def check_profile_shows(profile_id, tracked_show_ids):
+    """
+    Initial check of several shows newly tracked on one profile.
 
-            if c.fetchone():
-                continue
+    The profile's own feed is fetched once and its entries are routed to the
+    shows by the show matcher. Shows without an entry in it (older or quieter
+    shows) fall back to a check of their own feed. Episodes only present in
+    a show's own feed are picked up by the next regular checker cycle.
+    """
+    try:
+        conn = sqlite3.connect(DB_PATH, timeout=30)
+        conn.row_factory = sqlite3.Row
+        c = conn.cursor()
 
-            try:
-                # Get publication date
-                published_at = None
-                if hasattr(entry, 'published_parsed'):
-                    published_at = datetime.fromtimestamp(
-                        calendar.timegm(entry.published_parsed), timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        c.execute('SELECT * FROM feed_profiles WHERE id = ?', (profile_id,))
+        profile = c.fetchone()
+        placeholders = ','.join('?' * len(tracked_show_ids))
+        c.execute(f'''
+            SELECT id, show_name, season_name, max_age FROM tracked_shows
+            WHERE id IN ({placeholders})
+        ''', tracked_show_ids)
+        shows = c.fetchall()
 
-                os.makedirs(download_path, exist_ok=True)
-                tc.add_torrent(torrent_url, download_dir=download_path)
-                print(f"Added to Transmission: {entry.title}")
+        if not profile or not shows:
+            conn.close()
+            return
 
-                # Send notification
-                send_torrent_notification(entry.title, show_name)
+        if not get_healthy_backends():
+            print("Cannot connect to Transmission")
+            conn.close()
+            return
 
-                # Only record if successfully added
-                try:
-                    c.execute('''
-                        INSERT INTO downloaded_torrents
-                        (tracked_show_id, torrent_url, torrent_name, published_at)
-                        VALUES (?, ?, ?, ?)
-                    ''', (show_id, torrent_url, entry.title, published_at))
-                    conn.commit()
-                except sqlite3.IntegrityError:
-                    # Already in database, skip
-                    pass
+        feed_url = build_feed_url(profile['base_url'], profile['uploader'], profile['quality'])
+        feed = feedparser.parse(feed_url)
 
-            except Exception as e:
-                print(f"Error adding torrent {entry.title}: {e}")
+        matcher = get_matcher()
+        show_ids = {show['id'] for show in shows}
+        routed = {}
+        for entry in feed.entries:
+            for show_id in matcher.route(entry.title, show_ids):
+                routed.setdefault(show_id, []).append(entry)
+
+        fallback = []
+        for show in shows:
+            entries = routed.get(show['id'])
+            if not entries:
+                fallback.append(show['id'])
+                continue
+            _add_new_entries(conn, show['id'], show['show_name'],
+                             show['season_name'], show['max_age'], entries)
 
         conn.close()
+        print(f"Checked {len(shows) - len(fallback)} shows from the {profile['name']} feed, "
+              f"{len(fallback)} need their own feed")
+
+        for show_id in fallback:
+            check_single_show(show_id)
 
     except Exception as e:
-        print(f"Error checking show: {e}")
+        print(f"Error checking shows of profile {profile_id}: {e}")
 
 def cache_single_profile(profile):
     """Cache shows from a single profile immediately."""
@@ -507,85 +882,237 @@ def get_replacement_setting():
     except:
         return True  # Default to enabled
 
-def monitor_downloads_for_replacement():
+def _find_torrent(backend, info_hash, name, listings):
     """
-    Background task to monitor completed downloads and perform replacements.
-    Runs every minute to check for torrents that have completed downloading.
+    Find a torrent on a backend by info hash, falling back to name for
+    torrents recorded before hashes were cached. Listings are fetched once
+    per backend and memoised in the listings dict.
     """
-    print("Starting download monitor for v2 replacements...")
-    
-    while True:
+    if backend.id not in listings:
+        listings[backend.id] = backend.client().get_torrents()
+    for torrent in listings[backend.id]:
+        if info_hash and torrent.hashString == info_hash:
+            return torrent
+        if not info_hash and torrent.name == name:
+            return torrent
+    return None
+
+def mark_torrent_completed(info_hash):
+    """Record that a torrent finished downloading. Returns the number of rows updated."""
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    c = conn.cursor()
+    c.execute('''
+        UPDATE downloaded_torrents
+        SET completed_at = CURRENT_TIMESTAMP
+        WHERE info_hash = ? AND completed_at IS NULL
+    ''', (info_hash,))
+    updated = c.rowcount
+    conn.commit()
+    conn.close()
+    return updated
+
+def process_replacements(completed_hash=None):
+    """
+    Remove old versions whose replacement has finished downloading.
+
+    With completed_hash (from the torrent-done hook) only replacements of
+    that torrent are processed, after looking it up by hash to confirm it
+    finished. Without it, every pending replacement is checked against
+    Transmission.
+    Returns the number of old torrents removed.
+    """
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    c = conn.cursor()
+
+    query = '''
+        SELECT dt.id, dt.torrent_name, dt.info_hash, dt.backend_id,
+               new.torrent_name, new.info_hash, new.backend_id
+        FROM downloaded_torrents dt
+        JOIN downloaded_torrents new ON dt.replaced_by = new.id
+        WHERE dt.replaced_by IS NOT NULL AND dt.is_deleted = FALSE
+    '''
+    if completed_hash:
+        c.execute(query + ' AND new.info_hash = ?', (completed_hash,))
+    else:
+        c.execute(query)
+    torrents_to_replace = c.fetchall()
+
+    listings = {}
+    replaced = 0
+
+    for torrent_data in torrents_to_replace:
+        (old_torrent_id, old_name, old_hash, old_backend_id,
+         replacement_name, replacement_hash, replacement_backend_id) = torrent_data
+
+        old_backend = get_backend(old_backend_id)
+        replacement_backend = get_backend(replacement_backend_id)
+        if not (old_backend and old_backend.client() and
+                replacement_backend and replacement_backend.client()):
+            continue
+
         try:
-            if not get_replacement_setting():
-                time.sleep(60)
+            if completed_hash:
+                # The hook only names a torrent; deleting data needs the daemon's word
+                found = replacement_backend.client().get_torrents(ids=[replacement_hash])
+                replacement_torrent = found[0] if found else None
+            else:
+                replacement_torrent = _find_torrent(
+                    replacement_backend, replacement_hash, replacement_name, listings)
+            if not replacement_torrent or replacement_torrent.progress != 100:
                 continue
 
-            conn = sqlite3.connect(DB_PATH, timeout=30)
-            c = conn.cursor()
+            if completed_hash and old_hash:
+                # Look up just the old torrent instead of listing the daemon
+                found = old_backend.client().get_torrents(ids=[old_hash])
+                old_torrent = found[0] if found else None
+            else:
+                old_torrent = _find_torrent(old_backend, old_hash, old_name, listings)
+            if not old_torrent:
+                continue
+
+            print(f"Replacing {old_name} with {replacement_name}")
+
+            # Remove old torrent from Transmission
+            old_backend.client().remove_torrent(
+                old_torrent.hashString, delete_data=True)
 
-            # Find torrents that are marked to be replaced
+            # Mark as deleted in database
             c.execute('''
-                SELECT dt.id, dt.torrent_url, dt.torrent_name, dt.replaced_by
-                FROM downloaded_torrents dt
-                WHERE dt.replaced_by IS NOT NULL AND dt.is_deleted = FALSE
-            ''')
-            
-            torrents_to_replace = c.fetchall()
-            
-            if torrents_to_replace:
-                tc, _ = get_transmission_client()
-                if tc:
-                    for torrent_data in torrents_to_replace:
-                        old_torrent_id, old_url, old_name, replacement_id = torrent_data
-                        
-                        # Check if replacement torrent is complete
-                        c.execute('''
-                            SELECT dt.torrent_url, dt.torrent_name
-                            FROM downloaded_torrents dt
-                            WHERE dt.id = ?
-                        ''', (replacement_id,))
-                        
-                        replacement_info = c.fetchone()
-                        
-                        if replacement_info:
-                            replacement_url, replacement_name = replacement_info
-                            
-                            # Get torrent status from Transmission
-                            try:
-                                torrents = tc.get_torrents()
-                                replacement_torrent = None
-                                old_torrent = None
-                                
-                                for torrent in torrents:
-                                    if torrent.url == replacement_url:
-                                        replacement_torrent = torrent
-                                    elif torrent.url == old_url:
-                                        old_torrent = torrent
-                                
-                                # If replacement is complete and old torrent exists
-                                if (replacement_torrent and replacement_torrent.progress == 100 and 
-                                    old_torrent):
-                                    print(f"Replacing {old_name} with {replacement_name}")
-                                    
-                                    # Remove old torrent from Transmission
-                                    tc.remove_torrent(old_torrent, delete_data=True)
-                                    
-                                    # Mark as deleted in database
-                                    c.execute('''
-                                        UPDATE downloaded_torrents
-                                        SET is_deleted = TRUE
-                                        WHERE id = ?
-                                    ''', (old_torrent_id,))
-                                    conn.commit()
-                                    
-                                    print(f"Successfully replaced torrent {old_torrent_id}")
-                                    
-                            except Exception as e:
-                                print(f"Error removing old torrent {old_torrent_id}: {e}")
-            
-            conn.close()
-            
+                UPDATE downloaded_torrents
+                SET is_deleted = TRUE
+                WHERE id = ?
+            ''', (old_torrent_id,))
+            conn.commit()
+            replaced += 1
+
+            print(f"Successfully replaced torrent {old_torrent_id}")
+            publish('replacement', {
+                'old_name': old_name,
+                'old_hash': old_torrent.hashString,
+                'old_backend_id': old_backend.id,
+                'new_name': replacement_name,
+                'new_hash': replacement_hash
+            })
+
+        except Exception as e:
+            print(f"Error removing old torrent {old_torrent_id}: {e}")
+
+    conn.close()
+    return replaced
+
+def handle_torrent_done(info_hash):
+    """
+    Handle Transmission's torrent-done hook for one torrent: record its
+    completion and immediately replace any older version it supersedes.
+    Returns a dict describing what was done.
+    """
+    info_hash = info_hash.strip().lower()
+    completed = mark_torrent_completed(info_hash)
+    replaced = 0
+    if get_replacement_setting():
+        replaced = process_replacements(completed_hash=info_hash)
+    return {'hash': info_hash, 'known': completed > 0, 'replaced': replaced}
+
+def monitor_downloads_for_replacement():
+    """
+    Background safety net for v2 replacements.
+    Completed downloads normally trigger replacement straight away through
+    the torrent-done hook; this loop catches any that were missed.
+    """
+    print("Starting download monitor for v2 replacements...")
+    
+    while True:
+        try:
+            if get_replacement_setting():
+                process_replacements()
         except Exception as e:
             print(f"Error in replacement monitor: {e}")
             
-        time.sleep(60)  # Check every minute
+        time.sleep(REPLACEMENT_POLL_INTERVAL)
+
+def list_backend_torrents(backend):
+    """Return the torrents of one backend as dicts, or None if it is unreachable."""
+    tc = backend.client()
+    if not tc:
+        return None
+    try:
+        torrents = tc.get_torrents()
+    except Exception as e:
+        print(f"Error listing torrents on {backend.name}: {e}")
+        backend.invalidate()
+        return None
+
+    result = []
+    for t in torrents:
+        result.append({
+            'id': t.id,
+            'name': t.name,
+            'hash': t.hashString,
+            'status': t.status,
+            'progress': t.progress,
+            'download_rate': t.rateDownload,
+            'upload_rate': t.rateUpload,
+            'done_date': t.doneDate,
+            'backend_id': backend.id,
+            'backend_name': backend.name
+        })
+    return result
+
+def list_all_torrents():
+    """
+    List the torrents of every backend concurrently.
+    Returns None if no backend could be reached.
+    """
+    backends = get_backends()
+    with ThreadPoolExecutor(max_workers=len(backends)) as pool:
+        listings = list(pool.map(list_backend_torrents, backends))
+
+    if all(listing is None for listing in listings):
+        return None
+
+    result = []
+    for listing in listings:
+        result.extend(listing or [])
+    return result
+
+def sync_transmission_events():
+    """
+    Background task publishing torrent changes to /api/events.
+    Only polls Transmission while a browser is subscribed; the first pass
+    after a subscriber connects sets the baseline, later passes publish
+    torrent events with action added, updated or removed.
+    """
+    print("Starting Transmission event sync...")
+    previous = None
+
+    while True:
+        time.sleep(TRANSMISSION_SYNC_INTERVAL)
+        if not subscriber_count():
+            previous = None
+            continue
+
+        try:
+            torrents = list_all_torrents()
+        except Exception as e:
+            print(f"Error in Transmission event sync: {e}")
+            continue
+        if torrents is None:
+            continue
+
+        current = {(t['backend_id'], t['hash']): t for t in torrents}
+        if previous is not None:
+            for key, torrent in current.items():
+                old = previous.get(key)
+                if old is None:
+                    publish('torrent', {'action': 'added', 'torrent': torrent})
+                elif old != torrent:
+                    publish('torrent', {'action': 'updated', 'torrent': torrent})
+            for backend_id, info_hash in previous.keys() - current.keys():
+                publish('torrent', {'action': 'removed', 'hash': info_hash,
+                                    'backend_id': backend_id})
+        previous = current
+
+jobs.register('check_show', check_single_show, workers=CHECK_SHOW_WORKERS)
+jobs.register('check_profile_shows', check_profile_shows, workers=CHECK_SHOW_WORKERS)
+jobs.register('cache_profile', cache_single_profile, workers=CACHE_PROFILE_WORKERS)
+jobs.register('cache_all_profiles', update_cached_shows_once)
@@ -21,6 +21,7 @@ export const api = {
         body: JSON.stringify(data)
     }),
     cleanupArtwork: () => request('/settings/artwork/cleanup', { method: 'POST' }),
+    backfillArtwork: () => request('/settings/artwork/backfill', { method: 'POST' }),
     
     getReplacementSettings: () => request('/settings/replacements'),
     saveReplacementSettings: (data) => request('/settings/replacements', {
@@ -49,6 +50,17 @@ export const api = {
         if (query) url += `?q=${encodeURIComponent(query)}`;
         return request(url);
     },
+    getShowsPage: async (query = '', limit = 100, cursor = null) => {
+        const params = new URLSearchParams({ limit });
+        if (query) params.set('q', query);
+        if (cursor) params.set('cursor', cursor);
+        const response = await fetch(`${API_BASE}/shows?${params}`);
+        if (!response.ok) throw new Error('Server error');
+        return {
+            shows: await response.json(),
+            nextCursor: response.headers.get('X-Next-Cursor')
+        };
+    },
     
     getTracked: () => request('/tracked'),
     trackShow: (data) => request('/tracked', {
@@ -62,6 +74,21 @@ export const api = {
         body: JSON.stringify(data)
     }),
     untrackShow: (id) => request(`/tracked/${id}`, { method: 'DELETE' }),
+    trackShows: (shows) => request('/tracked/bulk', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ shows })
+    }),
+    updateTrackedShows: (shows) => request('/tracked/bulk', {
+        method: 'PUT',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ shows })
+    }),
+    untrackShows: (ids) => request('/tracked/bulk', {
+        method: 'DELETE',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ ids })
+    }),
     uploadArt: (id, formData) => request(`/tracked/${id}/art`, {
         method: 'POST',
         body: formData
@@ -75,12 +102,39 @@ export const api = {
         method: 'POST'
     }),
     
+    getJobs: (params = {}) => request(`/jobs?${new URLSearchParams(params)}`),
+    getJob: (jobId) => request(`/jobs/${jobId}`),
+    // Poll a background job until it finishes; rejects with its error
+    waitForJob: async (job, interval = 1000, onUpdate = null) => {
+        while (job.status === 'queued' || job.status === 'running') {
+            await new Promise(resolve => setTimeout(resolve, interval));
+            job = await request(`/jobs/${job.id}`);
+            if (onUpdate) onUpdate(job);
+        }
+        if (job.status !== 'done') throw new Error(job.error || `Job ${job.status}`);
+        return job;
+    },
+    
     getSchedule: () => request('/schedule'),
     
+    searchAnidb: (query, limit = 10) => request(`/anidb/search?q=${encodeURIComponent(query)}&limit=${limit}`),
+    
     getPathSuggestions: (path) => request(`/utils/path-suggestions?path=${encodeURIComponent(path)}`),
     
     // Transmission methods
     getTransmissionTorrents: () => request('/transmission/torrents'),
+    getTransmissionBackends: (refresh = false) => request(`/transmission/backends${refresh ? '?refresh=1' : ''}`),
+    createTransmissionBackend: (data) => request('/transmission/backends', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(data)
+    }),
+    updateTransmissionBackend: (id, data) => request(`/transmission/backends/${id}`, {
+        method: 'PUT',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(data)
+    }),
+    deleteTransmissionBackend: (id) => request(`/transmission/backends/${id}`, { method: 'DELETE' }),
 
     // Notification methods
     getNotificationSettings: () => request('/notifications/settings'),
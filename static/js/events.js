@@ -0,0 +1,47 @@
+import { API_BASE } from './config.js';
+import { loadTrackedShows } from './shows.js';
+import { loadSchedule } from './schedule.js';
+import { applyLogEvent, applyTorrentEvent, loadLogs } from './logs.js';
+import { showNotification } from './ui.js';
+
+let source = null;
+let refreshTimeout = null;
+
+// Refetch the active tab once a burst of changes has settled
+function refreshActiveTab(delay = 500) {
+    clearTimeout(refreshTimeout);
+    refreshTimeout = setTimeout(() => {
+        const tab = window.loadActiveTab();
+        if (tab === 'shows') loadTrackedShows();
+        else if (tab === 'schedule') loadSchedule();
+    }, delay);
+}
+
+function on(type, handler) {
+    source.addEventListener(type, (e) => {
+        try {
+            handler(JSON.parse(e.data));
+        } catch (error) {
+            console.error(`Error handling ${type} event:`, error);
+        }
+    });
+}
+
+export function connectEvents() {
+    if (source || !window.EventSource) return;
+
+    source = new EventSource(`${API_BASE}/events`);
+
+    on('log', applyLogEvent);
+    on('torrent', applyTorrentEvent);
+    on('tracked', () => refreshActiveTab());
+    on('torrent_added', () => refreshActiveTab());
+    on('replacement', (data) => {
+        showNotification(`Replaced ${data.old_name} with ${data.new_name}`, 'info');
+        refreshActiveTab();
+    });
+    on('resync', () => {
+        refreshActiveTab(0);
+        if (window.loadActiveTab() === 'log') loadLogs();
+    });
+}
@@ -2,6 +2,7 @@ import { api } from './api.js';
 import { showNotification } from './ui.js';
 
 let logs = [];
+let torrents = [];
 let isLoading = false;
 
 export async function initLogTab() {
@@ -17,7 +18,7 @@ export async function initLogTab() {
     await loadLogs();
 }
 
-async function loadLogs() {
+export async function loadLogs() {
     if (isLoading) return;
     
     isLoading = true;
@@ -28,26 +29,18 @@ async function loadLogs() {
     logContainer.style.display = 'none';
 
     try {
-        const [logResponse, torrents] = await Promise.all([
+        const [logResponse, torrentList] = await Promise.all([
             api.getNotificationLogs(200),
             api.getTransmissionTorrents().catch(() => [])
         ]);
 
+        torrents = torrentList;
         const torrentMap = {};
         torrents.forEach(t => {
             torrentMap[t.name] = t;
         });
 
-        logs = logResponse.logs.map(log => {
-            if (log.torrent_name) {
-                log.torrent = torrentMap[log.torrent_name] ||
-                    torrents.find(t =>
-                        t.name.includes(log.torrent_name) ||
-                        log.torrent_name.includes(t.name)
-                    );
-            }
-            return log;
-        });
+        logs = logResponse.logs.map(log => attachTorrent(log, torrentMap));
         renderLogs();
     } catch (error) {
         console.error('Error loading logs:', error);
@@ -59,6 +52,43 @@ async function loadLogs() {
     }
 }
 
+function attachTorrent(log, torrentMap = {}) {
+    if (log.torrent_name) {
+        log.torrent = torrentMap[log.torrent_name] ||
+            torrents.find(t =>
+                t.name.includes(log.torrent_name) ||
+                log.torrent_name.includes(t.name)
+            );
+    }
+    return log;
+}
+
+// Live updates from the /api/events stream
+export function applyLogEvent(log) {
+    if (logs.some(l => l.id === log.id)) return;
+    logs.unshift(attachTorrent(log));
+    logs = logs.slice(0, 200);
+    renderLogs();
+}
+
+export function applyTorrentEvent(event) {
+    if (event.action === 'removed') {
+        torrents = torrents.filter(t =>
+            !(t.hash === event.hash && t.backend_id === event.backend_id));
+    } else {
+        const torrent = event.torrent;
+        const index = torrents.findIndex(t =>
+            t.hash === torrent.hash && t.backend_id === torrent.backend_id);
+        if (index >= 0) torrents[index] = torrent;
+        else torrents.push(torrent);
+    }
+
+    const affected = logs.filter(log => log.torrent_name);
+    if (affected.length === 0) return;
+    affected.forEach(log => attachTorrent(log));
+    renderLogs();
+}
+
 function renderLogs() {
     const logContainer = document.getElementById('log-container');
     
@@ -1,8 +1,9 @@
 import { loadSources, handleSourceSubmit } from './sources.js';
-import { loadTrackedShows, loadShows, handleAddShowDetailsSubmit, handleEditShowSubmit, resetAddShowModal } from './shows.js';
+import { loadTrackedShows, loadShows, handleAddShowDetailsSubmit, handleEditShowSubmit, handleAnidbInput, resetAddShowModal } from './shows.js';
 import { loadSchedule } from './schedule.js';
-import { loadSettings, handleGeneralSettingsSubmit, handleTransmissionSettingsSubmit, handleCleanupArtwork, checkSetup, handleSetupSubmit, handlePathInput, handlePathKeydown } from './settings.js';
+import { loadSettings, handleGeneralSettingsSubmit, handleTransmissionSettingsSubmit, handleCleanupArtwork, handleBackfillArtwork, checkSetup, handleSetupSubmit, handlePathInput, handlePathKeydown } from './settings.js';
 import { initLogTab } from './logs.js';
+import { connectEvents } from './events.js';
 import { closeModal, showNotification } from './ui.js';
 import { api } from './api.js';
 
@@ -62,6 +63,7 @@ document.getElementById('settings-btn').onclick = () => {
 document.getElementById('general-settings-form').onsubmit = handleGeneralSettingsSubmit;
 document.getElementById('transmission-form').onsubmit = handleTransmissionSettingsSubmit;
 document.getElementById('cleanup-artwork-btn').onclick = handleCleanupArtwork;
+document.getElementById('backfill-artwork-btn').onclick = handleBackfillArtwork;
 
 // Test notification button
 document.getElementById('test-notification-btn').onclick = async () => {
@@ -75,6 +77,7 @@ document.getElementById('test-notification-btn').onclick = async () => {
 document.getElementById('source-form').onsubmit = handleSourceSubmit;
 document.getElementById('add-show-details-form').onsubmit = handleAddShowDetailsSubmit;
 document.getElementById('edit-show-form').onsubmit = handleEditShowSubmit;
+document.getElementById('edit-show-anidb-id').oninput = handleAnidbInput;
 document.getElementById('setup-form').onsubmit = handleSetupSubmit;
 
 // Path autocompletion
@@ -136,4 +139,7 @@ checkSetup();
 document.addEventListener('DOMContentLoaded', () => {
     const savedTab = loadActiveTab();
     switchToTab(savedTab);
+
+    // Live updates instead of polling
+    connectEvents();
 });
@@ -108,7 +108,7 @@ export async function loadSchedule() {
                     <div class="upcoming-card">
                         <div class="upcoming-card-image">
                             ${item.image_path ? 
-                                `<img src="${item.image_path}" alt="${escapeHtml(item.show_name)}" style="width: 100%; height: 100%; object-fit: cover;">` :
+                                `<img src="${item.image_path}" ${item.image_srcset ? `srcset="${item.image_srcset}" sizes="50px"` : ''} loading="lazy" alt="${escapeHtml(item.show_name)}" style="width: 100%; height: 100%; object-fit: cover;">` :
                                 `<div style="width: 100%; height: 100%; display: flex; align-items: center; justify-content: center; background: var(--nord1); color: var(--nord4); font-weight: bold;">
                                     ${item.show_name.substring(0, 2).toUpperCase()}
                                 </div>`
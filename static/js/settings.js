@@ -11,6 +11,11 @@ export async function loadSettings() {
             settings.transmission_host || 'localhost';
         document.getElementById('transmission-port').value =
             settings.transmission_port || '9091';
+        document.getElementById('anidb-cache-days').value = settings.anidb_cache_days || '30';
+        document.getElementById('anidb-negative-cache-hours').value =
+            settings.anidb_negative_cache_hours || '6';
+        document.getElementById('search-query-max-length').value =
+            settings.search_query_max_length || '200';
         
         // Load replacement settings
         const replacementSettings = await api.getReplacementSettings();
@@ -30,7 +35,9 @@ export async function handleGeneralSettingsSubmit(e) {
     e.preventDefault();
     const data = {
         download_directory: document.getElementById('download-directory').value,
-
+        anidb_cache_days: document.getElementById('anidb-cache-days').value || '30',
+        anidb_negative_cache_hours: document.getElementById('anidb-negative-cache-hours').value || '6',
+        search_query_max_length: document.getElementById('search-query-max-length').value || '200'
     };
     
     // Save replacement settings separately
@@ -86,6 +93,30 @@ export async function handleCleanupArtwork() {
     }
 }
 
+export async function handleBackfillArtwork() {
+    const btn = document.getElementById('backfill-artwork-btn');
+    const label = btn.innerHTML;
+    btn.disabled = true;
+    btn.innerHTML = '<i class="fa-solid fa-hourglass-start"></i> Queued...';
+
+    try {
+        const job = await api.waitForJob(await api.backfillArtwork(), 2000, (job) => {
+            const progress = job.progress;
+            if (progress && progress.total) {
+                btn.innerHTML = `<i class="fa-solid fa-hourglass-half"></i> ${progress.done} / ${progress.total}`;
+            }
+        });
+        const result = job.result || {};
+        showNotification(`Artwork found for ${result.found || 0} of ${result.total || 0} show(s)`, 'success');
+        loadTrackedShows();
+    } catch (error) {
+        showNotification(`Error: ${error.message}`, 'error');
+    } finally {
+        btn.disabled = false;
+        btn.innerHTML = label;
+    }
+}
+
 export async function checkSetup() {
     try {
         const settings = await api.getSettings();
@@ -15,12 +15,69 @@ export function openAddShowModal() {
     loadShows();
 }
 
+const SHOWS_PAGE_SIZE = 100;
+
+function renderShowItems(shows) {
+    return shows.map(show => `
+        <div class="add-show-modal-item">
+            <div class="add-show-modal-item-header">
+                ${show.name}
+            </div>
+            <div class="source-badges">
+                ${show.sources.map(source => `
+                    <div class="source-badge cached-badge"
+                         style="background-color: ${source.color || '#88c0d0'}"
+                         data-name="${escapeHtml(show.name)}"
+                         data-id="${source.profile_id}"
+                         title="${source.profile_name}${source.uploader ? ' - ' + source.uploader : ''}${source.quality ? ' - ' + source.quality : ''}">
+                        <span class="source-badge-name">${source.profile_name}</span>
+                        ${source.quality ? `<span class="source-badge-quality">${source.quality}</span>` : ''}
+                    </div>
+                `).join('')}
+            </div>
+        </div>
+    `).join('');
+}
+
+function bindSourceBadges(container) {
+    container.querySelectorAll('.source-badge:not([data-bound])').forEach(badge => {
+        badge.dataset.bound = '1';
+        badge.onclick = (e) => {
+            e.stopPropagation();
+            trackShow(badge.dataset.name, badge.dataset.id);
+        };
+    });
+}
+
+function renderLoadMore(container, searchQuery, nextCursor) {
+    if (!nextCursor) return;
+    const button = document.createElement('button');
+    button.className = 'btn btn-secondary load-more-btn';
+    button.textContent = 'Load more';
+    button.onclick = async () => {
+        button.disabled = true;
+        try {
+            const page = await api.getShowsPage(searchQuery, SHOWS_PAGE_SIZE, nextCursor);
+            button.insertAdjacentHTML('beforebegin', renderShowItems(page.shows));
+            button.remove();
+            bindSourceBadges(container);
+            renderLoadMore(container, searchQuery, page.nextCursor);
+        } catch (error) {
+            button.disabled = false;
+            showNotification('Failed to load more shows', 'error');
+        }
+    };
+    // Keep the custom entry last
+    const custom = container.querySelector('.custom-item');
+    container.insertBefore(button, custom);
+}
+
 export async function loadShows(searchQuery = '') {
     const container = document.getElementById('shows-list');
     container.innerHTML = '<div class="loading">Loading shows...</div>';
 
     try {
-        const shows = await api.getShows(searchQuery);
+        const { shows, nextCursor } = await api.getShowsPage(searchQuery, SHOWS_PAGE_SIZE);
 
         let customHtml = '';
         if (searchQuery) {
@@ -56,35 +113,11 @@ export async function loadShows(searchQuery = '') {
             return;
         }
 
-        const showsHtml = shows.map(show => `
-            <div class="add-show-modal-item">
-                <div class="add-show-modal-item-header">
-                    ${show.name}
-                </div>
-                <div class="source-badges">
-                    ${show.sources.map(source => `
-                        <div class="source-badge cached-badge"
-                             style="background-color: ${source.color || '#88c0d0'}"
-                             data-name="${escapeHtml(show.name)}"
-                             data-id="${source.profile_id}"
-                             title="${source.profile_name}${source.uploader ? ' - ' + source.uploader : ''}${source.quality ? ' - ' + source.quality : ''}">
-                            <span class="source-badge-name">${source.profile_name}</span>
-                            ${source.quality ? `<span class="source-badge-quality">${source.quality}</span>` : ''}
-                        </div>
-                    `).join('')}
-                </div>
-            </div>
-        `).join('');
+        container.innerHTML = renderShowItems(shows) + customHtml;
 
-        container.innerHTML = showsHtml + customHtml;
-        
         // Add event listeners
-        container.querySelectorAll('.source-badge').forEach(badge => {
-            badge.onclick = (e) => {
-                e.stopPropagation();
-                trackShow(badge.dataset.name, badge.dataset.id);
-            };
-        });
+        bindSourceBadges(container);
+        renderLoadMore(container, searchQuery, nextCursor);
 
     } catch (error) {
         container.innerHTML = `
@@ -131,8 +164,6 @@ export async function handleAddShowDetailsSubmit(e) {
         resetAddShowModal();
         showNotification('Show tracked successfully', 'success');
         window.switchToTab('shows');
-        // Poll to pick up artwork once background thread saves it
-        [2000, 4000].forEach(ms => setTimeout(loadTrackedShows, ms));
     } catch (error) {
         showNotification('Error tracking show', 'error');
     }
@@ -170,7 +201,7 @@ export async function loadTrackedShows() {
                 </button>
                 <div class="show-card-image">
                     ${show.image_path ? 
-                        `<img src="${show.image_path}" alt="${escapeHtml(show.show_name)}" style="width: 100%; height: 100%; object-fit: cover;">` :
+                        `<img src="${show.image_path}" ${show.image_srcset ? `srcset="${show.image_srcset}" sizes="(max-width: 600px) 100vw, 400px"` : ''} loading="lazy" alt="${escapeHtml(show.show_name)}" style="width: 100%; height: 100%; object-fit: cover;">` :
                         show.show_name.substring(0, 2).toUpperCase()
                     }
                 </div>
@@ -224,6 +255,13 @@ export function openEditShowModal(show) {
     document.getElementById('edit-show-season').value = show.season_name || '';
     document.getElementById('edit-show-max-age').value = show.max_age || '';
     document.getElementById('edit-show-anidb-id').value = show.anidb_id || '';
+    document.getElementById('edit-show-anidb-suggestions').style.display = 'none';
+    document.getElementById('edit-show-aliases').value = (show.aliases || []).join(', ');
+    document.getElementById('edit-show-rule-subgroup').value = show.rule_subgroup || '';
+    document.getElementById('edit-show-rule-quality').value = show.rule_quality || '';
+    document.getElementById('edit-show-rule-min-version').value = show.rule_min_version ?? '';
+    document.getElementById('edit-show-rule-episode-min').value = show.rule_episode_min ?? '';
+    document.getElementById('edit-show-rule-episode-max').value = show.rule_episode_max ?? '';
 
     document.getElementById('untrack-show-btn').onclick = () => {
         untrackShow(show.id);
@@ -237,13 +275,54 @@ export function openEditShowModal(show) {
     openModal('edit-show-modal');
 }
 
+let anidbSearchTimeout;
+
+// Typing a title into the AniDB ID field offers matching AniDB entries
+export function handleAnidbInput(e) {
+    const input = e.target;
+    const dropdown = document.getElementById('edit-show-anidb-suggestions');
+    const query = input.value.trim();
+
+    clearTimeout(anidbSearchTimeout);
+    if (!query || /^\d+$/.test(query)) {
+        dropdown.style.display = 'none';
+        return;
+    }
+
+    anidbSearchTimeout = setTimeout(async () => {
+        try {
+            const results = await api.searchAnidb(query);
+            if (input.value.trim() !== query) return;
+            if (results.length === 0) {
+                dropdown.style.display = 'none';
+                return;
+            }
+            dropdown.innerHTML = results.map(r => `
+                <div class="path-suggestion-item" data-aid="${escapeHtml(r.aid)}">
+                    ${escapeHtml(r.title)} <small>(${escapeHtml(r.aid)}, ${Math.round(r.score * 100)}%)</small>
+                </div>
+            `).join('');
+            dropdown.querySelectorAll('.path-suggestion-item').forEach(item => {
+                item.onclick = () => {
+                    input.value = item.dataset.aid;
+                    dropdown.style.display = 'none';
+                };
+            });
+            dropdown.style.display = 'block';
+        } catch (error) {
+            dropdown.style.display = 'none';
+            console.error('Error searching AniDB:', error);
+        }
+    }, 250);
+}
+
 export async function fetchAnidbArtwork(showId) {
     const btn = document.getElementById('fetch-anidb-art-btn');
     btn.disabled = true;
     btn.innerHTML = '<i class="fa-solid fa-hourglass-start"></i> Fetching...';
 
     try {
-        await api.fetchArtFromAnidb(showId);
+        await api.waitForJob(await api.fetchArtFromAnidb(showId));
         showNotification('Artwork fetched from AniDB', 'success');
         closeModal('edit-show-modal');
         loadTrackedShows();
@@ -263,7 +342,13 @@ export async function handleEditShowSubmit(e) {
         show_name: document.getElementById('edit-show-name').value,
         season_name: document.getElementById('edit-show-season').value,
         max_age: document.getElementById('edit-show-max-age').value,
-        anidb_id: document.getElementById('edit-show-anidb-id').value
+        anidb_id: document.getElementById('edit-show-anidb-id').value,
+        aliases: document.getElementById('edit-show-aliases').value,
+        rule_subgroup: document.getElementById('edit-show-rule-subgroup').value,
+        rule_quality: document.getElementById('edit-show-rule-quality').value,
+        rule_min_version: document.getElementById('edit-show-rule-min-version').value,
+        rule_episode_min: document.getElementById('edit-show-rule-episode-min').value,
+        rule_episode_max: document.getElementById('edit-show-rule-episode-max').value
     };
 
     try {
@@ -272,7 +357,7 @@ export async function handleEditShowSubmit(e) {
         loadTrackedShows();
         showNotification('Show updated successfully', 'success');
     } catch (error) {
-        showNotification('Error updating show', 'error');
+        showNotification(error.message || 'Error updating show', 'error');
     }
 }
 
@@ -336,7 +421,7 @@ function isValidImageUrl(url) {
 }
 
 async function uploadFromUrl(showId, url) {
-    await api.uploadArtFromUrl(showId, url);
+    await api.waitForJob(await api.uploadArtFromUrl(showId, url));
     showNotification('Artwork updated', 'success');
     loadTrackedShows();
 }
@@ -345,7 +430,7 @@ async function uploadFile(showId, file) {
     const formData = new FormData();
     formData.append('file', file);
 
-    await api.uploadArt(showId, formData);
+    await api.waitForJob(await api.uploadArt(showId, formData));
     showNotification('Artwork updated', 'success');
     loadTrackedShows();
 }
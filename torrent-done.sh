@@ -0,0 +1,37 @@
+#!/bin/sh
+# Transmission script-torrent-done hook for Pyget Web.
+#
+# Notifies Pyget Web as soon as a torrent finishes so v2 replacements
+# happen immediately instead of on the next poll. Point Transmission at it
+# in settings.json (with the daemon stopped):
+#
+#   "script-torrent-done-enabled": true,
+#   "script-torrent-done-filename": "/path/to/pyget-web/torrent-done.sh"
+#
+# Every request carries the webhook_token setting. Pyget Web generates it
+# on first start and keeps a copy in its data directory, which is read
+# when Transmission runs as the same user. Otherwise, or for a remote
+# seedbox, set PYGET_TOKEN (and PYGET_URL, which defaults to the local
+# instance) in the daemon's environment.
+
+PYGET_URL="${PYGET_URL:-http://127.0.0.1:5123}"
+PYGET_DATA_DIR="${PYGET_DATA_DIR:-$HOME/.local/share/pyget}"
+
+if [ -z "$PYGET_TOKEN" ] && [ -r "$PYGET_DATA_DIR/webhook_token" ]; then
+    PYGET_TOKEN="$(cat "$PYGET_DATA_DIR/webhook_token")"
+fi
+
+if [ -z "$PYGET_TOKEN" ]; then
+    echo "No webhook token, set PYGET_TOKEN to the webhook_token setting" >&2
+    exit 1
+fi
+
+if [ -z "$TR_TORRENT_HASH" ]; then
+    echo "TR_TORRENT_HASH not set, is this running from Transmission?" >&2
+    exit 1
+fi
+
+curl -fsS -m 10 -X POST \
+    -H "X-Pyget-Token: $PYGET_TOKEN" \
+    --data-urlencode "hash=$TR_TORRENT_HASH" \
+    "$PYGET_URL/api/hooks/torrent-done" >/dev/null
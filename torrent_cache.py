@@ -0,0 +1,214 @@
+"""
+Local cache of .torrent metainfo files.
+
+Torrent files are downloaded concurrently ahead of being added to
+Transmission, validated, and stored under TORRENT_CACHE_DIR named by their
+info hash. The torrent_files table maps each source URL to its hash so that
+re-adds and replacements can submit the cached metainfo without touching
+the network again.
+"""
+import os
+import base64
+import hashlib
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from config import DB_PATH, TORRENT_CACHE_DIR
+
+PREFETCH_WORKERS = 4
+MAX_TORRENT_SIZE = 10 * 1024 * 1024  # 10MB
+
+
+def log(msg):
+    print(f"[torrent_cache] {msg}", flush=True)
+
+
+class InvalidTorrent(ValueError):
+    """Raised when downloaded data is not a valid .torrent file."""
+
+
+# ---------------------------------------------------------------------------
+# Bencode parsing
+# ---------------------------------------------------------------------------
+
+def _bdecode(data, i=0):
+    """
+    Decode one bencoded value starting at offset i.
+    Returns (value, end_offset). Dict values also record the byte span of
+    the 'info' key so the info hash can be computed from the raw bytes.
+    """
+    token = data[i:i + 1]
+    if token == b'i':
+        end = data.index(b'e', i)
+        return int(data[i + 1:end]), end + 1
+    if token == b'l':
+        i += 1
+        items = []
+        while data[i:i + 1] != b'e':
+            value, i = _bdecode(data, i)
+            items.append(value)
+        return items, i + 1
+    if token == b'd':
+        i += 1
+        result = {}
+        while data[i:i + 1] != b'e':
+            key, i = _bdecode(data, i)
+            start = i
+            value, i = _bdecode(data, i)
+            if key == b'info':
+                result[b'__info_span__'] = (start, i)
+            result[key] = value
+        return result, i + 1
+    if token.isdigit():
+        colon = data.index(b':', i)
+        length = int(data[i:colon])
+        start = colon + 1
+        if start + length > len(data):
+            raise InvalidTorrent("truncated string")
+        return data[start:start + length], start + length
+    raise InvalidTorrent(f"unexpected token {token!r} at offset {i}")
+
+
+def parse_metainfo(data):
+    """
+    Validate .torrent data and return (info_hash, name).
+    Raises InvalidTorrent if the data is not a usable torrent file.
+    """
+    try:
+        meta, end = _bdecode(data)
+    except InvalidTorrent:
+        raise
+    except (ValueError, IndexError, RecursionError) as e:
+        raise InvalidTorrent(f"malformed bencode: {e}")
+
+    if not isinstance(meta, dict) or b'__info_span__' not in meta:
+        raise InvalidTorrent("missing info dictionary")
+    if end != len(data):
+        raise InvalidTorrent("trailing data after metainfo")
+
+    info = meta[b'info']
+    if not isinstance(info, dict):
+        raise InvalidTorrent("info is not a dictionary")
+    for key in (b'name', b'piece length', b'pieces'):
+        if key not in info:
+            raise InvalidTorrent(f"info dictionary missing {key.decode()!r}")
+
+    start, stop = meta[b'__info_span__']
+    info_hash = hashlib.sha1(data[start:stop]).hexdigest()
+    name = info[b'name'].decode('utf-8', errors='replace')
+    return info_hash, name
+
+
+# ---------------------------------------------------------------------------
+# Cache storage
+# ---------------------------------------------------------------------------
+
+def _cache_path(info_hash):
+    return os.path.join(TORRENT_CACHE_DIR, f"{info_hash}.torrent")
+
+
+def lookup_info_hash(torrent_url):
+    """Return the cached info hash for a torrent URL, or None."""
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    c = conn.cursor()
+    c.execute('SELECT info_hash FROM torrent_files WHERE url = ?', (torrent_url,))
+    row = c.fetchone()
+    conn.close()
+    if row and os.path.exists(_cache_path(row[0])):
+        return row[0]
+    return None
+
+
+def load_metainfo(info_hash):
+    """Return the base64-encoded metainfo for a cached hash, or None."""
+    try:
+        with open(_cache_path(info_hash), 'rb') as f:
+            return base64.b64encode(f.read()).decode('ascii')
+    except OSError:
+        return None
+
+
+def _store(torrent_url, data):
+    info_hash, name = parse_metainfo(data)
+
+    path = _cache_path(info_hash)
+    if not os.path.exists(path):
+        tmp_path = f"{path}.tmp.{os.getpid()}"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.execute('''
+        INSERT OR REPLACE INTO torrent_files (url, info_hash, name, size)
+        VALUES (?, ?, ?, ?)
+    ''', (torrent_url, info_hash, name, len(data)))
+    conn.commit()
+    conn.close()
+    return info_hash
+
+
+def fetch_torrent(torrent_url):
+    """
+    Ensure the .torrent behind a URL is cached locally.
+    Returns the info hash, or None for magnet links and failed downloads.
+    """
+    if not torrent_url.startswith(('http://', 'https://')):
+        return None
+
+    info_hash = lookup_info_hash(torrent_url)
+    if info_hash:
+        return info_hash
+
+    try:
+        resp = requests.get(torrent_url, timeout=30, stream=True)
+        resp.raise_for_status()
+        chunks = []
+        size = 0
+        for chunk in resp.iter_content(chunk_size=65536):
+            size += len(chunk)
+            if size > MAX_TORRENT_SIZE:
+                log(f"torrent file too large: {torrent_url}")
+                return None
+            chunks.append(chunk)
+        return _store(torrent_url, b''.join(chunks))
+    except InvalidTorrent as e:
+        log(f"invalid torrent file from {torrent_url}: {e}")
+    except Exception as e:
+        log(f"failed to fetch {torrent_url}: {e}")
+    return None
+
+
+def prefetch_torrents(torrent_urls, max_workers=PREFETCH_WORKERS):
+    """
+    Download and cache several torrent files concurrently.
+    Returns a dict mapping each URL to its info hash (or None on failure).
+    """
+    urls = list(dict.fromkeys(torrent_urls))
+    if not urls:
+        return {}
+    if len(urls) == 1:
+        return {urls[0]: fetch_torrent(urls[0])}
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as pool:
+        return dict(zip(urls, pool.map(fetch_torrent, urls)))
+
+
+def add_torrent(tc, torrent_url, download_dir=None):
+    """
+    Add a torrent to Transmission, preferring cached metainfo over the URL.
+    Returns the info hash if known, otherwise None.
+    """
+    info_hash = lookup_info_hash(torrent_url) or fetch_torrent(torrent_url)
+    metainfo = load_metainfo(info_hash) if info_hash else None
+
+    kwargs = {'download_dir': download_dir} if download_dir else {}
+    if metainfo:
+        tc.add_torrent(metainfo, **kwargs)
+        return info_hash
+
+    torrent = tc.add_torrent(torrent_url, **kwargs)
+    try:
+        return torrent.hashString
+    except AttributeError:
+        return None
@@ -0,0 +1,235 @@
+"""
+In-process stub of the Transmission RPC subset used by Pyget Web.
+
+Serves session-get, session-stats, free-space, torrent-add, torrent-get and
+torrent-remove over HTTP with the same X-Transmission-Session-Id handshake
+as the real daemon, so transmissionrpc.Client and everything built on
+get_transmission_client/backends can run against it. It can hold thousands
+of torrents and simulate per-request latency and random failures.
+
+    stub = StubTransmission(latency=0.005, failure_rate=0.01)
+    host, port = stub.start()
+    stub.populate(5000)
+    ...
+    stub.stop()
+"""
+import json
+import time
+import base64
+import random
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from torrent_cache import parse_metainfo, InvalidTorrent
+
+RPC_VERSION = 15
+SESSION_ID = 'pyget-stub-session'
+
+# Transmission status codes for RPC version 14 and later
+STATUS_STOPPED = 0
+STATUS_DOWNLOADING = 4
+STATUS_SEEDING = 6
+
+
+class StubTransmission:
+    """A fake Transmission daemon holding torrents in memory."""
+
+    def __init__(self, latency=0.0, failure_rate=0.0, free_space=500 * 1024 ** 3,
+                 seed=None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.free_space = free_space
+        self.torrents = {}  # hashString -> torrent dict
+        self.request_counts = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._server = None
+        self._thread = None
+
+    # -- lifecycle ----------------------------------------------------------
+
+    def start(self, host='127.0.0.1', port=0):
+        """Start serving on a background thread. Returns (host, port)."""
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                stub._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self._server.server_address[:2]
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    # -- state helpers ------------------------------------------------------
+
+    def _new_torrent(self, info_hash, name, download_dir, complete=False, size=1024 ** 3):
+        torrent = {
+            'id': self._next_id,
+            'name': name,
+            'hashString': info_hash,
+            'status': STATUS_SEEDING if complete else STATUS_DOWNLOADING,
+            'sizeWhenDone': size,
+            'leftUntilDone': 0 if complete else size,
+            'percentDone': 1.0 if complete else 0.0,
+            'rateDownload': 0 if complete else 1024 * 1024,
+            'rateUpload': 64 * 1024 if complete else 0,
+            'addedDate': int(time.time()),
+            'doneDate': int(time.time()) if complete else 0,
+            'downloadDir': download_dir or '/downloads',
+            'error': 0,
+            'errorString': ''
+        }
+        self._next_id += 1
+        self.torrents[info_hash] = torrent
+        return torrent
+
+    def populate(self, count, complete_fraction=0.9, prefix='Background Show'):
+        """Add count synthetic torrents. Returns their info hashes."""
+        hashes = []
+        with self._lock:
+            for i in range(count):
+                name = f"[Stub] {prefix} {i // 12} - {i % 12 + 1:02d} (1080p).mkv"
+                info_hash = hashlib.sha1(name.encode()).hexdigest()
+                complete = self._random.random() < complete_fraction
+                self._new_torrent(info_hash, name, None, complete)
+                hashes.append(info_hash)
+        return hashes
+
+    def complete(self, info_hash):
+        """Mark a torrent as fully downloaded."""
+        with self._lock:
+            torrent = self.torrents[info_hash]
+            torrent.update({
+                'status': STATUS_SEEDING,
+                'leftUntilDone': 0,
+                'percentDone': 1.0,
+                'rateDownload': 0,
+                'doneDate': int(time.time())
+            })
+
+    def clear(self):
+        with self._lock:
+            self.torrents.clear()
+            self.request_counts.clear()
+
+    # -- RPC handling -------------------------------------------------------
+
+    def _handle(self, request):
+        if request.headers.get('X-Transmission-Session-Id') != SESSION_ID:
+            request.send_response(409)
+            request.send_header('X-Transmission-Session-Id', SESSION_ID)
+            request.end_headers()
+            return
+
+        length = int(request.headers.get('Content-Length', 0))
+        payload = json.loads(request.rfile.read(length) or b'{}')
+        method = payload.get('method')
+        arguments = payload.get('arguments', {})
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        with self._lock:
+            self.request_counts[method] = self.request_counts.get(method, 0) + 1
+            fail = self.failure_rate and self._random.random() < self.failure_rate
+
+        if fail:
+            request.send_response(503)
+            request.end_headers()
+            return
+
+        handler = getattr(self, '_rpc_' + (method or '').replace('-', '_'), None)
+        if handler is None:
+            result, args = f'method name not recognized: {method}', {}
+        else:
+            with self._lock:
+                result, args = handler(arguments)
+
+        body = json.dumps({'result': result, 'arguments': args, 'tag': payload.get('tag')}).encode()
+        request.send_response(200)
+        request.send_header('Content-Type', 'application/json')
+        request.send_header('Content-Length', str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+    def _rpc_session_get(self, arguments):
+        return 'success', {
+            'rpc-version': RPC_VERSION,
+            'rpc-version-minimum': 1,
+            'version': '2.94 (stub)',
+            'download-dir': '/downloads',
+            'download-dir-free-space': self.free_space
+        }
+
+    def _rpc_session_stats(self, arguments):
+        active = sum(1 for t in self.torrents.values() if t['status'] != STATUS_STOPPED)
+        return 'success', {
+            'activeTorrentCount': active,
+            'pausedTorrentCount': len(self.torrents) - active,
+            'torrentCount': len(self.torrents),
+            'downloadSpeed': 0,
+            'uploadSpeed': 0
+        }
+
+    def _rpc_free_space(self, arguments):
+        return 'success', {'path': arguments.get('path'), 'size-bytes': self.free_space}
+
+    def _rpc_torrent_add(self, arguments):
+        if 'metainfo' in arguments:
+            try:
+                info_hash, name = parse_metainfo(base64.b64decode(arguments['metainfo']))
+            except (InvalidTorrent, ValueError):
+                return 'invalid or corrupt torrent file', {}
+        elif 'filename' in arguments:
+            filename = arguments['filename']
+            info_hash = hashlib.sha1(filename.encode()).hexdigest()
+            name = filename.rsplit('/', 1)[-1]
+        else:
+            return 'no filename or metainfo specified', {}
+
+        existing = self.torrents.get(info_hash)
+        if existing:
+            return 'success', {'torrent-duplicate': self._brief(existing)}
+        torrent = self._new_torrent(info_hash, name, arguments.get('download-dir'))
+        return 'success', {'torrent-added': self._brief(torrent)}
+
+    def _brief(self, torrent):
+        return {'id': torrent['id'], 'name': torrent['name'], 'hashString': torrent['hashString']}
+
+    def _select(self, ids):
+        if ids is None:
+            return list(self.torrents.values())
+        if not isinstance(ids, list):
+            ids = [ids]
+        wanted = set(ids)
+        return [t for t in self.torrents.values()
+                if t['id'] in wanted or t['hashString'] in wanted]
+
+    def _rpc_torrent_get(self, arguments):
+        fields = arguments.get('fields') or []
+        torrents = []
+        for torrent in self._select(arguments.get('ids')):
+            if fields:
+                selected = {k: torrent[k] for k in fields if k in torrent}
+                selected['id'] = torrent['id']
+                torrents.append(selected)
+            else:
+                torrents.append(dict(torrent))
+        return 'success', {'torrents': torrents}
+
+    def _rpc_torrent_remove(self, arguments):
+        for torrent in self._select(arguments.get('ids')):
+            del self.torrents[torrent['hashString']]
+        return 'success', {}
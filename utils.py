@@ -1,17 +1,93 @@
 import re
-from typing import Optional
+from functools import lru_cache
+from typing import NamedTuple, Optional
 from urllib.parse import urlencode
 
+# Parsed titles are memoised; feeds return the same entries every cycle
+TITLE_CACHE_SIZE = 4096
+
+# [SubGroup] Show name - 01v2 (1080p) [ABCD1234].mkv, also ranges
+# (01-12, 01 ~ 12), decimals (05.5) and S02E05. The episode block is
+# optional so titles without one still yield their subgroup and tags.
+_EPISODE_END = r'(?=$|[\s\[\](){}~._-])'
+TITLE_RE = re.compile(r'''
+    ^\s*(?:\[(?P<subgroup>[^\]]+)\]\s*)?
+    (?:
+        (?P<show>.*?)(?=[\s._-])
+        (?:
+            \s*-\s*(?P<episode>\d+(?:\.\d+)?)(?:v(?P<version>\d+))?
+          | (?:\s+-\s*|[\s._])S(?P<season>\d{1,2})E(?P<s_episode>\d{1,4}(?:\.\d+)?)(?:v(?P<s_version>\d+))?
+        )''' + _EPISODE_END + r'''
+        (?:\s*[-~]\s*E?(?P<episode_end>\d+(?:\.\d+)?)(?:v\d+)?''' + _EPISODE_END + r''')?
+    )?
+    (?P<tail>.*)$
+''', re.VERBOSE | re.IGNORECASE | re.DOTALL)
+
+# Tags after the episode: quality, CRC and a detached " v2"; the
+# lookahead skips most positions without trying each alternative
+TAG_RE = re.compile(r'''
+    (?=[\d\[v])(?:
+        (?<!\d)(?P<quality>\d{3,4})p(?!\w)
+      | (?<![\w])\d{3,4}x(?P<height>\d{3,4})(?!\w)
+      | \[(?P<crc>[0-9a-f]{8})\]
+      | (?<![^\s\[(])v(?P<version>\d+)(?![^\s\])])
+    )
+''', re.VERBOSE | re.IGNORECASE)
+
+
+class TitleInfo(NamedTuple):
+    """Fields of a release title; episode numbers keep their padding."""
+    show_name: Optional[str]
+    episode: Optional[str]
+    episode_end: Optional[str]
+    season: Optional[int]
+    version: int
+    subgroup: Optional[str]
+    quality: Optional[str]
+    crc: Optional[str]
+
+
+@lru_cache(maxsize=TITLE_CACHE_SIZE)
+def parse_title(title: str) -> TitleInfo:
+    """
+    Parse a release title in a single pass.
+    Expected: [SubGroup] Show name - episode (quality) [CRC].mkv
+    """
+    match = TITLE_RE.match(title)
+    episode = match.group('episode') or match.group('s_episode')
+    version = match.group('version') or match.group('s_version')
+    season = match.group('season')
+    show_name = match.group('show').strip() if episode else None
+
+    quality = crc = None
+    for tag in TAG_RE.finditer(match.group('tail')):
+        if tag.group('quality'):
+            quality = quality or f"{tag.group('quality')}p"
+        elif tag.group('height'):
+            quality = quality or f"{tag.group('height')}p"
+        elif tag.group('crc'):
+            crc = crc or tag.group('crc').upper()
+        elif not version:
+            version = tag.group('version')
+
+    subgroup = match.group('subgroup')
+    return TitleInfo(
+        show_name=show_name or None,
+        episode=episode,
+        episode_end=match.group('episode_end') if episode else None,
+        season=int(season) if season else None,
+        version=int(version) if version else 1,
+        subgroup=subgroup.strip() if subgroup else None,
+        quality=quality,
+        crc=crc,
+    )
+
 def parse_anime_title(title: str) -> Optional[str]:
     """
     Extract show name from anime title format.
     Expected: [SubGroup] Show name - episode (quality) [id].mkv
     """
-    # Remove brackets and their contents from the start
-    match = re.search(r'\[.*?\]\s*(.*?)\s*-\s*\d+', title)
-    if match:
-        return match.group(1).strip()
-    return None
+    return parse_title(title).show_name
 
 def build_feed_url(base_url: str, uploader: str = None,
                    quality: str = None, show: str = None) -> str:
@@ -35,49 +111,26 @@ def build_feed_url(base_url: str, uploader: str = None,
 
 def extract_episode_number(title: str) -> Optional[str]:
     """Extract episode number from anime title format."""
-    # Expected: [SubGroup] Show name - 01 (quality) [id].mkv
-    match = re.search(r'-\s*(\d+)', title)
-    if match:
-        return match.group(1)
-    return None
+    return parse_title(title).episode
 
 def extract_subgroup(title: str) -> Optional[str]:
     """Extract subgroup from anime title format."""
-    # Expected: [SubGroup] Show name - episode (quality) [id].mkv
-    match = re.search(r'^\[([^\]]+)\]', title)
-    if match:
-        return match.group(1).strip()
-    return None
+    return parse_title(title).subgroup
 
 def extract_version(title: str) -> Optional[str]:
     """Extract version number from title (v2, v3, etc.)."""
-    match = re.search(r'\s+v(\d+)(?:\s|$)', title, re.IGNORECASE)
-    return match.group(1) if match else None
+    version = parse_title(title).version
+    return str(version) if version > 1 else None
 
 def extract_quality(title: str) -> Optional[str]:
-    """Extract quality from anime title format."""
-    # Look for patterns like (1080p), (720p), etc.
-    match = re.search(r'\((\d+p)\)', title)
-    if match:
-        return match.group(1)
-    return None
+    """Extract quality (1080p, 720p, etc.) from anime title format."""
+    return parse_title(title).quality
 
 def parse_episode_info(title: str) -> dict:
     """
     Parse comprehensive episode information from title.
     Expected format: [SubGroup] Show name - episode (quality) [id].mkv
-    Returns dict with: show_name, episode, subgroup, version, quality
+    Returns dict with: show_name, episode, episode_end, season, subgroup,
+    version, quality, crc
     """
-    show_name = parse_anime_title(title)
-    episode = extract_episode_number(title)
-    subgroup = extract_subgroup(title)
-    version = extract_version(title)
-    quality = extract_quality(title)
-    
-    return {
-        'show_name': show_name,
-        'episode': episode,
-        'subgroup': subgroup,
-        'version': int(version) if version and version.isdigit() else 1,
-        'quality': quality
-    }
+    return parse_title(title)._asdict()